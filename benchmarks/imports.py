@@ -0,0 +1,221 @@
+"""
+Benchmark de importación, actualización de estados y exportación con Excel sintéticos.
+
+Para cada tamaño genera (o reutiliza) un Excel principal y uno de seguimiento con
+benchmarks/workbooks.py y, en un proceso nuevo con una base vacía en una carpeta temporal, mide:
+process_excel, update_seguimiento_from_excel, update_payment_status,
+update_zero_negative_status, export_seguimiento_to_excel y export_pending_to_excel.
+
+El resultado se guarda en JSON. Con --baseline se compara contra un resultado anterior y se
+marcan como regresión los escenarios más lentos que el umbral (el código de salida es 1), por
+lo que sirve en cualquier Linux sin pantalla.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/imports.py [--sizes 10000 100000 500000] [--runs 1] [--output resultado.json]
+                                 [--baseline base.json] [--threshold 0.2] [--data /tmp/libros]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_SIZES = [10000, 100000, 500000]
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / 'facturacion-benchmarks'
+SCENARIOS = ['process_excel', 'update_seguimiento', 'payment_status', 'zero_negative_status',
+             'export_seguimiento', 'export_pending']
+# Operación con la que cada escenario queda en el archivo de métricas (tiempos por fase)
+METRICS_OPERATIONS = {
+    'process_excel': 'importacion',
+    'update_seguimiento': 'seguimiento',
+    'export_seguimiento': 'exportacion_seguimiento',
+    'export_pending': 'exportacion_pendientes',
+}
+# Diferencias menores no se consideran regresión (ruido en escenarios de milisegundos)
+MIN_REGRESSION_SECONDS = 0.05
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    return env
+
+
+def run_scenarios(primary: Path, seguimiento: Path, work_dir: Path) -> Dict:
+    """Proceso hijo: ejecutar los escenarios sobre una base nueva en work_dir"""
+    import copy
+    import logging
+    from src.core.config import get_config
+    from src.models.database import DatabaseManager
+
+    logging.basicConfig(level=logging.WARNING)
+    config = copy.deepcopy(get_config())
+    config['ui']['open_after_export'] = False
+    config['paths'].update({
+        'db_path': work_dir / 'facturacion.db',
+        'archive_path': work_dir / 'facturacion_historico.db',
+        'backup_dir': work_dir / 'backups',
+        'logs_dir': work_dir,
+    })
+    db = DatabaseManager(config, logging.getLogger('facturacion'))
+    db.wait_until_ready()
+
+    no_progress = lambda *args: None
+    steps = [
+        ('process_excel', lambda: db.process_excel(str(primary), no_progress)),
+        ('update_seguimiento', lambda: db.update_seguimiento_from_excel(str(seguimiento), no_progress)),
+        ('payment_status', db.update_payment_status),
+        ('zero_negative_status', db.update_zero_negative_status),
+        ('export_seguimiento', lambda: db.export_seguimiento_to_excel(work_dir / 'seguimiento.xlsx')),
+        ('export_pending', lambda: db.export_pending_to_excel(work_dir / 'pendientes.xlsx')),
+    ]
+    results = {}
+    for name, step in steps:
+        started = time.perf_counter()
+        success, message = step()
+        results[name] = {'seconds': time.perf_counter() - started, 'success': success}
+        if not success:
+            results[name]['error'] = message
+    db.offloader.shutdown()
+
+    metrics_path = work_dir / config['metrics']['file_name']
+    if metrics_path.exists():
+        records = {}
+        for line in metrics_path.read_text(encoding='utf-8').splitlines():
+            record = json.loads(line)
+            records[record['operacion']] = record['fases']
+        for name, operation in METRICS_OPERATIONS.items():
+            if operation in records:
+                results[name]['phases'] = {phase['fase']: phase['segundos'] for phase in records[operation]}
+    return results
+
+
+def measure_size(rows: int, data_dir: Path, runs: int) -> Dict:
+    """Mediana de runs ejecuciones (cada una en un proceso y una base nuevos) para un tamaño"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from workbooks import write_workbooks
+
+    paths = write_workbooks(data_dir, rows)
+    samples: Dict[str, List[float]] = {name: [] for name in SCENARIOS}
+    phases: Dict[str, Dict] = {}
+    errors: Dict[str, str] = {}
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory(prefix='facturacion-bench-') as work_dir:
+            process = subprocess.run(
+                [sys.executable, str(Path(__file__).resolve()), '--child',
+                 str(paths['primary']), str(paths['seguimiento']), work_dir],
+                cwd=ROOT, env=_child_env(), capture_output=True, text=True
+            )
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines()
+            return {'rows': rows, 'error': lines[-1] if lines else f"código {process.returncode}"}
+        for name, result in json.loads(process.stdout.strip().splitlines()[-1]).items():
+            if result['success']:
+                samples[name].append(result['seconds'])
+                phases[name] = result.get('phases', {})
+            else:
+                errors[name] = result['error']
+
+    scenarios = {}
+    for name, values in samples.items():
+        if name in errors:
+            scenarios[name] = {'error': errors[name]}
+        elif values:
+            median = statistics.median(values)
+            scenarios[name] = {'seconds': median, 'min': min(values), 'max': max(values),
+                               'rows_per_second': rows / median if median else None}
+            if phases.get(name):
+                scenarios[name]['phases'] = phases[name] # De la última ejecución
+    return {'rows': rows, 'runs': runs, 'scenarios': scenarios}
+
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[Dict]:
+    """Escenarios que tardan más que la línea base en más de threshold (fracción)"""
+    previous = {entry['rows']: entry.get('scenarios', {}) for entry in baseline.get('sizes', [])}
+    regressions = []
+    for entry in results['sizes']:
+        for name, current in entry.get('scenarios', {}).items():
+            before = previous.get(entry['rows'], {}).get(name, {})
+            if 'seconds' not in current or not before.get('seconds'):
+                continue
+            change = current['seconds'] / before['seconds'] - 1
+            if change > threshold and current['seconds'] - before['seconds'] >= MIN_REGRESSION_SECONDS:
+                regressions.append({'rows': entry['rows'], 'scenario': name, 'baseline': before['seconds'],
+                                    'current': current['seconds'], 'change': change})
+    return regressions
+
+
+def _print_report(results: Dict, regressions: List[Dict] | None):
+    for entry in results['sizes']:
+        print(f"{entry['rows']:,} filas")
+        if 'error' in entry:
+            print(f"  Error: {entry['error']}")
+            continue
+        for name in SCENARIOS:
+            values = entry['scenarios'].get(name, {})
+            if 'error' in values:
+                print(f"  {name:<22} error: {values['error']}")
+            elif values:
+                print(f"  {name:<22} {values['seconds']:9.2f}s  {values['rows_per_second'] or 0:12,.0f} filas/s")
+                for phase, seconds in values.get('phases', {}).items():
+                    print(f"    {phase:<20} {seconds:9.2f}s")
+    if regressions is None:
+        return
+    print(f"\nRegresiones respecto de la línea base: {len(regressions)}")
+    for item in regressions:
+        print(f"  {item['rows']:,} filas · {item['scenario']}: {item['baseline']:.2f}s -> "
+              f"{item['current']:.2f}s (+{item['change']:.0%})")
+
+
+def main() -> int:
+    if len(sys.argv) == 5 and sys.argv[1] == '--child':
+        results = run_scenarios(Path(sys.argv[2]), Path(sys.argv[3]), Path(sys.argv[4]))
+        print(json.dumps(results), flush=True)
+        return 0
+
+    parser = argparse.ArgumentParser(description='Benchmark de importación, estados y exportación')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='Filas del Excel principal')
+    parser.add_argument('--runs', type=int, default=1, help='Ejecuciones por tamaño (se informa la mediana)')
+    parser.add_argument('--data', type=Path, default=DEFAULT_DATA_DIR, help='Carpeta de los Excel generados')
+    parser.add_argument('--output', type=Path, help='Archivo JSON donde guardar el resultado')
+    parser.add_argument('--baseline', type=Path, help='Resultado JSON anterior con el que comparar')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Aumento de tiempo tolerado respecto de la línea base (0.2 = 20%%)')
+    parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+    args = parser.parse_args()
+
+    results = {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'sizes': [measure_size(rows, args.data, args.runs) for rows in args.sizes],
+    }
+    regressions = None
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding='utf-8')), args.threshold)
+        results['regressions'] = regressions
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    if args.json:
+        json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        _print_report(results, regressions)
+
+    failed = any('error' in entry or any('error' in s for s in entry['scenarios'].values())
+                 for entry in results['sizes'])
+    return 1 if failed or regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
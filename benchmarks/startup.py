@@ -0,0 +1,138 @@
+"""
+Benchmark de arranque de la aplicación.
+
+Mide, en procesos nuevos, el tiempo hasta que la ventana principal se dibuja y hasta que el
+esquema de la base queda preparado, y lista los módulos que más tardan en importarse según
+python -X importtime.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/startup.py [--runs 5] [--top 15] [--module src.main] [--json]
+
+Usa la base de datos configurada (src/core/facturacion.db), igual que la aplicación real.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Proceso hijo: crea la ventana, la dibuja y avisa; luego espera al esquema
+FIRST_WINDOW_SCRIPT = """
+from src.main import create_app
+from src.models.database import DatabaseManager
+root = create_app()
+root.update()
+print('WINDOW', flush=True)
+DatabaseManager._instance.wait_until_ready()
+print('SCHEMA', flush=True)
+root.destroy()
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(ROOT), env.get('PYTHONPATH')]))
+    return env
+
+
+def measure_first_window(runs: int) -> Dict:
+    """Segundos desde el inicio del proceso hasta la ventana dibujada y el esquema listo"""
+    window: List[float] = []
+    schema: List[float] = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, '-c', FIRST_WINDOW_SCRIPT], cwd=ROOT, env=_child_env(),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+        )
+        for line in process.stdout:
+            if line.strip() == 'WINDOW':
+                window.append(time.perf_counter() - started)
+            elif line.strip() == 'SCHEMA':
+                schema.append(time.perf_counter() - started)
+        _, errors = process.communicate()
+        if process.returncode != 0:
+            return {'error': errors.strip().splitlines()[-1] if errors.strip() else f"código {process.returncode}"}
+
+    return {'runs': runs, 'window': _summary(window), 'schema': _summary(schema)}
+
+
+def measure_imports(module: str, top: int) -> Dict:
+    """Módulos con mayor tiempo de importación acumulado y propio (microsegundos)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT, env=_child_env(),
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        return {'error': result.stderr.strip().splitlines()[-1]}
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append({'module': name.strip(), 'self_us': int(self_us), 'cumulative_us': int(cumulative_us)})
+
+    top_level = [entry for entry in entries if entry['module'] == module]
+    return {
+        'module': module,
+        'total_us': top_level[-1]['cumulative_us'] if top_level else sum(e['self_us'] for e in entries),
+        'by_cumulative': sorted(entries, key=lambda e: e['cumulative_us'], reverse=True)[:top],
+        'by_self': sorted(entries, key=lambda e: e['self_us'], reverse=True)[:top],
+    }
+
+
+def _summary(values: List[float]) -> Dict:
+    if not values:
+        return {}
+    return {'median': statistics.median(values), 'min': min(values), 'max': max(values)}
+
+
+def _print_report(window: Dict, imports: Dict):
+    print("Tiempo hasta la primera ventana")
+    if 'error' in window:
+        print(f"  No se pudo abrir la ventana: {window['error']}")
+    else:
+        for label, key in (('Ventana dibujada', 'window'), ('Esquema listo', 'schema')):
+            values = window[key]
+            print(f"  {label:<18} mediana {values['median']:.3f}s  (mín {values['min']:.3f}s, máx {values['max']:.3f}s, "
+                  f"{window['runs']} ejecuciones)")
+
+    print(f"\nImportaciones (python -X importtime -c 'import {imports.get('module', '')}')")
+    if 'error' in imports:
+        print(f"  Error: {imports['error']}")
+        return
+    print(f"  Total: {imports['total_us'] / 1000:.1f} ms")
+    for title, key in (('Mayor tiempo acumulado', 'by_cumulative'), ('Mayor tiempo propio', 'by_self')):
+        print(f"  {title}:")
+        for entry in imports[key]:
+            print(f"    {entry['cumulative_us'] / 1000:9.1f} ms acum. {entry['self_us'] / 1000:9.1f} ms propio  {entry['module']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Benchmark de arranque de la aplicación')
+    parser.add_argument('--runs', type=int, default=5, help='Ejecuciones para medir la primera ventana')
+    parser.add_argument('--top', type=int, default=15, help='Módulos a listar en el reporte de importaciones')
+    parser.add_argument('--module', default='src.main', help='Módulo a analizar con -X importtime')
+    parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+    args = parser.parse_args()
+
+    window = measure_first_window(args.runs)
+    imports = measure_imports(args.module, args.top)
+
+    if args.json:
+        json.dump({'first_window': window, 'imports': imports}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        _print_report(window, imports)
+    return 0 if 'error' not in window and 'error' not in imports else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
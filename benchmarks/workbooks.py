@@ -0,0 +1,158 @@
+"""
+Generador determinista de Excel sintéticos (principal y de seguimiento) para los benchmarks.
+
+Con la misma semilla y los mismos parámetros produce siempre los mismos datos, con la forma de
+los extractos reales del HIS: compañías y servicios repetidos, pocos cientos de fechas
+distintas, documentos repetidos (líneas corregidas), pagados y montos cero o negativos.
+
+Uso (desde la raíz del proyecto):
+    python benchmarks/workbooks.py --rows 10000 --out /tmp/libros [--seed 1] [--duplicate-rate 0.02]
+"""
+import argparse
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+COMPANIES = ['RIMAC', 'PACIFICO', 'MAPFRE', 'LA POSITIVA', 'SANITAS', 'INTERSEGURO', 'SIS', 'PARTICULAR']
+SERVICES = ['Consulta Externa', 'Emergencia', 'Hospitalización', 'Rayos X', 'Laboratorio', 'Tomografía',
+            'Ecografía', 'Farmacia', 'Cirugía', 'Rehabilitación']
+COMPANIES_EMP = ['CLINICA CENTRAL', 'SEDE NORTE', 'SEDE SUR']
+USERS = [f'usuario{i:02d}' for i in range(12)]
+BILLERS = [f'Facturador {i:02d}' for i in range(8)]
+PRODUCTS = ['AMBULATORIO', 'HOSPITALARIO', 'EMERGENCIA', 'PAQUETE']
+INSURER_STATES = ['Enviado', 'Recibido', 'Observado', 'En auditoría', 'Rechazado']
+
+DEFAULT_PARAMETERS = {
+    'seed': 1,
+    'duplicate_rate': 0.02,       # Fracción de filas que repiten un num_doc anterior
+    'paid_ratio': 0.4,            # Fracción con número y fecha de pago
+    'zero_negative_ratio': 0.05,  # Fracción con monto cero o negativo
+    'seguimiento_ratio': 0.3,     # Fracción de documentos incluidos en el Excel de seguimiento
+}
+
+FIRST_DATE = date(2023, 1, 2)
+DATE_SPAN_DAYS = 540
+
+
+def _dates(rng: np.random.Generator, rows: int, offset_days: int = 0) -> np.ndarray:
+    days = rng.integers(0, DATE_SPAN_DAYS, rows) + offset_days
+    return np.array([(FIRST_DATE + timedelta(days=int(d))).isoformat() for d in range(DATE_SPAN_DAYS + 60)])[days]
+
+
+def generate_primary(rows: int, seed: int = 1, duplicate_rate: float = 0.02, paid_ratio: float = 0.4,
+                     zero_negative_ratio: float = 0.05) -> pd.DataFrame:
+    """Excel principal con las columnas requeridas (DB_CONFIG['required_columns'])"""
+    rng = np.random.default_rng(seed)
+    # Documentos únicos y, para una fracción de filas, un documento anterior repetido
+    doc_numbers = np.arange(1, rows + 1)
+    duplicates = rng.random(rows) < duplicate_rate
+    duplicates[0] = False
+    doc_numbers[duplicates] = rng.integers(1, np.maximum(np.arange(rows)[duplicates], 1) + 1)
+    num_doc = np.char.add('D', np.char.zfill(doc_numbers.astype(str), 8))
+
+    amounts = np.round(rng.gamma(2.0, 180.0, rows), 2)
+    zero_negative = rng.random(rows) < zero_negative_ratio
+    amounts[zero_negative] = np.where(rng.random(zero_negative.sum()) < 0.5, 0.0,
+                                      -np.round(rng.uniform(5, 200, zero_negative.sum()), 2))
+    paid = (rng.random(rows) < paid_ratio) & ~zero_negative
+
+    fec_doc = _dates(rng, rows)
+    fec_fac = _dates(rng, rows, 15)
+    fec_pag = np.where(paid, _dates(rng, rows, 45), None)
+    num_pag = np.where(paid, np.char.add('P', np.char.zfill(np.arange(rows).astype(str), 8)), None)
+
+    return pd.DataFrame({
+        'num_doc': num_doc,
+        'fec_doc': fec_doc,
+        'nh_pac': (100000 + rng.integers(0, max(rows // 3, 1), rows)).astype(str),
+        'nom_pac': np.char.add('PACIENTE ', rng.integers(0, max(rows // 3, 1), rows).astype(str)),
+        'nom_emp': rng.choice(COMPANIES_EMP, rows),
+        'nom_cia': rng.choice(COMPANIES, rows, p=[0.25, 0.2, 0.15, 0.12, 0.1, 0.08, 0.06, 0.04]),
+        'ta_doc': rng.choice(['A', 'B', 'F'], rows),
+        'nom_ser': rng.choice(SERVICES, rows),
+        'tot_doc': amounts,
+        'num_fac': np.char.add('F001-', np.char.zfill(doc_numbers.astype(str), 6)),
+        'fec_fac': fec_fac,
+        'num_pag': num_pag,
+        'fec_pag': fec_pag,
+        'usu_sis': rng.choice(USERS, rows),
+        'cod_dx': rng.choice(['J00', 'K29.7', 'M54.5', 'R51', 'Z00.0'], rows),
+        'facturador': rng.choice(BILLERS, rows),
+        'producto': rng.choice(PRODUCTS, rows),
+    })
+
+
+def generate_seguimiento(primary: pd.DataFrame, seed: int = 1, seguimiento_ratio: float = 0.3) -> pd.DataFrame:
+    """Excel de seguimiento (encabezados amigables) para una fracción de los documentos del principal"""
+    rng = np.random.default_rng(seed + 1)
+    documents = primary['num_doc'].drop_duplicates().to_numpy()
+    selected = documents[rng.random(len(documents)) < seguimiento_ratio]
+    rows = len(selected)
+    received = rng.random(rows) < 0.5
+    return pd.DataFrame({
+        'Número de Documento': selected,
+        'Estado Aseguradora': rng.choice(INSURER_STATES, rows),
+        'Fecha de Envío': _dates(rng, rows, 20),
+        'Fecha de Recepción': np.where(received, _dates(rng, rows, 30), None),
+        'Observaciones': np.where(rng.random(rows) < 0.3, 'Falta informe médico', ''),
+        'Acciones': np.where(rng.random(rows) < 0.2, 'Reenviar expediente', ''),
+    })
+
+
+def workbook_paths(out_dir: Path, rows: int, parameters: Dict) -> Dict[str, Path]:
+    """Rutas de los libros para estos parámetros (el nombre los identifica: sirven de caché)"""
+    key = '-'.join(f"{parameters[name]}" for name in sorted(parameters))
+    return {
+        'primary': out_dir / f"principal-{rows}-{key}.xlsx",
+        'seguimiento': out_dir / f"seguimiento-{rows}-{key}.xlsx",
+    }
+
+
+def write_workbooks(out_dir: Path, rows: int, parameters: Dict | None = None) -> Dict[str, Path]:
+    """Generar (si no existen ya) el Excel principal y el de seguimiento"""
+    parameters = {**DEFAULT_PARAMETERS, **(parameters or {})}
+    paths = workbook_paths(out_dir, rows, parameters)
+    if all(path.exists() for path in paths.values()):
+        return paths
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    primary = generate_primary(rows, parameters['seed'], parameters['duplicate_rate'],
+                               parameters['paid_ratio'], parameters['zero_negative_ratio'])
+    seguimiento = generate_seguimiento(primary, parameters['seed'], parameters['seguimiento_ratio'])
+    # Escribir con nombre temporal: una generación interrumpida no queda como caché válida
+    for name, df in (('primary', primary), ('seguimiento', seguimiento)):
+        partial = paths[name].with_suffix('.partial.xlsx')
+        df.to_excel(partial, index=False)
+        partial.replace(paths[name])
+    return paths
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Generar Excel sintéticos para benchmarks')
+    parser.add_argument('--rows', type=int, required=True, help='Filas del Excel principal')
+    parser.add_argument('--out', type=Path, required=True, help='Carpeta de salida')
+    parser.add_argument('--seed', type=int, default=DEFAULT_PARAMETERS['seed'])
+    parser.add_argument('--duplicate-rate', type=float, default=DEFAULT_PARAMETERS['duplicate_rate'])
+    parser.add_argument('--paid-ratio', type=float, default=DEFAULT_PARAMETERS['paid_ratio'])
+    parser.add_argument('--zero-negative-ratio', type=float, default=DEFAULT_PARAMETERS['zero_negative_ratio'])
+    parser.add_argument('--seguimiento-ratio', type=float, default=DEFAULT_PARAMETERS['seguimiento_ratio'])
+    args = parser.parse_args()
+
+    paths = write_workbooks(args.out, args.rows, {
+        'seed': args.seed,
+        'duplicate_rate': args.duplicate_rate,
+        'paid_ratio': args.paid_ratio,
+        'zero_negative_ratio': args.zero_negative_ratio,
+        'seguimiento_ratio': args.seguimiento_ratio,
+    })
+    for path in paths.values():
+        print(path)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
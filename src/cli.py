@@ -0,0 +1,203 @@
+"""
+Interfaz de línea de comandos sin interfaz gráfica (python -m src).
+
+Permite ejecutar importaciones y exportaciones desde tareas programadas en un servidor sin
+pantalla. Nunca importa customtkinter ni tkinter.
+"""
+import argparse
+import json
+import sys
+import threading
+from pathlib import Path
+from typing import List, TextIO
+
+from src.core.config import get_config
+from src.core.logging_config import setup_logging
+
+EXIT_OK = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+
+
+class TextProgressBar:
+    """Barra de progreso de texto; solo se redibuja cuando cambia el porcentaje entero"""
+
+    def __init__(self, stream: TextIO = sys.stderr, width: int = 30):
+        self.stream = stream
+        self.width = width
+        self._last_percent = -1
+
+    def __call__(self, progress_percentage: float, message: str = ""):
+        percent = int(max(0.0, min(progress_percentage, 100.0)))
+        if percent == self._last_percent:
+            return
+        self._last_percent = percent
+        filled = self.width * percent // 100
+        bar = '#' * filled + '.' * (self.width - filled)
+        self.stream.write(f"\r[{bar}] {percent:3d}% {message[:40]:<40}")
+        self.stream.flush()
+
+    def finish(self):
+        if self._last_percent >= 0:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='python -m src',
+        description='Seguimiento de Facturación - operaciones sin interfaz gráfica'
+    )
+    parser.add_argument('-v', '--verbose', action='store_true', help='Mostrar el log también en la consola')
+    parser.add_argument('--sql-trace', action='store_true',
+                        help='Diagnóstico: perfil SQL por operación y consultas lentas con su plan (en el log)')
+    subparsers = parser.add_subparsers(dest='command', metavar='comando')
+
+    import_parser = subparsers.add_parser('import', help='Importar el Excel principal (detalle_atenciones)')
+    import_parser.add_argument('file', type=Path, help='Archivo Excel')
+
+    seguimiento_parser = subparsers.add_parser('seguimiento', help='Actualizar seguimiento desde Excel')
+    seguimiento_parser.add_argument('file', type=Path, help='Archivo Excel de seguimiento')
+
+    export_parser = subparsers.add_parser('export', help='Exportar todos los datos a Excel')
+    export_parser.add_argument('output', type=Path, help='Archivo Excel de salida')
+    export_parser.add_argument('--historial', action='store_true',
+                               help='Una fila por evento de seguimiento en lugar del estado actual')
+
+    pending_parser = subparsers.add_parser('export-pending', help='Exportar pendientes a Excel')
+    pending_parser.add_argument('output', type=Path, help='Archivo Excel de salida')
+
+    stats_parser = subparsers.add_parser('stats', help='Mostrar estadísticas de la base de datos')
+    stats_parser.add_argument('--json', action='store_true', help='Salida en formato JSON')
+
+    watch_parser = subparsers.add_parser('watch', help='Importar automáticamente los Excel de carpetas vigiladas')
+    watch_parser.add_argument('--dir', type=Path, action='append', dest='directories',
+                              help='Carpeta a vigilar (repetible; por defecto la configurada)')
+    watch_parser.add_argument('--once', action='store_true',
+                              help='Revisar una sola vez sin esperar a que los archivos se estabilicen')
+
+    serve_parser = subparsers.add_parser('serve', help='Servicio HTTP/JSON local de consultas e importación')
+    serve_parser.add_argument('--host', help='Dirección de escucha (por defecto 127.0.0.1)')
+    serve_parser.add_argument('--port', type=int, help='Puerto (por defecto 8765)')
+
+    clear_parser = subparsers.add_parser('clear', help='Eliminar todos los datos de la base de datos')
+    clear_parser.add_argument('--yes', action='store_true', help='Confirmar la eliminación (obligatorio)')
+
+    return parser
+
+
+def print_stats(stats: dict, as_json: bool, stream: TextIO = sys.stdout):
+    if as_json:
+        json.dump(stats, stream, ensure_ascii=False, indent=2)
+        stream.write("\n")
+        return
+
+    stream.write(f"Registros: {stats.get('total_registros', 0)}  Monto total: S/ {stats.get('monto_total', 0):,.2f}\n")
+    stream.write(f"Pendientes: {stats.get('pendientes', 0)}  Monto pendiente: S/ {stats.get('monto_pendiente', 0):,.2f}\n")
+    if stats.get('archivados'):
+        stream.write(f"Archivados: {stats['archivados']}\n")
+    for title, key in (('Por estado', 'por_estado'), ('Por compañía', 'por_cia')):
+        stream.write(f"{title}:\n")
+        for clave, registros, monto in stats.get(key, []):
+            stream.write(f"  {clave:<30} {registros:>8}  S/ {monto:,.2f}\n")
+
+
+def run(args: argparse.Namespace) -> int:
+    config = get_config()
+    # En un servidor no hay quien vea el archivo exportado
+    config['ui']['open_after_export'] = False
+    if args.sql_trace:
+        config['diagnostics']['sql_trace'] = True
+    logger = setup_logging(console=args.verbose)
+
+    # Importar aquí para que --help responda sin cargar pandas ni abrir la base
+    from src.models.database import DatabaseManager
+    from src.controllers.excel_controller import ExcelController
+
+    db_manager = DatabaseManager(config=config, logger=logger)
+    controller = ExcelController(db_manager)
+
+    if args.command == 'watch':
+        return run_watch(db_manager, args)
+    if args.command == 'serve':
+        return run_serve(db_manager, args)
+
+    if args.command == 'stats':
+        stats = controller.handle_get_dashboard_stats()
+        if not stats:
+            sys.stderr.write("No se pudieron obtener las estadísticas\n")
+            return EXIT_FAILURE
+        print_stats(stats, args.json)
+        return EXIT_OK
+
+    if args.command == 'clear' and not args.yes:
+        sys.stderr.write("Use --yes para confirmar la eliminación de todos los datos\n")
+        return EXIT_USAGE
+
+    progress = TextProgressBar()
+    if args.command == 'import':
+        success, message = controller.handle_primary_excel_import(args.file, progress)
+    elif args.command == 'seguimiento':
+        success, message = controller.handle_seguimiento_update_from_excel(args.file, progress)
+    elif args.command == 'export':
+        success, message = controller.handle_excel_export(args.output, args.historial, progress)
+    elif args.command == 'export-pending':
+        success, message = controller.handle_pending_export(args.output, progress)
+    else:
+        success, message = controller.handle_clear_database()
+    progress.finish()
+
+    (sys.stdout if success else sys.stderr).write(f"{message}\n")
+    return EXIT_OK if success else EXIT_FAILURE
+
+
+def run_watch(db_manager, args: argparse.Namespace) -> int:
+    from src.controllers.folder_watcher import FolderWatcher
+    from src.models.ingest import INGEST_OK
+
+    if args.once:
+        # Ejecución puntual (p. ej. desde el Programador de tareas): todo archivo presente está completo
+        watcher = FolderWatcher(db_manager, args.directories, settle_seconds=0)
+        results = watcher.poll_once()
+        for result in results:
+            sys.stdout.write(f"{result['estado']:<10} {Path(result['archivo']).name}: {result['mensaje']}\n")
+        return EXIT_OK if all(result['estado'] == INGEST_OK for result in results) else EXIT_FAILURE
+
+    watcher = FolderWatcher(db_manager, args.directories)
+    stop_event = threading.Event()
+    try:
+        watcher.run(stop_event)
+    except KeyboardInterrupt:
+        stop_event.set()
+    return EXIT_OK
+
+
+def run_serve(db_manager, args: argparse.Namespace) -> int:
+    from src.controllers.api_service import create_server
+
+    server = create_server(db_manager, args.host, args.port)
+    host, port = server.server_address[:2]
+    sys.stdout.write(f"Servicio disponible en http://{host}:{port}/api (Ctrl+C para detener)\n")
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.RequestHandlerClass.service.close()
+    return EXIT_OK
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help(sys.stderr)
+        return EXIT_USAGE
+
+    try:
+        return run(args)
+    except KeyboardInterrupt:
+        sys.stderr.write("\nOperación cancelada\n")
+        return EXIT_FAILURE
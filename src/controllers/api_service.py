@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from src.models.database import DatabaseManager
+from src.utils.constants import Messages, SQLQueries
+
+logger = logging.getLogger('facturacion')
+
+
+class ApiError(Exception):
+    """Error que se devuelve al cliente con su código HTTP"""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ReadConnectionPool:
+    """
+    Conexiones de solo lectura reutilizadas entre peticiones.
+
+    Cada conexión tiene el archivo histórico adjunto y PRAGMA query_only activo. Con WAL las
+    lecturas no esperan al escritor. Al tomar una conexión se comprueba si el archivo histórico
+    apareció o desapareció desde que se adjuntó (p. ej. el primer archivado con el servicio en
+    marcha) y, si cambió, se rehacen el adjunto y las vistas de unión.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, size: int):
+        db_manager.wait_until_ready()
+        self._archive = db_manager.archive
+        self._connections: queue.Queue = queue.Queue()
+        # Conexión -> si tiene el archivo adjunto (solo la modifica el hilo que la tiene tomada)
+        self._attached: Dict[sqlite3.Connection, bool] = {}
+        for _ in range(size):
+            conn = db_manager.sql_profiler.connect(db_manager.db_path, timeout=30.0, check_same_thread=False)
+            self._attached[conn] = self._archive.attach(conn)
+            conn.execute("PRAGMA query_only = ON")
+            conn.row_factory = sqlite3.Row
+            self._connections.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connections.get()
+        try:
+            if self._attached[conn] != self._archive.exists():
+                # Las vistas temporales no se pueden recrear con query_only activo
+                conn.execute("PRAGMA query_only = OFF")
+                try:
+                    self._attached[conn] = self._archive.reattach(conn, self._attached[conn])
+                finally:
+                    conn.execute("PRAGMA query_only = ON")
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self):
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+
+class ResponseCache:
+    """
+    Respuestas JSON recientes por URL, válidas mientras no cambie la versión de los datos.
+
+    La versión combina fecha y tamaño de la base, del archivo histórico y de sus WAL (cambian
+    con cualquier confirmación, también de la aplicación o del vigilante de carpetas) y un
+    contador que el escritor del servicio incrementa tras cada importación.
+    """
+
+    def __init__(self, paths: List[Path], max_entries: int):
+        self.paths = [path for db_path in paths for path in (Path(db_path), Path(f"{db_path}-wal"))]
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: OrderedDict[str, Tuple[str, str, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def data_version(self) -> str:
+        parts = [str(self.generation)]
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                parts.append(f"{stat.st_mtime_ns}:{stat.st_size}")
+            except FileNotFoundError:
+                parts.append('-')
+        return '|'.join(parts)
+
+    def get(self, key: str, version: str) -> Tuple[str, bytes] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def put(self, key: str, version: str, body: bytes) -> str:
+        etag = '"' + hashlib.sha1(f"{version}|{key}".encode('utf-8')).hexdigest()[:20] + '"'
+        with self._lock:
+            self._entries[key] = (version, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+class ApiService:
+    """
+    Consultas e importación para otras herramientas internas, sin abrir el archivo SQLite.
+
+    Las lecturas usan el pool de conexiones de solo lectura; las importaciones pasan por un
+    único hilo escritor, por lo que nunca compiten entre sí por el bloqueo de escritura.
+    """
+
+    def __init__(self, db_manager: DatabaseManager):
+        self.db_manager = db_manager
+        self.config = db_manager.config['http']
+        self.pool = ReadConnectionPool(db_manager, self.config['read_connections'])
+        self.cache = ResponseCache(
+            [db_manager.db_path, db_manager.archive.archive_path], self.config['cache_entries']
+        )
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='api-escritor')
+
+    def close(self):
+        self.writer.shutdown(wait=True)
+        self.pool.close()
+
+    def get_document(self, num_doc: str) -> Dict:
+        with self.pool.connection() as conn:
+            row = conn.execute(SQLQueries.SELECT_DOCUMENT, (num_doc,)).fetchone()
+        if row is None:
+            raise ApiError(HTTPStatus.NOT_FOUND, Messages.API_DOCUMENT_NOT_FOUND.format(num_doc))
+        return dict(row)
+
+    def get_records(self, params: Dict[str, List[str]]) -> Dict:
+        """Página de registros; 'siguiente' es el valor de after para pedir la página siguiente"""
+        after = _int_param(params, 'after', 0)
+        limit = min(_int_param(params, 'limit', self.config['page_size']), self.config['max_page_size'])
+        if limit <= 0:
+            raise ApiError(HTTPStatus.BAD_REQUEST, Messages.API_INVALID_PARAMETER.format('limit'))
+
+        filters, args = [], [after]
+        if _param(params, 'pendiente') in ('1', 'true', 'si'):
+            filters.append(SQLQueries.PENDING_FILTER)
+        if _param(params, 'cia'):
+            filters.append("d.nom_cia = ?")
+            args.append(_param(params, 'cia'))
+        if _param(params, 'estado'):
+            filters.append("s.estado_aseguradora = ?")
+            args.append(_param(params, 'estado'))
+        args.append(limit)
+
+        query = SQLQueries.SELECT_RECORDS_PAGE.format(filters=''.join(f" AND {f}" for f in filters))
+        with self.pool.connection() as conn:
+            rows = [dict(row) for row in conn.execute(query, args)]
+        return {
+            'registros': rows,
+            'siguiente': rows[-1]['id'] if len(rows) == limit else None,
+        }
+
+    def get_stats(self) -> Dict:
+        return self.db_manager.get_dashboard_stats()
+
+    def import_file(self, content: bytes, file_name: str) -> Tuple[HTTPStatus, Dict]:
+        """Guardar el archivo recibido y ejecutar su importación en el hilo escritor"""
+        suffix = Path(file_name).suffix or '.xlsx'
+        with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+            f.write(content)
+            temp_path = Path(f.name)
+        try:
+            kind, success, message = self.writer.submit(
+                self.db_manager.import_by_kind, temp_path, lambda progress, message="": None
+            ).result()
+        except Exception as e:
+            # Archivo ilegible (no es un Excel válido)
+            kind, success, message = None, False, Messages.ERROR_UNEXPECTED.format(str(e))
+        finally:
+            temp_path.unlink(missing_ok=True)
+            self.cache.invalidate()
+
+        status = HTTPStatus.OK if success else HTTPStatus.UNPROCESSABLE_ENTITY
+        return status, {'exito': success, 'tipo': kind, 'archivo': file_name, 'mensaje': message}
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Rutas:
+        GET  /api/documentos/<num_doc>   Detalle y seguimiento de un documento (incluye archivo)
+        GET  /api/registros              Página de registros (?after=&limit=&pendiente=1&cia=&estado=)
+        GET  /api/estadisticas           Resumen del panel
+        POST /api/importaciones          Cuerpo: Excel principal o de seguimiento (?nombre=archivo.xlsx)
+    """
+
+    service: ApiService = None
+    server_version = 'SeguimientoFacturacion/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        try:
+            if url.path.startswith('/api/documentos/'):
+                loader = lambda: self.service.get_document(unquote(url.path[len('/api/documentos/'):]))
+            elif url.path == '/api/registros':
+                loader = lambda: self.service.get_records(params)
+            elif url.path == '/api/estadisticas':
+                loader = self.service.get_stats
+            else:
+                raise ApiError(HTTPStatus.NOT_FOUND, Messages.API_NOT_FOUND)
+            self._send_cached(self.path, loader)
+        except ApiError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Error en GET {self.path}: {str(e)}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            if url.path != '/api/importaciones':
+                raise ApiError(HTTPStatus.NOT_FOUND, Messages.API_NOT_FOUND)
+
+            length = int(self.headers.get('Content-Length') or 0)
+            max_mb = self.service.config['max_upload_mb']
+            if length <= 0:
+                raise ApiError(HTTPStatus.BAD_REQUEST, Messages.API_EMPTY_UPLOAD)
+            if length > max_mb * 1024 * 1024:
+                raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, Messages.API_UPLOAD_TOO_LARGE.format(max_mb))
+
+            file_name = Path(_param(parse_qs(url.query), 'nombre') or 'importacion.xlsx').name
+            status, result = self.service.import_file(self.rfile.read(length), file_name)
+            self._send_json(status, result)
+        except ApiError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            logger.error(f"Error en POST {self.path}: {str(e)}")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {'error': str(e)})
+
+    def _send_cached(self, key: str, loader):
+        """Responder desde la caché (o 304 si el cliente ya tiene la versión) o calcular la respuesta"""
+        cache = self.service.cache
+        version = cache.data_version()
+        cached = cache.get(key, version)
+        if cached is None:
+            body = _encode(loader())
+            etag = cache.put(key, version, body)
+        else:
+            etag, body = cached
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self._send_body(HTTPStatus.OK, body, etag)
+
+    def _send_json(self, status: HTTPStatus, data: Dict):
+        self._send_body(status, _encode(data))
+
+    def _send_body(self, status: HTTPStatus, body: bytes, etag: str | None = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')  # Revalidar siempre con If-None-Match
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args):
+        logger.debug(f"HTTP {self.address_string()} {format % args}")
+
+
+def create_server(db_manager: DatabaseManager, host: str | None = None,
+                  port: int | None = None) -> ThreadingHTTPServer:
+    """Crear el servidor (port=0 elige un puerto libre); llamar a serve_forever() para atender"""
+    config = db_manager.config['http']
+    handler = type('Handler', (ApiRequestHandler,), {'service': ApiService(db_manager)})
+    server = ThreadingHTTPServer(
+        (config['host'] if host is None else host, config['port'] if port is None else port), handler
+    )
+    server.daemon_threads = True
+    return server
+
+
+def _param(params: Dict[str, List[str]], name: str) -> str | None:
+    values = params.get(name)
+    return values[0] if values else None
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int) -> int:
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, Messages.API_INVALID_PARAMETER.format(name))
+
+
+def _encode(data: Dict) -> bytes:
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
@@ -1,9 +1,13 @@
 import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Dict, List, Optional, Tuple, Any
-import pandas as pd
 from pathlib import Path
 
+from src.controllers.job_scheduler import Job, JobFunction, JobScheduler
+from src.models.browser import Anchor, BrowseQuery
 from src.models.database import DatabaseManager
+from src.models.imports import PreparedImport
 from src.utils.constants import Messages, SQLQueries, ExcelStyles
 
 logger = logging.getLogger('facturacion')
@@ -11,19 +15,48 @@ logger = logging.getLogger('facturacion')
 class ExcelController:
     def __init__(self, db_manager: DatabaseManager):
         self.db_manager = db_manager
+        self.scheduler = JobScheduler()
+        # Lectura anticipada del Excel principal seleccionado: (ruta, resultado futuro)
+        self._preload: Tuple[Path, Future] | None = None
+        self._preload_lock = threading.Lock()
+        self._preload_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='precarga')
+
+    def submit_job(self, description: str, func: JobFunction, event_type: str = "", short: bool = False,
+                   cancellable: bool = True) -> Job:
+        """Encolar una tarea en segundo plano (short=True: lectura rápida con prioridad)"""
+        return self.scheduler.submit(description, func, event_type, short, cancellable)
+
+    def cancel_job(self, job_id: int) -> bool:
+        return self.scheduler.cancel(job_id)
+
+    def get_jobs(self) -> List[Job]:
+        return self.scheduler.jobs()
+
+    def pop_finished_jobs(self) -> List[Job]:
+        return self.scheduler.pop_finished()
+
+    def has_pending_jobs(self) -> bool:
+        return self.scheduler.is_busy()
     
-    def handle_excel_export(self, export_path: Path) -> Tuple[bool, str]:
+    def handle_excel_export(self, export_path: Path, full_history: bool = False,
+                            progress_callback: Optional[callable] = None,
+                            cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
         """
         Manejar la exportación de datos a Excel
         
         Args:
             export_path: Ruta donde se guardará el archivo Excel
+            full_history: Incluir todos los eventos de seguimiento (no solo el estado actual)
+            progress_callback: Función opcional para reportar el progreso
+            cancel_event: Cancelación cooperativa (se revisa antes de escribir el archivo)
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
         try:
-            success, message = self.db_manager.export_seguimiento_to_excel(export_path)
+            success, message = self.db_manager.export_seguimiento_to_excel(
+                export_path, full_history, progress_callback, cancel_event
+            )
             if not success:
                 return False, message
             
@@ -33,19 +66,23 @@ class ExcelController:
             logger.error(f"Error en handle_excel_export: {str(e)}")
             return False, Messages.ERROR_EXPORT.format(str(e))
             
-    def handle_pending_export(self, export_path: Path) -> Tuple[bool, str]:
+    def handle_pending_export(self, export_path: Path,
+                              progress_callback: Optional[callable] = None,
+                              cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
         """
         Manejar la exportación de pendientes a Excel
         (Solo registros sin número de pago y con monto > 0)
         
         Args:
             export_path: Ruta donde se guardará el archivo Excel
+            progress_callback: Función opcional para reportar el progreso
+            cancel_event: Cancelación cooperativa (se revisa antes de escribir el archivo)
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
         try:
-            success, message = self.db_manager.export_pending_to_excel(export_path)
+            success, message = self.db_manager.export_pending_to_excel(export_path, progress_callback, cancel_event)
             if not success:
                 return False, message
             
@@ -55,33 +92,152 @@ class ExcelController:
             logger.error(f"Error en handle_pending_export: {str(e)}")
             return False, Messages.ERROR_EXPORT.format(str(e))
 
-    def handle_seguimiento_update_from_excel(self, file_path: Path, progress_callback: callable) -> Tuple[bool, str]:
+    def handle_rollup_export(self, export_path: Path,
+                             progress_callback: Optional[callable] = None,
+                             cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        """
+        Manejar la exportación del resumen por periodo, compañía y estado
+        
+        Args:
+            export_path: Ruta donde se guardará el archivo Excel
+            progress_callback: Función opcional para reportar el progreso
+            cancel_event: Cancelación cooperativa (se revisa antes de escribir el archivo)
+            
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        try:
+            return self.db_manager.export_rollups_to_excel(export_path, progress_callback, cancel_event)
+        except Exception as e:
+            logger.error(f"Error en handle_rollup_export: {str(e)}")
+            return False, Messages.ERROR_EXPORT.format(str(e))
+
+    def handle_seguimiento_update_from_excel(self, file_path: Path, progress_callback: callable,
+                                             cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
         try:
             # Ensure file_path is a string if db_manager expects a string
-            return self.db_manager.update_seguimiento_from_excel(str(file_path), progress_callback)
+            return self.db_manager.update_seguimiento_from_excel(str(file_path), progress_callback, cancel_event)
         except Exception as e:
             logger.error(f"Error en handle_seguimiento_update_from_excel: {str(e)}")
             # You might want to return a more generic error message or re-raise
             return False, Messages.ERROR_UPDATE.format(str(e))
 
-    def handle_primary_excel_import(self, file_path: Path, progress_callback: callable) -> Tuple[bool, str]:
+    def handle_primary_excel_import(self, file_path: Path, progress_callback: callable,
+                                    cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
         """
         Manejar la importación primaria de datos de Excel a detalle_atenciones.
         
         Args:
             file_path: Ruta del archivo Excel.
             progress_callback: Función para actualizar el progreso.
+            cancel_event: Cancelación cooperativa (se revisa entre lotes).
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
         try:
+            prepared = self._take_prepared(file_path)
             # Ensure file_path is a string if db_manager expects a string
-            return self.db_manager.process_excel(str(file_path), progress_callback)
+            return self.db_manager.process_excel(str(file_path), progress_callback, cancel_event, prepared)
         except Exception as e:
             logger.error(f"Error en handle_primary_excel_import: {str(e)}")
             return False, Messages.ERROR_UPDATE.format(str(e)) # Or a more specific message
 
+    def start_primary_preload(self, file_path: Path) -> Future:
+        """
+        Empezar a leer, validar y limpiar el Excel principal apenas se selecciona.
+
+        El resultado queda guardado para la importación de ese archivo; una nueva selección
+        reemplaza a la anterior.
+        """
+        future = self._preload_executor.submit(self.db_manager.prepare_primary_excel, str(file_path))
+        with self._preload_lock:
+            self._preload = (Path(file_path), future)
+        return future
+
+    def get_preload_result(self, future: Future) -> Tuple[bool, Dict[str, int] | str]:
+        """Vista previa (filas, duplicados, rechazos) o mensaje de error de una lectura anticipada terminada"""
+        try:
+            success, result = future.result()
+            return (True, result.preview) if success else (False, result)
+        except Exception as e:
+            logger.error(f"Error en la lectura anticipada: {str(e)}")
+            return False, Messages.ERROR_UNEXPECTED.format(str(e))
+
+    def _take_prepared(self, file_path: Path) -> PreparedImport | None:
+        """Datos ya preparados de este archivo (espera si la lectura anticipada sigue en curso)"""
+        with self._preload_lock:
+            preload = self._preload
+            if preload is None or preload[0] != Path(file_path):
+                return None
+            self._preload = None
+        try:
+            success, result = preload[1].result()
+        except Exception:
+            return None
+        return result if success else None
+
+    def handle_search(self, text: str) -> Tuple[bool, List[Dict] | str]:
+        """
+        Manejar la búsqueda de texto completo
+        
+        Args:
+            text: Texto ingresado por el usuario
+            
+        Returns:
+            Tuple[bool, List[Dict] | str]: (éxito, resultados o mensaje de error)
+        """
+        try:
+            return True, self.db_manager.search(text)
+        except Exception as e:
+            logger.error(f"Error en handle_search: {str(e)}")
+            return False, Messages.ERROR_SEARCH.format(str(e))
+
+    def handle_browse_page(self, query: BrowseQuery, anchor: Anchor | None, limit: int,
+                           backward: bool = False) -> Tuple[bool, List[Tuple] | str]:
+        """Página del explorador de registros desde la posición anchor (paginación por clave)"""
+        try:
+            return True, self.db_manager.browse_records(query, anchor, limit, backward)
+        except Exception as e:
+            logger.error(f"Error en handle_browse_page: {str(e)}")
+            return False, Messages.ERROR_BROWSE.format(str(e))
+
+    def handle_browse_jump(self, query: BrowseQuery, position: int, limit: int) -> Tuple[bool, List[Tuple] | str]:
+        """Página que empieza en la fila número position (al arrastrar la barra de desplazamiento)"""
+        try:
+            anchor = self.db_manager.browse_anchor_at(query, position)
+            return True, self.db_manager.browse_records(query, anchor, limit)
+        except Exception as e:
+            logger.error(f"Error en handle_browse_jump: {str(e)}")
+            return False, Messages.ERROR_BROWSE.format(str(e))
+
+    def handle_browse_count(self, query: BrowseQuery) -> Tuple[bool, int | str]:
+        try:
+            return True, self.db_manager.count_browse_records(query)
+        except Exception as e:
+            logger.error(f"Error en handle_browse_count: {str(e)}")
+            return False, Messages.ERROR_BROWSE.format(str(e))
+
+    def handle_browse_filter_options(self) -> Dict[str, List[str]]:
+        try:
+            return self.db_manager.browse_filter_options()
+        except Exception as e:
+            logger.error(f"Error en handle_browse_filter_options: {str(e)}")
+            return {}
+
+    def get_browser_settings(self) -> Dict:
+        return self.db_manager.config['browser']
+
+    def get_column_labels(self) -> Dict[str, str]:
+        return self.db_manager.config['export_columns']
+
+    def is_database_ready(self) -> bool:
+        """Si la preparación del esquema (en segundo plano al iniciar) ya terminó"""
+        return self.db_manager.is_ready()
+
+    def get_progress_check_interval(self) -> int:
+        return self.db_manager.config['ui']['progress_check_interval']
+
     def get_app_title(self) -> str:
         # This assumes db_manager has a config dictionary with UI settings
         try:
@@ -97,9 +253,65 @@ class ExcelController:
             logger.error(f"Error in handle_clear_database (controller): {str(e)}")
             return False, "Error al limpiar la base de datos."
 
+    def handle_maintenance(self, full: bool = False) -> Tuple[bool, str]:
+        try:
+            return self.db_manager.run_maintenance(full=full)
+        except Exception as e:
+            logger.error(f"Error in handle_maintenance (controller): {str(e)}")
+            return False, Messages.ERROR_MAINTENANCE.format(str(e))
+
+    def handle_archive(self) -> Tuple[bool, str]:
+        try:
+            return self.db_manager.archive_paid_records()
+        except Exception as e:
+            logger.error(f"Error in handle_archive (controller): {str(e)}")
+            return False, Messages.ERROR_ARCHIVE.format(str(e))
+
+    def handle_backup(self, cancel_event: Optional[threading.Event] = None) -> Tuple[bool, str]:
+        try:
+            return self.db_manager.backup_database(cancel_event=cancel_event)
+        except Exception as e:
+            logger.error(f"Error in handle_backup (controller): {str(e)}")
+            return False, Messages.ERROR_BACKUP.format(str(e))
+
+    def handle_restore(self, backup_path: Path) -> Tuple[bool, str]:
+        try:
+            return self.db_manager.restore_database(backup_path)
+        except Exception as e:
+            logger.error(f"Error in handle_restore (controller): {str(e)}")
+            return False, Messages.ERROR_RESTORE.format(str(e))
+
+    def get_backup_dir(self) -> Path:
+        try:
+            return self.db_manager.config['paths']['backup_dir']
+        except KeyError:
+            logger.error("Backup directory not found in config.")
+            return Path.cwd()
+
+    def get_archive_min_age_days(self) -> int:
+        try:
+            return self.db_manager.config['archive']['min_age_days']
+        except KeyError:
+            logger.error("Archive settings not found in config.")
+            return 730
+
+    def get_maintenance_settings(self) -> Dict:
+        try:
+            return self.db_manager.config['maintenance']
+        except KeyError:
+            logger.error("Maintenance settings not found in config.")
+            return {'interval_minutes': 60, 'idle_seconds': 120}
+
     def handle_get_stats(self) -> int:
         try:
             return self.db_manager.get_stats()
         except Exception as e:
             logger.error(f"Error in handle_get_stats (controller): {str(e)}")
             return 0 # Fallback stats
+
+    def handle_get_dashboard_stats(self) -> Dict:
+        try:
+            return self.db_manager.get_dashboard_stats()
+        except Exception as e:
+            logger.error(f"Error in handle_get_dashboard_stats (controller): {str(e)}")
+            return {} # Fallback stats
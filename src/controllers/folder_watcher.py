@@ -0,0 +1,163 @@
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from stat import S_ISREG
+from typing import Dict, List, Tuple
+
+from src.models.database import DatabaseManager
+from src.models.imports import file_hash
+from src.models.ingest import INGEST_OK, INGEST_ERROR, INGEST_REJECTED
+from src.utils.constants import Messages
+
+logger = logging.getLogger('facturacion')
+
+
+class FolderWatcher:
+    """
+    Ingesta automática de los Excel que el HIS deja en carpetas compartidas.
+
+    Revisa las carpetas cada poll_seconds. Un archivo se considera completo cuando su tamaño y
+    fecha de modificación no cambian durante settle_seconds (evita leer copias a medias). Según
+    sus encabezados se importa como principal (process_excel) o como seguimiento
+    (update_seguimiento_from_excel). La huella del contenido se calcula una vez por versión del
+    archivo y el registro en la base impide importarlo dos veces. Cada resultado se agrega como
+    una línea JSON al log de ingesta.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, directories: List[Path] | None = None,
+                 settle_seconds: float | None = None):
+        self.db_manager = db_manager
+        self.config = db_manager.config['watch']
+        self.settle_seconds = self.config['settle_seconds'] if settle_seconds is None else settle_seconds
+        self.directories = [Path(d) for d in (directories or db_manager.config['paths']['watch_dirs'])]
+        self.result_log = Path(db_manager.config['paths']['logs_dir']) / self.config['result_log']
+        # Archivo -> (tamaño, modificación, momento desde el que no cambia)
+        self._pending: Dict[Path, Tuple[int, float, float]] = {}
+        # Archivo -> (tamaño, modificación) de la versión ya revisada
+        self._seen: Dict[Path, Tuple[int, float]] = {}
+
+    def run(self, stop_event: threading.Event):
+        """Revisar las carpetas hasta que se active stop_event"""
+        for directory in self.directories:
+            directory.mkdir(parents=True, exist_ok=True)
+        logger.info(f"Vigilando carpetas: {', '.join(str(d) for d in self.directories)}")
+        while not stop_event.is_set():
+            try:
+                self.poll_once()
+            except Exception as e:
+                # Una revisión fallida (carpeta de red caída, ...) no detiene la vigilancia
+                logger.error(f"Error al revisar las carpetas vigiladas: {str(e)}")
+            stop_event.wait(self.config['poll_seconds'])
+
+    def poll_once(self, now: float | None = None) -> List[Dict]:
+        """Revisar las carpetas una vez e importar los archivos completos. Devuelve los resultados"""
+        now = time.monotonic() if now is None else now
+        results = []
+        for path in self._ready_files(now):
+            result = self._ingest(path)
+            if result:
+                results.append(result)
+        return results
+
+    def _candidates(self) -> Dict[Path, Tuple[int, float]]:
+        """
+        Archivos de las carpetas con su versión (tamaño, modificación), del más antiguo al más
+        reciente. Se omiten los que desaparecen o no se pueden leer entre el listado y stat()
+        """
+        files = {}
+        for directory in self.directories:
+            if not directory.exists():
+                continue
+            for pattern in self.config['patterns']:
+                for path in directory.glob(pattern):
+                    if path.name.startswith('~$') or path in files:  # ~$: bloqueo de Excel
+                        continue
+                    try:
+                        info = path.stat()
+                    except OSError as e:
+                        logger.debug(f"Se omite {path.name}: {str(e)}")
+                        continue
+                    if S_ISREG(info.st_mode):
+                        files[path] = (info.st_size, info.st_mtime)
+        return dict(sorted(files.items(), key=lambda item: item[1][1]))
+
+    def _ready_files(self, now: float) -> List[Path]:
+        """Archivos nuevos o modificados cuyo tamaño y fecha llevan settle_seconds sin cambiar"""
+        ready = []
+        candidates = self._candidates()
+        for path, version in candidates.items():
+            if self._seen.get(path) == version:
+                continue
+
+            pending = self._pending.get(path)
+            if pending is None or pending[:2] != version:
+                self._pending[path] = (*version, now)
+                if self.settle_seconds > 0:
+                    continue
+                pending = self._pending[path]
+            if now - pending[2] >= self.settle_seconds:
+                del self._pending[path]
+                self._seen[path] = version
+                ready.append(path)
+
+        # Olvidar archivos que ya no están en la carpeta
+        present = set(candidates)
+        self._pending = {path: value for path, value in self._pending.items() if path in present}
+        self._seen = {path: value for path, value in self._seen.items() if path in present}
+        return ready
+
+    def _ingest(self, path: Path) -> Dict | None:
+        try:
+            content_hash = file_hash(path)
+            if not self.db_manager.should_ingest(content_hash):
+                logger.debug(f"Archivo ya ingerido, se omite: {path.name}")
+                return None
+        except Exception as e:
+            logger.error(f"Error al revisar {path.name}: {str(e)}")
+            return None
+
+        started = time.perf_counter()
+        kind = None
+        try:
+            kind, success, message = self.db_manager.import_by_kind(path, _no_progress)
+        except Exception as e:
+            success, message = False, Messages.ERROR_UNEXPECTED.format(str(e))
+
+        status = INGEST_OK if success else (INGEST_REJECTED if kind is None else INGEST_ERROR)
+        result = {
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'archivo': str(path),
+            'hash': content_hash,
+            'tipo': kind,
+            'estado': status,
+            'mensaje': message,
+            'duracion': round(time.perf_counter() - started, 3),
+        }
+
+        try:
+            self.db_manager.record_ingest(content_hash, path, kind, status, message)
+        except Exception as e:
+            logger.error(f"Error al registrar la ingesta de {path.name}: {str(e)}")
+        if status == INGEST_ERROR:
+            # Permitir el reintento en la siguiente revisión aunque el archivo no cambie
+            self._seen.pop(path, None)
+        self._write_result(result)
+
+        log = logger.info if success else logger.warning
+        log(f"Ingesta {status} de {path.name} ({kind or 'desconocido'}) en {result['duracion']:.2f}s: {message}")
+        return result
+
+    def _write_result(self, result: Dict):
+        try:
+            self.result_log.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.result_log, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+        except OSError as e:
+            logger.error(f"No se pudo escribir el log de ingesta: {str(e)}")
+
+
+def _no_progress(progress_percentage: float, message: str = ""):
+    pass
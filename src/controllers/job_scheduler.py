@@ -0,0 +1,158 @@
+import itertools
+import logging
+import queue
+import threading
+from collections import deque
+from typing import Callable, Deque, List, Tuple
+
+from src.utils.constants import Messages
+
+logger = logging.getLogger('facturacion')
+
+JOB_QUEUED = 'en_cola'
+JOB_RUNNING = 'en_curso'
+JOB_COMPLETED = 'completada'
+JOB_FAILED = 'fallida'
+JOB_CANCELLED = 'cancelada'
+
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+# Tareas terminadas que se siguen mostrando en la cola
+FINISHED_HISTORY = 5
+
+# Una tarea recibe (progress_callback, cancel_event) y devuelve (éxito, mensaje o resultado)
+JobFunction = Callable[[Callable, threading.Event], Tuple[bool, object]]
+
+
+class Job:
+    """Una tarea de la cola: estado, progreso y resultado (se leen desde el hilo de la interfaz)"""
+
+    def __init__(self, job_id: int, description: str, func: JobFunction, short: bool, event_type: str,
+                 cancellable: bool = True):
+        self.id = job_id
+        self.description = description
+        self.func = func
+        self.short = short
+        self.event_type = event_type
+        self.cancellable = cancellable  # False: no revisa cancel_event, solo se puede descartar en cola
+        self.status = JOB_QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.success = False
+        self.result: object = None
+        self.cancel_event = threading.Event()
+
+    def report(self, progress_percentage: float, message: str = ""):
+        """Callback de progreso compatible con el de DatabaseManager"""
+        self.progress = progress_percentage
+        if message:
+            self.message = message
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    @property
+    def can_cancel(self) -> bool:
+        """En cola siempre se puede descartar; en curso, solo si la operación revisa cancel_event"""
+        return self.status == JOB_QUEUED or (self.status == JOB_RUNNING and self.cancellable)
+
+
+class JobScheduler:
+    """
+    Cola de tareas en segundo plano del controlador.
+
+    Las tareas normales (importaciones, exportaciones, mantenimiento...) se ejecutan de una en
+    una y en orden de llegada, por lo que se pueden encolar importación → seguimiento →
+    exportación. Las lecturas cortas (búsqueda, estadísticas) van por un carril propio y no
+    esperan a que termine una importación larga; con WAL pueden leer mientras se escribe.
+
+    Cancelar una tarea en cola la descarta; cancelar la tarea en curso activa su cancel_event,
+    que las operaciones largas revisan entre lotes. Las tareas que no se pueden detener a medias
+    (limpieza, mantenimiento, archivo, restauración) se encolan con cancellable=False y, una vez
+    en curso, no se cancelan.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._jobs: List[Job] = []
+        self._finished: Deque[Job] = deque()
+        self._queues = {False: queue.Queue(), True: queue.Queue()}
+        for short, name in ((False, 'tareas'), (True, 'tareas-lectura')):
+            threading.Thread(target=self._worker, args=(self._queues[short],), name=name, daemon=True).start()
+
+    def submit(self, description: str, func: JobFunction, event_type: str = "", short: bool = False,
+               cancellable: bool = True) -> Job:
+        """
+        Encolar una tarea. short=True para lecturas rápidas que no deben esperar en la cola;
+        cancellable=False si func no revisa cancel_event
+        """
+        job = Job(next(self._ids), description, func, short, event_type, cancellable)
+        with self._lock:
+            self._jobs.append(job)
+        self._queues[short].put(job)
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancelar una tarea en cola o pedir la cancelación de la que está en curso"""
+        with self._lock:
+            job = next((job for job in self._jobs if job.id == job_id), None)
+            if job is None or not job.can_cancel:
+                return False
+            job.cancel_event.set()
+            if job.status == JOB_QUEUED:
+                self._finish(job, JOB_CANCELLED, False, Messages.OPERATION_CANCELLED)
+        return True
+
+    def jobs(self) -> List[Job]:
+        """Tareas pendientes, en curso y las últimas terminadas (para mostrar la cola)"""
+        with self._lock:
+            active = [job for job in self._jobs if not job.finished]
+            finished = [job for job in self._jobs if job.finished][-FINISHED_HISTORY:]
+            return finished + active
+
+    def pop_finished(self) -> List[Job]:
+        """Tareas terminadas desde la última llamada (para avisar al usuario una sola vez)"""
+        with self._lock:
+            finished = list(self._finished)
+            self._finished.clear()
+            return finished
+
+    def is_busy(self) -> bool:
+        with self._lock:
+            return any(not job.finished for job in self._jobs)
+
+    def _worker(self, jobs: queue.Queue):
+        while True:
+            job = jobs.get()
+            with self._lock:
+                if job.finished:  # Cancelada mientras esperaba
+                    continue
+                job.status = JOB_RUNNING
+
+            try:
+                success, result = job.func(job.report, job.cancel_event)
+            except Exception as e:
+                logger.error(f"Error en tarea {job.description}: {str(e)}")
+                success, result = False, Messages.ERROR_UNEXPECTED.format(str(e))
+
+            if success:
+                status = JOB_COMPLETED
+            else:
+                status = JOB_CANCELLED if job.cancel_event.is_set() else JOB_FAILED
+            with self._lock:
+                self._finish(job, status, success, result)
+
+    def _finish(self, job: Job, status: str, success: bool, result: object):
+        """Marcar una tarea como terminada (llamar con el lock tomado)"""
+        job.status = status
+        job.success = success
+        job.result = result
+        if success:
+            job.progress = 100.0
+        self._finished.append(job)
+        # Conservar solo el historial reciente de tareas terminadas
+        finished = [j for j in self._jobs if j.finished]
+        for old in finished[:-FINISHED_HISTORY]:
+            self._jobs.remove(old)
@@ -29,7 +29,103 @@ UI_CONFIG = {
         'min_size': '600x500'
     },
     'progress_check_interval': 100,  # ms
-    'export_sheet_name': 'Seguimiento_Facturacion'
+    'export_sheet_name': 'Seguimiento_Facturacion',
+    'rollup_sheet_name': 'Resumen_Mensual',
+    'open_after_export': True    # Abrir el Excel exportado con la aplicación predeterminada
+}
+
+# Configuración de mantenimiento de la base de datos
+MAINTENANCE_CONFIG = {
+    'interval_minutes': 60,      # Frecuencia del mantenimiento automático
+    'idle_seconds': 120,         # Solo se ejecuta si no hubo tareas en este intervalo
+    'vacuum_free_ratio': 0.2     # Fracción de páginas libres que justifica un VACUUM completo
+}
+
+# Configuración del archivo histórico (facturas pagadas antiguas)
+ARCHIVE_CONFIG = {
+    'name': 'facturacion_archivo.db',
+    'min_age_days': 730          # Antigüedad mínima de la fecha de pago para archivar
+}
+
+# Configuración de copias de seguridad (API de backup de SQLite)
+BACKUP_CONFIG = {
+    'dir_name': 'backups',
+    'pages_per_step': 1024,      # Páginas copiadas por paso (4 MB con páginas de 4 KB)
+    'sleep_seconds': 0.005,      # Pausa entre pasos para no bloquear a los escritores
+    'keep_per_kind': 5,          # Copias conservadas por tipo (manual, pre_importacion, ...)
+    'before_import': True,       # Copia automática antes de cada importación
+    'before_clear': True         # Copia automática antes de "Limpiar BD"
+}
+
+# Configuración de importación
+IMPORT_CONFIG = {
+    'chunk_size': 5000           # Filas por lote confirmado (checkpoint para reanudar)
+}
+
+# Validación de los Excel antes de escribir en la base
+VALIDATION_CONFIG = {
+    'max_num_doc_length': 10,    # Largo de num_doc en detalle_atenciones (VARCHAR(10))
+    'keep_duplicate': 'last',    # num_doc repetido en el archivo: 'last', 'first' o 'max_fec_doc'
+    'rejects_dir_name': 'rechazos'   # Libros con las filas rechazadas (dentro de logs/)
+}
+
+# Configuración de la ingesta automática desde carpetas vigiladas (python -m src watch)
+WATCH_CONFIG = {
+    'dir_name': 'entrada',
+    'patterns': ['*.xlsx', '*.xls'],
+    'poll_seconds': 30,          # Intervalo entre revisiones de las carpetas
+    'settle_seconds': 10,        # Tamaño y fecha sin cambios durante este tiempo = archivo completo
+    'max_attempts': 3,           # Reintentos de un archivo cuya importación falló
+    'result_log': 'ingesta.jsonl'
+}
+
+# Configuración del servicio HTTP/JSON local (python -m src serve)
+HTTP_CONFIG = {
+    'host': '127.0.0.1',         # Solo accesible desde el mismo equipo
+    'port': 8765,
+    'read_connections': 4,       # Conexiones de solo lectura compartidas por las peticiones
+    'page_size': 100,
+    'max_page_size': 1000,
+    'max_upload_mb': 200,
+    'cache_entries': 256         # Respuestas guardadas para servirlas con ETag
+}
+
+# Explorador de registros (paginación por clave, búfer acotado)
+BROWSER_CONFIG = {
+    'visible_rows': 25,
+    'page_size': 100,            # Filas por consulta
+    'max_pages': 4,              # Páginas en memoria alrededor de la ventana visible
+    'jump_delay_ms': 150         # Espera tras arrastrar la barra antes de consultar la nueva posición
+}
+
+# Procesos de trabajo para las etapas de CPU (lectura de Excel, limpieza, generación del XLSX)
+PROCESSING_CONFIG = {
+    'use_processes': True,       # False: todo en el hilo de la tarea (diagnóstico)
+    'max_workers': 2,
+    'min_file_kb': 256,          # Archivos más pequeños se leen en el hilo (iniciar un proceso cuesta más)
+    'min_export_rows': 2000      # Exportaciones más pequeñas se generan en el hilo
+}
+
+# Log de la aplicación (escrito desde un hilo aparte; ver logging_config.py)
+LOGGING_CONFIG = {
+    'max_bytes': 10 * 1024 * 1024,   # Rotar el archivo de log al alcanzar este tamaño
+    'backup_count': 5,               # Archivos rotados que se conservan
+    'sample_keys': 5                 # Documentos de ejemplo en los avisos resumidos por fila
+}
+
+# Métricas por fase de importaciones y exportaciones (logs/metricas.jsonl)
+METRICS_CONFIG = {
+    'enabled': True,
+    'file_name': 'metricas.jsonl',
+    'trace_memory': False,       # Pico por fase con tracemalloc (más preciso, pero más lento); si no, RSS del proceso
+    'show_in_summary': False     # Añadir los tiempos por fase al mensaje final de la operación
+}
+
+# Diagnóstico de SQL (python -m src --sql-trace ...): traza, consultas lentas y perfil por operación
+DIAGNOSTICS_CONFIG = {
+    'sql_trace': False,          # Solo para diagnóstico: medir cada sentencia tiene un costo
+    'slow_query_ms': 200,        # Sentencias más lentas se registran en el log con su EXPLAIN QUERY PLAN
+    'report_top': 15             # Sentencias listadas en el perfil de cada operación
 }
 
 # Configuración de Excel
@@ -38,7 +134,7 @@ EXCEL_CONFIG = {
         'Fecha de Documento', 'Fecha de Factura', 
         'Fecha de Pago', 'Fecha de Envío', 'Fecha de Recepción'
     ],
-    'money_columns': ['Total Documento'],
+    'money_columns': ['Total Documento', 'Monto Facturado', 'Monto Pagado', 'Monto Pendiente'],
     'styles': {
         'header': {
             'font': {'bold': True, 'color': 'FFFFFF', 'size': 12},
@@ -53,6 +149,10 @@ EXCEL_CONFIG = {
 # Rutas
 BASE_DIR = Path(__file__).parent
 DB_PATH = BASE_DIR / DB_CONFIG['name']
+ARCHIVE_PATH = BASE_DIR / ARCHIVE_CONFIG['name']
+BACKUP_DIR = BASE_DIR / BACKUP_CONFIG['dir_name']
+LOGS_DIR = BASE_DIR.parent.parent / 'logs'
+WATCH_DIRS = [BASE_DIR / WATCH_CONFIG['dir_name']]
 
 # Columnas para exportación
 EXPORT_COLUMN_MAPPING = {
@@ -72,7 +172,24 @@ EXPORT_COLUMN_MAPPING = {
     'fecha_envio': 'Fecha de Envío',
     'fecha_recepcion': 'Fecha de Recepción',
     'observaciones': 'Observaciones',
-    'acciones': 'Acciones'
+    'acciones': 'Acciones',
+    # Columnas del historial completo (seguimiento_eventos)
+    'fecha_evento': 'Fecha del Evento',
+    'estado_evento': 'Estado (Historial)',
+    'observacion': 'Observación (Historial)',
+    'accion': 'Acción (Historial)',
+    'origen': 'Origen del Evento'
+}
+
+# Columnas para exportación de resúmenes (rollup_facturacion)
+ROLLUP_EXPORT_COLUMN_MAPPING = {
+    'periodo': 'Periodo (Fecha de Factura)',
+    'nom_cia': 'Compañía',
+    'estado': 'Estado Aseguradora',
+    'registros': 'Registros',
+    'monto_facturado': 'Monto Facturado',
+    'monto_pagado': 'Monto Pagado',
+    'monto_pendiente': 'Monto Pendiente'
 }
 
 def get_config() -> Dict:
@@ -81,9 +198,26 @@ def get_config() -> Dict:
         'db': DB_CONFIG,
         'ui': UI_CONFIG,
         'excel': EXCEL_CONFIG,
+        'maintenance': MAINTENANCE_CONFIG,
+        'archive': ARCHIVE_CONFIG,
+        'imports': IMPORT_CONFIG,
+        'validation': VALIDATION_CONFIG,
+        'backup': BACKUP_CONFIG,
+        'watch': WATCH_CONFIG,
+        'http': HTTP_CONFIG,
+        'processing': PROCESSING_CONFIG,
+        'browser': BROWSER_CONFIG,
+        'metrics': METRICS_CONFIG,
+        'logging': LOGGING_CONFIG,
+        'diagnostics': DIAGNOSTICS_CONFIG,
         'paths': {
             'base_dir': BASE_DIR,
-            'db_path': DB_PATH
+            'db_path': DB_PATH,
+            'archive_path': ARCHIVE_PATH,
+            'backup_dir': BACKUP_DIR,
+            'logs_dir': LOGS_DIR,
+            'watch_dirs': WATCH_DIRS
         },
-        'export_columns': EXPORT_COLUMN_MAPPING
+        'export_columns': EXPORT_COLUMN_MAPPING,
+        'rollup_export_columns': ROLLUP_EXPORT_COLUMN_MAPPING
     }
@@ -1,22 +1,54 @@
+import atexit
 import logging
-import os
-from pathlib import Path
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 
-def setup_logging():
-    """Configurar el sistema de logging"""
+from src.core.config import LOGGING_CONFIG, LOGS_DIR
+
+# Hilo que escribe los registros encolados (uno por proceso)
+_listener: QueueListener | None = None
+
+
+def setup_logging(console: bool = True):
+    """
+    Configurar el sistema de logging
+
+    Los registros se encolan (QueueHandler) y un hilo aparte (QueueListener) los escribe en el
+    archivo y la consola: un log lento, p. ej. en una carpeta de red, no frena la importación.
+    El archivo rota al alcanzar LOGGING_CONFIG['max_bytes'].
+
+    Args:
+        console: Si además del archivo se escribe en la consola (la CLI lo desactiva
+            para no mezclar el log con la barra de progreso)
+    """
+    global _listener
+    logger = logging.getLogger('facturacion')
+    if _listener is not None:
+        return logger
+
     # Crear directorio para logs si no existe
-    logs_dir = Path(__file__).parent.parent.parent / 'logs'
-    logs_dir.mkdir(exist_ok=True)
-    
-    # Configurar el logger
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(logs_dir / f'facturacion_{datetime.now().strftime("%Y%m%d")}.log'),
-            logging.StreamHandler()
-        ]
-    )
-    
-    return logging.getLogger('facturacion')
+    LOGS_DIR.mkdir(exist_ok=True)
+
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [RotatingFileHandler(
+        LOGS_DIR / f'facturacion_{datetime.now().strftime("%Y%m%d")}.log',
+        maxBytes=LOGGING_CONFIG['max_bytes'], backupCount=LOGGING_CONFIG['backup_count'], encoding='utf-8'
+    )]
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # El QueueHandler no lleva formato propio: el mensaje se formatea una sola vez, al escribirse
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.addHandler(QueueHandler(log_queue))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    # Vaciar la cola al salir para no perder los últimos registros
+    atexit.register(_listener.stop)
+
+    return logger
@@ -0,0 +1,275 @@
+import sqlite3
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+from src.models.dimensions import DIMENSIONS
+from src.models.history import EVENT_COLUMNS
+from src.models.storage import DETALLE_COLUMNS, STORED_COLUMNS
+from src.utils.constants import Messages
+
+ARCHIVE_SCHEMA = 'archivo'
+
+# Vistas temporales (por conexión) que unen la base activa con el archivo histórico
+UNION_VIEWS = ['detalle_todas', 'seguimiento_todas', 'seguimiento_eventos_todas']
+
+CREATE_UNION_VIEWS = [
+    """
+    CREATE TEMP VIEW IF NOT EXISTS detalle_todas AS
+    SELECT * FROM main.detalle_completo
+    {archive_detalle}
+    """,
+    """
+    CREATE TEMP VIEW IF NOT EXISTS seguimiento_todas AS
+    SELECT * FROM main.seguimiento_facturacion
+    {archive_seguimiento}
+    """,
+    """
+    CREATE TEMP VIEW IF NOT EXISTS seguimiento_eventos_todas AS
+    SELECT * FROM main.seguimiento_eventos
+    {archive_eventos}
+    """,
+]
+
+ARCHIVE_UNION_DETALLE = f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.detalle_completo"
+ARCHIVE_UNION_SEGUIMIENTO = f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.seguimiento_facturacion"
+ARCHIVE_UNION_EVENTOS = f"UNION ALL SELECT * FROM {ARCHIVE_SCHEMA}.seguimiento_eventos"
+
+
+def copy_detalle(source: str, target: str, ids_table: str) -> List[str]:
+    """
+    Sentencias que copian filas de detalle_atenciones entre la base activa y el archivo.
+
+    Cada base tiene sus propios catálogos (dim_*), por lo que los nombres faltantes se agregan
+    al catálogo de destino y las claves se traducen por nombre.
+    """
+    selected = f"WHERE v.id IN (SELECT id FROM {ids_table})"
+    statements = [
+        f"""
+        INSERT OR IGNORE INTO {target}.{table} (nombre)
+        SELECT DISTINCT v.{col} FROM {source}.detalle_completo v {selected}
+        """
+        for col, table in DIMENSIONS.items()
+    ]
+    values = ['v.id'] + [
+        f"(SELECT t.id FROM {target}.{DIMENSIONS[col]} t WHERE t.nombre = v.{col})"
+        if col in DIMENSIONS else f"v.{col}"
+        for col in DETALLE_COLUMNS
+    ]
+    statements.append(f"""
+        INSERT INTO {target}.detalle_atenciones ({', '.join(STORED_COLUMNS)})
+        SELECT {', '.join(values)} FROM {source}.detalle_completo v {selected}
+    """)
+    return statements
+
+
+def copy_events(source: str, target: str, ids_table: str) -> List[str]:
+    """Sentencias que copian el historial de seguimiento; los ids de evento los asigna el destino"""
+    columns = ', '.join(EVENT_COLUMNS)
+    return [
+        f"""
+        INSERT INTO {target}.seguimiento_eventos ({columns})
+        SELECT {columns} FROM {source}.seguimiento_eventos
+        WHERE detalle_atencion_id IN (SELECT id FROM {ids_table})
+        ORDER BY id
+        """,
+    ]
+
+
+def delete_events(source: str, ids_table: str) -> List[str]:
+    return [
+        f"""
+        DELETE FROM {source}.seguimiento_eventos WHERE detalle_atencion_id IN (SELECT id FROM {ids_table})
+        """,
+    ]
+
+
+def move_events(source: str, target: str, ids_table: str) -> List[str]:
+    """Sentencias que mueven el historial de seguimiento; los ids de evento los asigna el destino"""
+    return copy_events(source, target, ids_table) + delete_events(source, ids_table)
+
+
+# Registros pagados cuya fecha de pago es anterior al corte
+SELECT_ARCHIVE_CANDIDATES = """
+    INSERT INTO temp.ids_archivo (id)
+    SELECT d.id
+    FROM main.detalle_atenciones d
+    JOIN main.seguimiento_facturacion s ON s.detalle_atencion_id = d.id
+    WHERE s.estado_aseguradora = ?
+    AND d.fec_pag IS NOT NULL AND d.fec_pag < ?
+"""
+
+# Primer paso del archivado: copiar al archivo. Si el documento ya estaba archivado (archivado,
+# restaurado y vuelto a archivar, o copiado por un archivado interrumpido) se reemplaza, por lo
+# que repetir la copia no duplica nada
+COPY_TO_ARCHIVE = [
+    f"""
+    DELETE FROM {ARCHIVE_SCHEMA}.seguimiento_eventos
+    WHERE detalle_atencion_id IN (
+        SELECT a.id FROM {ARCHIVE_SCHEMA}.detalle_atenciones a
+        JOIN main.detalle_atenciones d ON d.num_doc = a.num_doc
+        WHERE d.id IN (SELECT id FROM temp.ids_archivo)
+    )
+    """,
+    f"""
+    DELETE FROM {ARCHIVE_SCHEMA}.seguimiento_facturacion
+    WHERE detalle_atencion_id IN (
+        SELECT a.id FROM {ARCHIVE_SCHEMA}.detalle_atenciones a
+        JOIN main.detalle_atenciones d ON d.num_doc = a.num_doc
+        WHERE d.id IN (SELECT id FROM temp.ids_archivo)
+    )
+    """,
+    f"""
+    DELETE FROM {ARCHIVE_SCHEMA}.detalle_atenciones
+    WHERE num_doc IN (
+        SELECT num_doc FROM main.detalle_atenciones WHERE id IN (SELECT id FROM temp.ids_archivo)
+    )
+    """,
+    *copy_detalle('main', ARCHIVE_SCHEMA, 'temp.ids_archivo'),
+    f"""
+    INSERT INTO {ARCHIVE_SCHEMA}.seguimiento_facturacion
+    SELECT * FROM main.seguimiento_facturacion
+    WHERE detalle_atencion_id IN (SELECT id FROM temp.ids_archivo)
+    """,
+    *copy_events('main', ARCHIVE_SCHEMA, 'temp.ids_archivo'),
+]
+
+# Segundo paso: quitar de la base activa lo que ya quedó confirmado en el archivo
+DELETE_ARCHIVED = [
+    *delete_events('main', 'temp.ids_archivo'),
+    """
+    DELETE FROM main.seguimiento_facturacion
+    WHERE detalle_atencion_id IN (SELECT id FROM temp.ids_archivo)
+    """,
+    """
+    DELETE FROM main.detalle_atenciones WHERE id IN (SELECT id FROM temp.ids_archivo)
+    """,
+]
+
+# Devolver a la base activa los documentos archivados que vuelven a llegar en un archivo Excel
+RESTORE_FROM_ARCHIVE = [
+    f"""
+    INSERT INTO temp.ids_restaurar (id)
+    SELECT a.id FROM {ARCHIVE_SCHEMA}.detalle_atenciones a
+    WHERE a.num_doc IN (SELECT num_doc FROM temp.docs_entrantes)
+    -- Copia que dejó un archivado interrumpido: el documento sigue en la base activa
+    AND NOT EXISTS (SELECT 1 FROM main.detalle_atenciones d WHERE d.num_doc = a.num_doc)
+    """,
+    *copy_detalle(ARCHIVE_SCHEMA, 'main', 'temp.ids_restaurar'),
+    f"""
+    INSERT INTO main.seguimiento_facturacion
+    SELECT * FROM {ARCHIVE_SCHEMA}.seguimiento_facturacion
+    WHERE detalle_atencion_id IN (SELECT id FROM temp.ids_restaurar)
+    """,
+    *move_events(ARCHIVE_SCHEMA, 'main', 'temp.ids_restaurar'),
+    f"""
+    DELETE FROM {ARCHIVE_SCHEMA}.seguimiento_facturacion
+    WHERE detalle_atencion_id IN (SELECT id FROM temp.ids_restaurar)
+    """,
+    f"""
+    DELETE FROM {ARCHIVE_SCHEMA}.detalle_atenciones WHERE id IN (SELECT id FROM temp.ids_restaurar)
+    """,
+]
+
+
+class ArchiveManager:
+    """
+    Separación entre base activa y archivo histórico de facturas pagadas.
+
+    El archivo es otra base SQLite con el mismo esquema (incluidos sus propios triggers de
+    estadísticas, rollups y búsqueda) que se adjunta con ATTACH cuando hace falta. Los ids se
+    conservan al mover registros, por lo que AUTOINCREMENT garantiza que no colisionen.
+    """
+
+    def __init__(self, archive_path: Path, logger: logging.Logger, config: Dict):
+        self.archive_path = archive_path
+        self.logger = logger
+        self.config = config
+
+    def exists(self) -> bool:
+        return Path(self.archive_path).exists()
+
+    def attach(self, conn: sqlite3.Connection) -> bool:
+        """Adjuntar el archivo (si existe) y crear las vistas de unión. Devuelve si quedó adjunto"""
+        attached = self.exists()
+        if attached:
+            conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (str(self.archive_path),))
+
+        for view_sql in CREATE_UNION_VIEWS:
+            conn.execute(view_sql.format(
+                archive_detalle=ARCHIVE_UNION_DETALLE if attached else '',
+                archive_seguimiento=ARCHIVE_UNION_SEGUIMIENTO if attached else '',
+                archive_eventos=ARCHIVE_UNION_EVENTOS if attached else ''
+            ))
+        return attached
+
+    def reattach(self, conn: sqlite3.Connection, attached: bool) -> bool:
+        """
+        Rehacer el adjunto y las vistas de unión de una conexión abierta si el archivo apareció
+        (primer archivado) o desapareció desde que se adjuntó. Devuelve si quedó adjunto
+        """
+        if attached == self.exists():
+            return attached
+        for view in UNION_VIEWS:
+            conn.execute(f"DROP VIEW IF EXISTS temp.{view}")
+        if attached:
+            conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+        return self.attach(conn)
+
+    def cutoff_date(self, min_age_days: int) -> str:
+        return (datetime.now() - timedelta(days=min_age_days)).strftime('%Y-%m-%d')
+
+    def cutoff_day(self, min_age_days: int) -> int:
+        """Fecha de corte como días desde 1970-01-01 (formato de almacenamiento de fec_pag)"""
+        return (datetime.now() - timedelta(days=min_age_days) - datetime(1970, 1, 1)).days
+
+    def archive(self, conn: sqlite3.Connection, min_age_days: int) -> int:
+        """
+        Mover a la base de archivo los registros pagados con fecha de pago anterior al corte.
+
+        La conexión debe tener el archivo adjunto. Con WAL, un COMMIT que abarca dos bases solo es
+        atómico dentro de cada archivo, así que el movimiento se hace en dos transacciones: la
+        copia al archivo se confirma aquí y el borrado de la base activa queda en una segunda
+        transacción que confirma quien llama. Si se corta la energía entre ambas, los registros
+        quedan en las dos bases (hasta entonces aparecen dos veces en las vistas de unión) y el
+        siguiente archivado los vuelve a copiar, reemplazando por num_doc, y los borra de la
+        base activa. Un registro nunca se borra de la base activa antes de estar en el archivo.
+        """
+        cursor = conn.cursor()
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ids_archivo (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.ids_archivo")
+        cursor.execute(SELECT_ARCHIVE_CANDIDATES, (Messages.PAID_STATUS, self.cutoff_day(min_age_days)))
+        cursor.execute("SELECT COUNT(*) FROM temp.ids_archivo")
+        moved = cursor.fetchone()[0]
+
+        if moved:
+            for statement in COPY_TO_ARCHIVE:
+                cursor.execute(statement)
+            conn.commit()
+            for statement in DELETE_ARCHIVED:
+                cursor.execute(statement)
+        return moved
+
+    def restore(self, cursor: sqlite3.Cursor, num_docs) -> int:
+        """
+        Devolver a la base activa los num_doc indicados que estén archivados.
+
+        Así una importación o actualización de seguimiento sobre un documento archivado lo
+        actualiza en lugar de duplicarlo. La conexión debe tener el archivo adjunto.
+        """
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS docs_entrantes (num_doc TEXT PRIMARY KEY)")
+        cursor.execute("CREATE TEMP TABLE IF NOT EXISTS ids_restaurar (id INTEGER PRIMARY KEY)")
+        cursor.execute("DELETE FROM temp.docs_entrantes")
+        cursor.execute("DELETE FROM temp.ids_restaurar")
+        cursor.executemany(
+            "INSERT OR IGNORE INTO temp.docs_entrantes (num_doc) VALUES (?)",
+            ((str(num_doc).strip(),) for num_doc in num_docs)
+        )
+        for statement in RESTORE_FROM_ARCHIVE:
+            cursor.execute(statement)
+        cursor.execute("SELECT COUNT(*) FROM temp.ids_restaurar")
+        restored = cursor.fetchone()[0]
+        if restored:
+            self.logger.info(f"Registros restaurados desde el archivo histórico: {restored}")
+        return restored
@@ -0,0 +1,142 @@
+import os
+import re
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from src.models.maintenance import database_size
+
+# Tipos de copia; cada uno rota por separado para que las automáticas no desplacen a las manuales
+KIND_MANUAL = 'manual'
+KIND_PRE_IMPORT = 'pre_importacion'
+KIND_PRE_CLEAR = 'pre_limpieza'
+KIND_PRE_RESTORE = 'pre_restauracion'
+KINDS = [KIND_MANUAL, KIND_PRE_IMPORT, KIND_PRE_CLEAR, KIND_PRE_RESTORE]
+
+TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
+BACKUP_SUFFIX = '.db'
+PARTIAL_SUFFIX = '.parcial'
+
+
+class BackupCancelled(Exception):
+    """Copia interrumpida por cancel_event entre bloques de páginas (el archivo parcial se borra)"""
+
+
+def backup_name_pattern(db_path: Path) -> re.Pattern:
+    """Nombre de las copias de una base: <base>_<tipo>_<AAAAMMDD_HHMMSS>.db"""
+    kinds = '|'.join(KINDS)
+    return re.compile(rf"^{re.escape(Path(db_path).stem)}_({kinds})_\d{{8}}_\d{{6}}{re.escape(BACKUP_SUFFIX)}$")
+
+
+class BackupManager:
+    """
+    Copias de seguridad en caliente con la API de backup de SQLite (sqlite3.Connection.backup).
+
+    La copia avanza por bloques de páginas con una pausa entre bloques, por lo que las escrituras
+    de la aplicación no quedan bloqueadas mucho tiempo. Se escribe primero un archivo parcial y se
+    renombra al terminar, así una copia interrumpida nunca aparece como válida. Entre bloques se
+    revisa cancel_event, si se indica.
+    """
+
+    def __init__(self, backup_dir: Path, logger: logging.Logger, config: Dict):
+        self.backup_dir = Path(backup_dir)
+        self.logger = logger
+        self.config = config
+
+    def backup(self, db_path: Path, kind: str = KIND_MANUAL, cancel_event: threading.Event | None = None) -> Dict:
+        """
+        Copiar una base de datos al directorio de copias
+
+        Args:
+            db_path: Base a copiar (activa o de archivo)
+            kind: Tipo de copia (manual, pre_importacion, ...), forma parte del nombre
+            cancel_event: Cancelación cooperativa; lanza BackupCancelled entre bloques de páginas
+
+        Returns:
+            Dict: ruta, tamaño en bytes, duración en segundos y velocidad en MB/s
+        """
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        target = self.backup_dir / f"{Path(db_path).stem}_{kind}_{datetime.now().strftime(TIMESTAMP_FORMAT)}{BACKUP_SUFFIX}"
+        partial = target.with_name(target.name + PARTIAL_SUFFIX)
+
+        started = time.perf_counter()
+        try:
+            self._copy(db_path, partial, cancel_event)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+        os.replace(partial, target)
+        duration = time.perf_counter() - started
+
+        report = self._report(target, duration)
+        self.logger.info(
+            f"Copia de seguridad {target.name}: {report['size'] / (1024 * 1024):.1f} MB "
+            f"en {duration:.2f}s ({report['mb_per_s']:.1f} MB/s)"
+        )
+        self.rotate(db_path, kind)
+        return report
+
+    def restore(self, backup_path: Path, db_path: Path) -> Dict:
+        """Sobrescribir db_path con el contenido de una copia (las conexiones abiertas ven el cambio)"""
+        started = time.perf_counter()
+        self._copy(backup_path, db_path)
+        report = self._report(Path(db_path), time.perf_counter() - started)
+        self.logger.info(
+            f"Restaurada {Path(backup_path).name} en {report['duration']:.2f}s ({report['mb_per_s']:.1f} MB/s)"
+        )
+        return report
+
+    def list_backups(self, db_path: Path | None = None) -> List[Path]:
+        """Copias existentes (de una base o de todas), de la más reciente a la más antigua"""
+        if not self.backup_dir.exists():
+            return []
+        backups = self.backup_dir.glob(f"*{BACKUP_SUFFIX}")
+        if db_path:
+            pattern = backup_name_pattern(db_path)
+            backups = (path for path in backups if pattern.match(path.name))
+        return sorted(backups, key=lambda path: path.stat().st_mtime, reverse=True)
+
+    def belongs_to(self, backup_path: Path, db_path: Path) -> bool:
+        """Si el nombre de la copia corresponde a la base indicada"""
+        return backup_name_pattern(db_path).match(Path(backup_path).name) is not None
+
+    def rotate(self, db_path: Path, kind: str) -> int:
+        """Eliminar las copias más antiguas de un tipo por encima del límite. Devuelve cuántas eliminó"""
+        keep = self.config['keep_per_kind']
+        backups = sorted(self.backup_dir.glob(f"{Path(db_path).stem}_{kind}_*{BACKUP_SUFFIX}"), reverse=True)
+        for old in backups[keep:]:
+            old.unlink()
+            self.logger.info(f"Copia de seguridad eliminada por rotación: {old.name}")
+        return max(len(backups) - keep, 0)
+
+    def _copy(self, source_path: Path, target_path: Path, cancel_event: threading.Event | None = None):
+        def check_cancel(status, remaining, total):
+            # Una excepción en el callback de progreso aborta la copia de SQLite
+            if cancel_event is not None and cancel_event.is_set():
+                raise BackupCancelled()
+
+        source = sqlite3.connect(source_path, timeout=30.0)
+        target = sqlite3.connect(target_path, timeout=30.0)
+        try:
+            source.backup(
+                target,
+                pages=self.config['pages_per_step'],
+                progress=check_cancel,
+                sleep=self.config['sleep_seconds']
+            )
+        finally:
+            target.close()
+            source.close()
+
+    def _report(self, path: Path, duration: float) -> Dict:
+        size = database_size(path)
+        return {
+            'path': path,
+            'size': size,
+            'duration': duration,
+            'mb_per_s': (size / (1024 * 1024)) / duration if duration > 0 else 0.0,
+        }
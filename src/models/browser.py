@@ -0,0 +1,275 @@
+"""
+Consultas del explorador de registros: páginas de detalle_atenciones con su seguimiento.
+
+Las páginas se piden con paginación por clave (keyset): cada página continúa desde la clave de
+orden y el id de la última fila mostrada, sobre un índice de esa clave. El costo de una página
+no depende de cuán lejos se haya desplazado el usuario, a diferencia de OFFSET.
+"""
+import sqlite3
+import logging
+from typing import Dict, List, Sequence, Tuple
+
+from src.models.dimensions import DIMENSIONS, name_of
+from src.models.storage import DAY_TO_DATE_SQL, CENTS_TO_AMOUNT_SQL
+
+# Claves de orden permitidas. Cada expresión coincide con un índice (num_doc es UNIQUE e id es
+# el rowid) y el id desempata. Las fechas faltantes se ordenan primero.
+NO_DATE = -1000000
+SORT_KEYS = {
+    'id': 'd.id',
+    'num_doc': 'd.num_doc',
+    'fec_doc': f'IFNULL(d.fec_doc, {NO_DATE})',
+    'tot_doc': 'd.tot_doc',
+}
+
+BROWSER_INDEXES = [
+    f"CREATE INDEX IF NOT EXISTS idx_detalle_fec_doc ON detalle_atenciones (IFNULL(fec_doc, {NO_DATE}))",
+    "CREATE INDEX IF NOT EXISTS idx_detalle_tot_doc ON detalle_atenciones (tot_doc)",
+]
+
+# Columnas mostradas (ya decodificadas) y su expresión
+BROWSE_COLUMNS = {
+    'num_doc': 'd.num_doc',
+    'fec_doc': DAY_TO_DATE_SQL.format(col='d.fec_doc'),
+    'nh_pac': 'd.nh_pac',
+    'nom_pac': 'd.nom_pac',
+    'nom_cia': name_of('nom_cia', 'd'),
+    'tot_doc': CENTS_TO_AMOUNT_SQL.format(col='d.tot_doc'),
+    'num_fac': 'd.num_fac',
+    'fec_fac': DAY_TO_DATE_SQL.format(col='d.fec_fac'),
+    'num_pag': 'd.num_pag',
+    'fec_pag': DAY_TO_DATE_SQL.format(col='d.fec_pag'),
+    'estado_aseguradora': 's.estado_aseguradora',
+    'fecha_envio': 's.fecha_envio',
+    'fecha_recepcion': 's.fecha_recepcion',
+    'observaciones': 's.observaciones',
+}
+
+# Seguimiento vigente de cada detalle (el más reciente si hubiera más de uno)
+BROWSE_FROM = """
+    FROM detalle_atenciones d
+    LEFT JOIN seguimiento_facturacion s ON s.id = (
+        SELECT MAX(id) FROM seguimiento_facturacion WHERE detalle_atencion_id = d.id
+    )
+"""
+
+# Filtros por columna: nombre -> condición SQL
+BROWSE_FILTERS = {
+    'num_doc': "d.num_doc >= ? AND d.num_doc < ?",   # Prefijo, por rango sobre el índice único
+    'nom_pac': "d.nom_pac LIKE ?",                    # Contiene
+    'nom_cia': f"d.nom_cia_id = (SELECT id FROM {DIMENSIONS['nom_cia']} WHERE nombre = ?)",
+    'estado': "s.estado_aseguradora = ?",
+    'pendiente': "(d.num_pag IS NULL OR d.num_pag = '' OR d.num_pag = 'nan') AND d.tot_doc > 0",
+}
+
+SELECT_FILTER_OPTIONS = {
+    'nom_cia': f"SELECT nombre FROM {DIMENSIONS['nom_cia']} ORDER BY nombre",
+    'estado': """
+        SELECT DISTINCT estado_aseguradora FROM seguimiento_facturacion
+        WHERE estado_aseguradora IS NOT NULL AND estado_aseguradora != ''
+        ORDER BY estado_aseguradora
+    """,
+}
+
+# Posición en el orden: (clave de orden, id)
+Anchor = Tuple[object, int]
+
+
+class BrowseQuery:
+    """Orden y filtros del explorador. Los filtros vacíos se ignoran"""
+
+    def __init__(self, sort: str = 'id', descending: bool = False, filters: Dict[str, object] | None = None):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Columna de orden no indexada: {sort}")
+        self.sort = sort
+        self.descending = descending
+        self.filters = {name: value for name, value in (filters or {}).items()
+                        if name in BROWSE_FILTERS and value not in (None, '', False)}
+
+    def where(self) -> Tuple[List[str], List[object]]:
+        conditions, args = [], []
+        for name, value in self.filters.items():
+            conditions.append(BROWSE_FILTERS[name])
+            if name == 'num_doc':
+                args += [value, f"{value}\uffff"]
+            elif name == 'nom_pac':
+                args.append(f"%{value}%")
+            elif name != 'pendiente':
+                args.append(value)
+        return conditions, args
+
+
+class BrowserManager:
+    """Índices de orden y consultas paginadas del explorador de registros"""
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        for statement in BROWSER_INDEXES:
+            cursor.execute(statement)
+
+    def fetch_page(self, cursor: sqlite3.Cursor, query: BrowseQuery, anchor: Anchor | None,
+                   limit: int, backward: bool = False) -> List[Tuple]:
+        """
+        Filas siguientes (o anteriores si backward) a la posición anchor, en el orden de la consulta.
+
+        Cada fila es (clave, id, *BROWSE_COLUMNS); anchor=None empieza por el principio (o por el
+        final si backward). Las filas se devuelven siempre en el orden de presentación.
+        """
+        key = SORT_KEYS[query.sort]
+        conditions, args = query.where()
+        # Hacia atrás se recorre el índice en sentido contrario y se invierte el resultado
+        descending = query.descending != backward
+        if anchor is not None:
+            # Equivale a (clave, id) > (?, ?), escrito así para que SQLite use el rango del índice
+            # también en las claves que son expresiones
+            op = '<' if descending else '>'
+            conditions.append(f"{key} {op}= ? AND ({key} {op} ? OR d.id {op} ?)")
+            args += [anchor[0], anchor[0], anchor[1]]
+        direction = 'DESC' if descending else 'ASC'
+
+        sql = f"""
+            SELECT {key} AS clave, d.id, {', '.join(f'{expr} AS {col}' for col, expr in BROWSE_COLUMNS.items())}
+            {BROWSE_FROM}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY {key} {direction}, d.id {direction}
+            LIMIT ?
+        """
+        cursor.execute(sql, args + [limit])
+        rows = cursor.fetchall()
+        if backward:
+            rows.reverse()
+        return rows
+
+    def count(self, cursor: sqlite3.Cursor, query: BrowseQuery) -> int:
+        conditions, args = query.where()
+        cursor.execute(
+            f"SELECT COUNT(*) {BROWSE_FROM} {'WHERE ' + ' AND '.join(conditions) if conditions else ''}", args
+        )
+        return cursor.fetchone()[0]
+
+    def anchor_at(self, cursor: sqlite3.Cursor, query: BrowseQuery, position: int) -> Anchor | None:
+        """
+        Posición de la fila número position, para saltar al arrastrar la barra de desplazamiento.
+
+        Es el único uso de OFFSET: recorre solo el índice de la clave de orden (sin leer las
+        filas ni sus columnas) y se ejecuta una vez por salto, no por página.
+        """
+        if position <= 0:
+            return None
+        key = SORT_KEYS[query.sort]
+        conditions, args = query.where()
+        direction = 'DESC' if query.descending else 'ASC'
+        cursor.execute(f"""
+            SELECT {key}, d.id {BROWSE_FROM}
+            {'WHERE ' + ' AND '.join(conditions) if conditions else ''}
+            ORDER BY {key} {direction}, d.id {direction}
+            LIMIT 1 OFFSET ?
+        """, args + [position - 1])
+        row = cursor.fetchone()
+        return (row[0], row[1]) if row else None
+
+    def filter_options(self, cursor: sqlite3.Cursor) -> Dict[str, List[str]]:
+        """Valores posibles de los filtros de compañía y estado"""
+        options = {}
+        for name, sql in SELECT_FILTER_OPTIONS.items():
+            cursor.execute(sql)
+            options[name] = [row[0] for row in cursor.fetchall()]
+        return options
+
+
+class RecordWindow:
+    """
+    Ventana visible sobre el resultado de una consulta, con un búfer acotado de filas.
+
+    Solo se guardan las filas visibles y unas pocas páginas alrededor (max_rows), por lo que la
+    memoria es constante aunque el usuario recorra un millón de registros. Cuando la ventana se
+    acerca al borde del búfer, needs() indica qué página pedir; add_rows() la incorpora y
+    descarta las filas del extremo opuesto.
+    """
+
+    def __init__(self, height: int, page_size: int, max_pages: int):
+        self.height = height
+        self.page_size = page_size
+        self.max_rows = max(page_size * max_pages, height + 2 * page_size)
+        self.reset()
+
+    def reset(self):
+        self.rows: List[Tuple] = []
+        self.top = 0                # Primera fila visible dentro del búfer
+        self.offset = 0             # Posición (aproximada) de la primera fila del búfer en el resultado
+        self.at_start = True        # El búfer empieza en la primera fila del resultado
+        self.at_end = False         # El búfer termina en la última fila del resultado
+        self.pending_delta = 0      # Desplazamiento pedido que espera filas todavía no cargadas
+
+    def visible(self) -> List[Tuple]:
+        return self.rows[self.top:self.top + self.height]
+
+    def position(self) -> int:
+        """Posición de la primera fila visible en el resultado"""
+        return self.offset + self.top
+
+    def move(self, delta: int):
+        """Desplazar la ventana delta filas (negativo hacia arriba) dentro de lo cargado"""
+        target = self.top + self.pending_delta + delta
+        limit = max(len(self.rows) - self.height, 0)
+        self.top = min(max(target, 0), limit)
+        # Lo que no cabe en el búfer se aplica al llegar la página siguiente o anterior
+        self.pending_delta = target - self.top
+        if self.pending_delta < 0 and self.at_start:
+            self.pending_delta = 0
+        if self.pending_delta > 0 and self.at_end:
+            self.pending_delta = 0
+
+    def needs(self) -> str | None:
+        """'next' o 'prev' si conviene pedir otra página, según la cercanía al borde del búfer"""
+        if not self.at_end and (self.top + self.height + self.page_size // 2 >= len(self.rows) or self.pending_delta > 0):
+            return 'next'
+        if not self.at_start and (self.top < self.page_size // 2 or self.pending_delta < 0):
+            return 'prev'
+        return None
+
+    def anchor(self, direction: str) -> Anchor | None:
+        """Posición desde la que continuar en la dirección indicada"""
+        if not self.rows:
+            return None
+        row = self.rows[-1] if direction == 'next' else self.rows[0]
+        return row[0], row[1]
+
+    def add_rows(self, rows: Sequence[Tuple], direction: str):
+        """Incorporar una página pedida con needs()/anchor() y recortar el búfer"""
+        if direction == 'next':
+            self.rows.extend(rows)
+            if len(rows) < self.page_size:
+                self.at_end = True
+            excess = len(self.rows) - self.max_rows
+            if excess > 0:
+                # Descartar filas ya recorridas por arriba
+                excess = min(excess, self.top)
+                del self.rows[:excess]
+                self.top -= excess
+                self.offset += excess
+                self.at_start = self.at_start and excess == 0
+        else:
+            self.rows[:0] = rows
+            self.top += len(rows)
+            self.offset = max(self.offset - len(rows), 0)
+            if len(rows) < self.page_size:
+                self.at_start = True
+                self.offset = 0
+            excess = len(self.rows) - self.max_rows
+            if excess > 0:
+                excess = min(excess, len(self.rows) - self.top - self.height)
+                if excess > 0:
+                    del self.rows[-excess:]
+                    self.at_end = False
+        self.move(0)
+
+    def load(self, rows: Sequence[Tuple], offset: int, at_start: bool, at_end: bool):
+        """Reemplazar el búfer (carga inicial o salto a otra posición)"""
+        self.reset()
+        self.rows = list(rows)
+        self.offset = offset
+        self.at_start = at_start
+        self.at_end = at_end
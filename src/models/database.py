@@ -1,22 +1,60 @@
+from __future__ import annotations
+
 import sqlite3
 import logging
+import threading
 from pathlib import Path
 from typing import Tuple, Any, Dict, List
-import pandas as pd
 from datetime import datetime
 import os
 import subprocess
+import time
 
 from src.utils.constants import Messages, SQLQueries, ExcelStyles
+from src.models.stats import StatsManager, merge_summaries
+from src.models.rollups import RollupManager, SELECT_ROLLUPS, SELECT_ROLLUPS_WITH_ARCHIVE
+from src.models.search import SearchManager
+from src.models.browser import BrowserManager, BrowseQuery, Anchor
+from src.models.maintenance import MaintenanceManager, format_bytes, database_size
+from src.models.archive import ArchiveManager, ARCHIVE_SCHEMA
+from src.models.storage import (
+    StorageManager, decode_detalle_frame
+)
+from src.models.dimensions import DIMENSIONS, DimensionCache, stored_columns
+from src.models.backup import (
+    BackupManager, BackupCancelled, KIND_MANUAL, KIND_PRE_IMPORT, KIND_PRE_CLEAR, KIND_PRE_RESTORE
+)
+from src.models.imports import ImportJobManager, ImportJob, PreparedImport, file_hash, file_signature
+from src.models.ingest import IngestManager, KIND_PRIMARY, KIND_SEGUIMIENTO, detect_kind
+from src.models.history import (
+    HistoryManager, EventLog, SOURCE_EXCEL, SOURCE_PAYMENT, SOURCE_ZERO_NEGATIVE
+)
+from src.models.metrics import MetricsManager, OperationMetrics
+from src.models.diagnostics import SqlProfiler
+from src.models.validation import (
+    KEEP_DESCRIPTIONS, REASON_UNKNOWN_DOC, collapse_duplicates, concat_rejects, describe_rejects, rejects_frame,
+    write_rejects_workbook
+)
+from src.models.offload import (
+    ProcessOffloader, read_primary_frame, clean_primary_frame, prepare_primary_excel,
+    load_seguimiento_excel, write_formatted_excel
+)
+from src.utils.lazy import lazy_import, is_available
+from src.utils.log_summary import LogSummary
+
+# pandas y openpyxl se cargan en la primera importación/exportación, no al abrir la aplicación
+pd = lazy_import('pandas')
+OPENPYXL_AVAILABLE = is_available('openpyxl')
+
+# Tablas que se eliminan y recrean al limpiar la base (sus triggers se eliminan con ellas)
+TRUNCATE_TABLES = [
+    'seguimiento_facturacion', 'seguimiento_eventos', 'detalle_atenciones', 'estadisticas_resumen',
+    'rollup_facturacion', 'rollup_pendientes', 'busqueda_fts', 'importaciones', *DIMENSIONS.values()
+]
+
+def _cancelled(cancel_event: threading.Event | None) -> bool:
+    return cancel_event is not None and cancel_event.is_set()
 
-try:
-    import openpyxl
-    from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
-    from openpyxl.utils import get_column_letter
-    OPENPYXL_AVAILABLE = True
-except ImportError:
-    OPENPYXL_AVAILABLE = False
-    # logger.warning(Messages.ERROR_OPENPYXL) # Logger not yet available at module level
 
 class DatabaseManager:
     _instance = None
@@ -34,37 +72,86 @@ class DatabaseManager:
             self.logger = logger
             self.db_path = self.config['paths']['db_path']
             self.required_columns = self.config['db']['required_columns']
+            # Columnas físicas de detalle_atenciones (dimensiones como claves enteras)
+            self.detalle_columns = stored_columns(self.required_columns)
             self.seguimiento_columns = self.config['db']['seguimiento_columns']
+            self.storage = StorageManager(self.logger)
+            self.history = HistoryManager(self.logger)
+            self.import_jobs = ImportJobManager(self.logger)
+            self.ingest = IngestManager(self.logger, self.config['watch']['max_attempts'])
+            self.stats = StatsManager(self.logger)
+            self.rollups = RollupManager(self.logger)
+            self.search_index = SearchManager(self.logger)
+            self.browser = BrowserManager(self.logger)
+            self.maintenance = MaintenanceManager(self.db_path, self.logger, self.config['maintenance'])
+            self.archive = ArchiveManager(self.config['paths']['archive_path'], self.logger, self.config['archive'])
+            self.backups = BackupManager(self.config['paths']['backup_dir'], self.logger, self.config['backup'])
+            # Lectura de Excel y generación de XLSX en procesos aparte (no retienen el GIL de la interfaz)
+            self.offloader = ProcessOffloader(self.config['processing'], self.logger)
+            # Modo diagnóstico (opcional): traza y perfil del SQL de las conexiones que abre _open
+            self.sql_profiler = SqlProfiler(self.config['diagnostics'], self.logger)
+            self.metrics = MetricsManager(
+                self.config['metrics'], Path(self.config['paths']['logs_dir']) / self.config['metrics']['file_name'],
+                self.logger, self.sql_profiler
+            )
+            # El esquema (y una posible migración) se prepara en segundo plano para no retrasar
+            # la ventana; _connect espera a que termine
+            self._schema_ready = threading.Event()
+            self._schema_error: Exception | None = None
+            threading.Thread(target=self._setup_all, name='schema-setup', daemon=True).start()
+
+    def _setup_all(self):
+        """Preparar la base activa y el archivo histórico (hilo de inicio)"""
+        try:
             self._setup_database()
+            if self.archive.exists():
+                self._setup_database(self.archive.archive_path)
             self.logger.info("DatabaseManager inicializado correctamente")
-    
-    def _setup_database(self):
-        """Crear la base de datos SQLite con las tablas necesarias"""
-        conn = sqlite3.connect(self.db_path)
+        except Exception as e:
+            self._schema_error = e
+            self.logger.error(f"Error al preparar la base de datos: {str(e)}")
+        finally:
+            self._schema_ready.set()
+
+    def is_ready(self) -> bool:
+        """Si el esquema ya está preparado (sin bloquear)"""
+        return self._schema_ready.is_set()
+
+    def wait_until_ready(self):
+        """Esperar a que termine la preparación del esquema; relanza su error si falló"""
+        self._schema_ready.wait()
+        if self._schema_error is not None:
+            raise self._schema_error
+
+    def _open(self, db_path: Path | None = None) -> sqlite3.Connection:
+        return self.sql_profiler.connect(db_path or self.db_path, timeout=30.0)
+
+    def _connect(self, db_path: Path | None = None) -> sqlite3.Connection:
+        """Abrir una conexión a la base de datos (por defecto, la base activa)"""
+        self.wait_until_ready()
+        return self._open(db_path)
+
+    def _connect_all(self) -> sqlite3.Connection:
+        """
+        Abrir una conexión a la base activa con el archivo histórico adjunto (si existe)
+        y las vistas temporales detalle_todas / seguimiento_todas que unen ambas.
+        """
+        conn = self._connect()
+        self.archive.attach(conn)
+        return conn
+
+    def _setup_database(self, db_path: Path | None = None):
+        """Crear la base de datos SQLite con las tablas necesarias (activa o de archivo)"""
+        conn = self._open(db_path)
         cursor = conn.cursor()
+
+        # Solo tiene efecto en bases nuevas; las existentes se convierten en el primer mantenimiento
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL permite lecturas (estadísticas, búsqueda) mientras se importa
+        cursor.execute("PRAGMA journal_mode = WAL")
         
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS detalle_atenciones (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                num_doc VARCHAR(10) NOT NULL UNIQUE,
-                fec_doc DATE NOT NULL,
-                nh_pac VARCHAR(255) NOT NULL,
-                nom_pac VARCHAR(255) NOT NULL,
-                nom_emp VARCHAR(255) NOT NULL,
-                nom_cia VARCHAR(255) NOT NULL,
-                ta_doc VARCHAR(1) NOT NULL,
-                nom_ser VARCHAR(255) NOT NULL,
-                tot_doc DECIMAL(8, 2) NOT NULL,
-                num_fac VARCHAR(11) NOT NULL,
-                fec_fac DATE NOT NULL,
-                num_pag VARCHAR(10) NOT NULL,
-                fec_pag DATE NOT NULL,
-                usu_sis VARCHAR(255) NOT NULL,
-                cod_dx VARCHAR(255) NOT NULL,
-                facturador VARCHAR(255) NOT NULL,
-                producto VARCHAR(255) NOT NULL
-            )
-        ''')
+        # detalle_atenciones en formato v2 (fechas enteras, montos en céntimos); migra bases v1
+        self.storage.create_schema(cursor)
         
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS seguimiento_facturacion (
@@ -79,170 +166,491 @@ class DatabaseManager:
                     ON DELETE CASCADE
             )
         ''')
+
+        # Índice para localizar el seguimiento de un detalle (SELECT_BY_ID y triggers de estadísticas)
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_seguimiento_detalle
+            ON seguimiento_facturacion (detalle_atencion_id)
+        ''')
+
+        # Historial de seguimiento (solo inserción)
+        self.history.create_schema(cursor)
+
+        # Registro de importaciones para reanudarlas tras un cierre inesperado
+        self.import_jobs.create_schema(cursor)
+
+        # Archivos ya ingeridos desde las carpetas vigiladas
+        self.ingest.create_schema(cursor)
+
+        # Contadores del panel mantenidos por triggers
+        self.stats.create_schema(cursor)
+
+        # Resúmenes por periodo/compañía/estado para reportes
+        self.rollups.create_schema(cursor)
+
+        # Índice de texto completo para la búsqueda
+        self.search_index.create_schema(cursor)
+
+        # Índices de orden del explorador de registros
+        self.browser.create_schema(cursor)
         
         conn.commit()
         conn.close()
 
-    def get_stats(self):
-        """Obtener estadísticas de la base de datos"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM detalle_atenciones")
-        count = cursor.fetchone()[0]
-        conn.close()
-        return count
+    def get_stats(self) -> int:
+        """Obtener el total de registros desde la tabla de estadísticas (sin recorrer detalle_atenciones)"""
+        return self.get_dashboard_stats()['total_registros']
 
-    def clear_database_tables(self) -> Tuple[bool, str]:
-        """Limpiar todas las tablas de la base de datos."""
+    def get_dashboard_stats(self) -> Dict:
+        """
+        Obtener el resumen del panel mantenido de forma incremental
+        
+        Returns:
+            Dict: total de registros y monto, pendientes, conteos por estado y por compañía
+        """
+        conn = self._connect()
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM detalle_atenciones")
-            cursor.execute("DELETE FROM seguimiento_facturacion") 
+            summary = self.stats.get_summary(conn.cursor())
+        finally:
+            conn.close()
+
+        if not self.archive.exists():
+            summary['archivados'] = 0
+            return summary
+
+        conn = self._connect(self.archive.archive_path)
+        try:
+            return merge_summaries(summary, self.stats.get_summary(conn.cursor()))
+        finally:
+            conn.close()
+
+    def rebuild_stats(self) -> Tuple[bool, str]:
+        """Recalcular las estadísticas del panel desde las tablas base"""
+        try:
+            conn = self._connect()
+            self.stats.rebuild(conn.cursor())
             conn.commit()
             conn.close()
-            self.logger.info("Todas las tablas de la base de datos han sido limpiadas.")
-            return True, "Base de datos limpiada exitosamente."
+            return True, "Estadísticas recalculadas."
+        except Exception as e:
+            self.logger.error(f"Error al recalcular estadísticas: {str(e)}")
+            return False, f"Error al recalcular estadísticas: {str(e)}"
+
+    def search(self, text: str, limit: int = 100) -> List[Dict]:
+        """
+        Buscar por número de documento, historia clínica, paciente, servicio u observaciones
+        
+        Args:
+            text: Texto a buscar (cada palabra se busca por prefijo; entre comillas, como frase)
+            limit: Cantidad máxima de resultados
+            
+        Returns:
+            List[Dict]: Registros ordenados por relevancia
+        """
+        conn = self._connect_all()
+        try:
+            cursor = conn.cursor()
+            results = self.search_index.search(cursor, text, limit)
+            if self.archive.exists():
+                results += self.search_index.search(cursor, text, limit, schema=ARCHIVE_SCHEMA)
+                results.sort(key=lambda row: row['relevancia'])
+        finally:
+            conn.close()
+
+        for row in results:
+            row.pop('relevancia', None)
+        return results[:limit]
+
+    def browse_records(self, query: BrowseQuery, anchor: Anchor | None, limit: int,
+                       backward: bool = False) -> List[Tuple]:
+        """Página del explorador de registros (base activa) desde la posición anchor"""
+        conn = self._connect()
+        try:
+            return self.browser.fetch_page(conn.cursor(), query, anchor, limit, backward)
+        finally:
+            conn.close()
+
+    def count_browse_records(self, query: BrowseQuery) -> int:
+        conn = self._connect()
+        try:
+            return self.browser.count(conn.cursor(), query)
+        finally:
+            conn.close()
+
+    def browse_anchor_at(self, query: BrowseQuery, position: int) -> Anchor | None:
+        conn = self._connect()
+        try:
+            return self.browser.anchor_at(conn.cursor(), query, position)
+        finally:
+            conn.close()
+
+    def browse_filter_options(self) -> Dict[str, List[str]]:
+        conn = self._connect()
+        try:
+            return self.browser.filter_options(conn.cursor())
+        finally:
+            conn.close()
+
+    def clear_database_tables(self) -> Tuple[bool, str]:
+        """
+        Limpiar todas las tablas de la base de datos (y del archivo histórico, si existe).
+        
+        En lugar de DELETE fila a fila (que dispararía los triggers por cada registro y dejaría
+        el archivo con su tamaño máximo) se eliminan las tablas, se recrean vacías y se
+        devuelve el espacio libre al sistema.
+        """
+        try:
+            if self.config['backup']['before_clear']:
+                self._backup_all(KIND_PRE_CLEAR)
+
+            started = time.perf_counter()
+            reclaimed = self._reset_database(self.db_path)
+            if self.archive.exists():
+                reclaimed += self._reset_database(self.archive.archive_path)
+
+            elapsed = time.perf_counter() - started
+            self.logger.info(f"Todas las tablas de la base de datos han sido limpiadas en {elapsed:.2f}s.")
+            return True, Messages.SUCCESS_CLEAR.format(elapsed, format_bytes(reclaimed))
         except Exception as e:
             self.logger.error(f"Error al limpiar base de datos: {str(e)}")
             return False, f"Error al limpiar base de datos: {str(e)}"
 
-    def export_seguimiento_to_excel(self, export_path: Path) -> Tuple[bool, str]:
+    def detect_excel_kind(self, file_path: Path) -> str | None:
+        """Leer solo los encabezados del Excel y decidir si es principal o de seguimiento"""
+        columns = pd.read_excel(file_path, nrows=0).columns
+        return detect_kind(list(columns), self.required_columns, self.seguimiento_columns)
+
+    def import_by_kind(self, file_path: Path, progress_callback: callable,
+                       cancel_event: threading.Event | None = None) -> Tuple[str | None, bool, str]:
+        """
+        Importar un Excel según sus encabezados (principal o seguimiento)
+
+        Returns:
+            Tuple[str | None, bool, str]: (tipo detectado o None, éxito, mensaje)
+        """
+        kind = self.detect_excel_kind(file_path)
+        if kind == KIND_PRIMARY:
+            return (kind, *self.process_excel(str(file_path), progress_callback, cancel_event))
+        if kind == KIND_SEGUIMIENTO:
+            return (kind, *self.update_seguimiento_from_excel(str(file_path), progress_callback, cancel_event))
+        return None, False, Messages.INGEST_UNKNOWN_FORMAT
+
+    def should_ingest(self, content_hash: str) -> bool:
+        """Si un archivo de la carpeta vigilada (por su huella) debe importarse"""
+        conn = self._connect()
+        try:
+            return self.ingest.should_process(conn.cursor(), content_hash)
+        finally:
+            conn.close()
+
+    def record_ingest(self, content_hash: str, file_path: Path, kind: str | None, status: str, message: str):
+        """Registrar el resultado de la ingesta de un archivo"""
+        conn = self._connect()
+        try:
+            self.ingest.record(conn.cursor(), content_hash, str(file_path), kind, status, message)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def backup_database(self, kind: str = KIND_MANUAL,
+                        cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
+        """
+        Crear una copia de seguridad en caliente de la base activa (y del archivo histórico).
+        La cancelación se revisa entre bloques de páginas y descarta la copia parcial
+        """
+        try:
+            reports = self._backup_all(kind, cancel_event)
+            size = sum(report['size'] for report in reports)
+            duration = sum(report['duration'] for report in reports)
+            mb_per_s = (size / (1024 * 1024)) / duration if duration > 0 else 0.0
+            return True, Messages.SUCCESS_BACKUP.format(
+                ', '.join(report['path'].name for report in reports), format_bytes(size), duration, mb_per_s
+            )
+        except BackupCancelled:
+            self.logger.info("Copia de seguridad cancelada")
+            return False, Messages.BACKUP_CANCELLED
+        except Exception as e:
+            self.logger.error(f"Error al crear copia de seguridad: {str(e)}")
+            return False, Messages.ERROR_BACKUP.format(str(e))
+
+    def _backup_all(self, kind: str, cancel_event: threading.Event | None = None) -> List[Dict]:
+        reports = [self.backups.backup(self.db_path, kind, cancel_event)]
+        if self.archive.exists():
+            reports.append(self.backups.backup(self.archive.archive_path, kind, cancel_event))
+        return reports
+
+    def restore_database(self, backup_path: Path) -> Tuple[bool, str]:
+        """
+        Restaurar una copia sobre la base a la que pertenece (activa o archivo, según el nombre).
+
+        Antes se guarda una copia de la base actual, por lo que la restauración se puede deshacer.
+        """
+        try:
+            candidates = [self.archive.archive_path, self.db_path]
+            target = next((db for db in candidates if self.backups.belongs_to(backup_path, db)), None)
+            if target is None:
+                return False, Messages.ERROR_BACKUP_UNKNOWN.format(Path(backup_path).name)
+
+            if Path(target).exists():
+                self.backups.backup(target, KIND_PRE_RESTORE)
+            report = self.backups.restore(backup_path, target)
+            # La copia puede tener un formato de almacenamiento anterior
+            self._setup_database(target)
+            return True, Messages.SUCCESS_RESTORE.format(Path(backup_path).name, report['duration'], report['mb_per_s'])
+        except Exception as e:
+            self.logger.error(f"Error al restaurar copia de seguridad: {str(e)}")
+            return False, Messages.ERROR_RESTORE.format(str(e))
+
+    def _reset_database(self, db_path: Path) -> int:
+        """Eliminar y recrear las tablas de una base. Devuelve los bytes recuperados"""
+        size_before = database_size(db_path)
+
+        conn = self._connect(db_path)
+        cursor = conn.cursor()
+        for table in TRUNCATE_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+        conn.commit()
+        conn.close()
+
+        self._setup_database(db_path)
+
+        conn = self._connect(db_path)
+        self.maintenance.reclaim(conn)
+        conn.close()
+        return max(size_before - database_size(db_path), 0)
+
+    def archive_paid_records(self, min_age_days: int | None = None) -> Tuple[bool, str]:
+        """
+        Mover al archivo histórico las facturas pagadas con fecha de pago más antigua que min_age_days
+        
+        La base activa queda pequeña (los pases de estado, la exportación de pendientes y los
+        contadores dejan de recorrer facturas históricas), mientras que la exportación completa,
+        la búsqueda, las estadísticas y el resumen mensual siguen incluyendo el archivo.
+        
+        Args:
+            min_age_days: Antigüedad mínima; por defecto la de la configuración
+            
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        try:
+            started = time.perf_counter()
+            min_age_days = min_age_days if min_age_days is not None else self.config['archive']['min_age_days']
+
+            # Crea el archivo con el mismo esquema (y sus triggers) si aún no existe
+            self._setup_database(self.archive.archive_path)
+
+            conn = self._connect_all()
+            moved = self.archive.archive(conn, min_age_days)
+            self.rollups.refresh(conn.cursor())
+            conn.commit()
+            conn.close()
+            self._refresh_archive_rollups()
+
+            elapsed = time.perf_counter() - started
+            message = Messages.SUCCESS_ARCHIVE.format(moved, self.archive.cutoff_date(min_age_days), elapsed)
+            self.logger.info(message)
+            return True, message
+        except Exception as e:
+            self.logger.error(f"Error al archivar registros: {str(e)}")
+            return False, Messages.ERROR_ARCHIVE.format(str(e))
+
+    def _refresh_archive_rollups(self):
+        """Recalcular los rollups del archivo histórico marcados por sus propios triggers"""
+        if not self.archive.exists():
+            return
+        conn = self._connect(self.archive.archive_path)
+        self.rollups.refresh(conn.cursor())
+        conn.commit()
+        conn.close()
+
+    def run_maintenance(self, full: bool = False) -> Tuple[bool, str]:
+        """
+        Ejecutar la rutina de mantenimiento (PRAGMA optimize, ANALYZE, vacuum incremental, checkpoint WAL)
+        
+        Args:
+            full: Forzar ANALYZE y VACUUM completos
+            
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje con tiempo y espacio recuperado)
+        """
+        try:
+            conn = self._connect()
+            report = self.maintenance.run(conn, full=full)
+            conn.close()
+            self.last_maintenance = report
+            return True, Messages.SUCCESS_MAINTENANCE.format(
+                report['duration'], format_bytes(report['reclaimed']),
+                format_bytes(report['size_after']), ', '.join(report['steps'])
+            )
+        except Exception as e:
+            self.logger.error(f"Error en mantenimiento: {str(e)}")
+            return False, Messages.ERROR_MAINTENANCE.format(str(e))
+
+    def export_seguimiento_to_excel(self, export_path: Path, full_history: bool = False,
+                                    progress_callback: callable | None = None,
+                                    cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
         """
         Exportar seguimiento a Excel con formato personalizado
         
         Args:
             export_path: Ruta donde se guardará el archivo Excel
+            full_history: Exportar una fila por evento de seguimiento en lugar de solo el estado actual
+            progress_callback: Función opcional para reportar el progreso de la generación del archivo
+            cancel_event: Cancelación cooperativa (se revisa tras la consulta y antes de escribir)
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
+        metrics = self.metrics.start('exportacion_historial' if full_history else 'exportacion_seguimiento', export_path)
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query(SQLQueries.SELECT_ALL, conn)
+            metrics.start('consulta')
+            conn = self._connect_all()
+            query = SQLQueries.SELECT_ALL_HISTORY if full_history else SQLQueries.SELECT_ALL
+            df = pd.read_sql_query(query, conn)
             conn.close()
+            metrics.rows = len(df)
+            metrics.stop('consulta', len(df))
+            if _cancelled(cancel_event):
+                return False, Messages.EXPORT_CANCELLED
+            with metrics.phase('transformacion', len(df)):
+                df = decode_detalle_frame(df)
 
-            self.logger.info("Consulta SQL ejecutada correctamente")
-            self.logger.info(df.head()) # Log head instead of full df for brevity
-            
-            total_rows = len(df)
-            self.logger.info(f"Total de registros para exportar: {total_rows}")
+            self.logger.info(f"Total de registros para exportar: {len(df)}")
             
-            return self._format_excel(df, export_path)
+            return self._format_excel(df, export_path, progress_callback=progress_callback, metrics=metrics,
+                                      cancel_event=cancel_event)
             
         except Exception as e:
             self.logger.error(f"Error en export_seguimiento_to_excel: {str(e)}")
             return False, Messages.ERROR_EXPORT.format(str(e))
+        finally:
+            self.metrics.record(metrics)
             
-    def export_pending_to_excel(self, export_path: Path) -> Tuple[bool, str]:
+    def export_pending_to_excel(self, export_path: Path,
+                                progress_callback: callable | None = None,
+                                cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
         """
         Exportar pendientes a Excel con formato personalizado
         (Solo registros sin número de pago y con monto > 0)
         
         Args:
             export_path: Ruta donde se guardará el archivo Excel
+            progress_callback: Función opcional para reportar el progreso de la generación del archivo
+            cancel_event: Cancelación cooperativa (se revisa tras la consulta y antes de escribir)
             
         Returns:
             Tuple[bool, str]: (éxito, mensaje)
         """
+        metrics = self.metrics.start('exportacion_pendientes', export_path)
         try:
-            conn = sqlite3.connect(self.db_path)
+            metrics.start('consulta')
+            conn = self._connect()
             df = pd.read_sql_query(SQLQueries.SELECT_PENDING, conn)
             conn.close()
+            metrics.rows = len(df)
+            metrics.stop('consulta', len(df))
+            if _cancelled(cancel_event):
+                return False, Messages.EXPORT_CANCELLED
+            with metrics.phase('transformacion', len(df)):
+                df = decode_detalle_frame(df)
 
-            self.logger.info("Consulta SQL de pendientes ejecutada correctamente")
-            self.logger.info(df.head()) # Log head instead of full df for brevity
+            self.logger.info(f"Total de registros pendientes para exportar: {len(df)}")
             
-            total_rows = len(df)
-            self.logger.info(f"Total de registros pendientes para exportar: {total_rows}")
-            
-            return self._format_excel(df, export_path)
+            return self._format_excel(df, export_path, progress_callback=progress_callback, metrics=metrics,
+                                      cancel_event=cancel_event)
             
         except Exception as e:
             self.logger.error(f"Error en export_pending_to_excel: {str(e)}")
             return False, Messages.ERROR_EXPORT.format(str(e))
+        finally:
+            self.metrics.record(metrics)
     
-    def _format_excel(self, df: pd.DataFrame, export_path: Path) -> Tuple[bool, str]:
-        """Aplicar formato al Excel"""
-        try:
-            # Renombrar columnas usando mapeo de configuración
-            column_mapping = self.config['export_columns']
+    def export_rollups_to_excel(self, export_path: Path,
+                                progress_callback: callable | None = None,
+                                cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
+        """
+        Exportar los resúmenes por periodo, compañía y estado a Excel
+        (Lee las filas ya agregadas de rollup_facturacion)
+        
+        Args:
+            export_path: Ruta donde se guardará el archivo Excel
+            progress_callback: Función opcional para reportar el progreso de la generación del archivo
+            cancel_event: Cancelación cooperativa (se revisa tras la consulta y antes de escribir)
             
-            df = df.rename(columns=column_mapping)
+        Returns:
+            Tuple[bool, str]: (éxito, mensaje)
+        """
+        metrics = self.metrics.start('exportacion_resumenes', export_path)
+        try:
+            metrics.start('consulta')
+            # Recalcular claves pendientes por si alguna escritura no pasó por un refresco
+            self._refresh_archive_rollups()
+            conn = self._connect_all()
+            self.rollups.refresh(conn.cursor())
+            conn.commit()
+            query = SELECT_ROLLUPS_WITH_ARCHIVE if self.archive.exists() else SELECT_ROLLUPS
+            df = pd.read_sql_query(query, conn)
+            conn.close()
+            metrics.rows = len(df)
+            metrics.stop('consulta', len(df))
+
+            df['periodo'] = df['periodo'].replace('', Messages.NO_PERIOD)
+            self.logger.info(f"Total de filas de resumen para exportar: {len(df)}")
             
-            # Convertir campos de fecha
-            date_columns = self.config['excel']['date_columns']
-            for col in date_columns:
-                if col in df.columns:
-                    df[col] = pd.to_datetime(df[col], errors='coerce')
+            return self._format_excel(df, export_path,
+                                      column_mapping=self.config['rollup_export_columns'],
+                                      sheet_name=self.config['ui']['rollup_sheet_name'],
+                                      progress_callback=progress_callback, metrics=metrics,
+                                      cancel_event=cancel_event)
             
-            # Convertir campos monetarios
-            money_columns = self.config['excel']['money_columns']
-            for col in money_columns:
-                if col in df.columns:
-                    df[col] = pd.to_numeric(df[col], errors='coerce')
+        except Exception as e:
+            self.logger.error(f"Error en export_rollups_to_excel: {str(e)}")
+            return False, Messages.ERROR_EXPORT.format(str(e))
+        finally:
+            self.metrics.record(metrics)
+    
+    def _format_excel(self, df: pd.DataFrame, export_path: Path,
+                      column_mapping: Dict[str, str] | None = None,
+                      sheet_name: str | None = None,
+                      progress_callback: callable | None = None,
+                      metrics: OperationMetrics | None = None,
+                      cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
+        """
+        Aplicar formato al Excel (en un proceso de trabajo si la exportación es grande).
+        Los tiempos de transformación, escritura y formato se agregan a metrics. La cancelación
+        se revisa antes de empezar a escribir; una vez empezado, el archivo se termina
+        """
+        try:
+            # Renombrar columnas usando mapeo de configuración
+            column_mapping = column_mapping or self.config['export_columns']
+            sheet_name = sheet_name or self.config['ui']['export_sheet_name']
 
             if not OPENPYXL_AVAILABLE:
                 self.logger.warning(Messages.ERROR_OPENPYXL + " No se aplicará formato avanzado.")
-                df.to_excel(export_path, index=False, sheet_name=self.config['ui']['export_sheet_name'])
-                return True, Messages.SUCCESS_EXPORT.format(str(export_path))
 
-            # Crear el archivo Excel con formato personalizado usando openpyxl
-            with pd.ExcelWriter(export_path, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name=self.config['ui']['export_sheet_name'], index=False)
-                
-                workbook = writer.book
-                worksheet = writer.sheets[self.config['ui']['export_sheet_name']]
-                
-                header_style_config = self.config['excel']['styles']['header']
-                header_font = Font(**header_style_config['font'])
-                header_fill = PatternFill(start_color=header_style_config['fill']['color'], 
-                                          end_color=header_style_config['fill']['color'], 
-                                          fill_type='solid') # Corrected fill
-                header_alignment = Alignment(**header_style_config['alignment'])
-                
-                date_style = NamedStyle(name='date_style', number_format=self.config['excel']['styles']['date_format'])
-                currency_style = NamedStyle(name='currency_style', number_format=self.config['excel']['styles']['currency_format'])
-                
-                if 'date_style' not in workbook.named_styles:
-                    workbook.add_named_style(date_style)
-                if 'currency_style' not in workbook.named_styles:
-                    workbook.add_named_style(currency_style)
-                
-                for col_num, column_title in enumerate(df.columns, 1):
-                    cell = worksheet.cell(row=1, column=col_num)
-                    cell.font = header_font
-                    cell.fill = header_fill
-                    cell.alignment = header_alignment
-                
-                for col_num, column_title in enumerate(df.columns, 1):
-                    column_letter = get_column_letter(col_num)
-                    max_length = max(
-                        len(str(column_title)),
-                        df[column_title].astype(str).str.len().max() if not df.empty else 0
-                    )
-                    adjusted_width = min(max(max_length + 2, 10), 50) # Basic auto-adjust
-                    worksheet.column_dimensions[column_letter].width = adjusted_width
-
-                    if column_title in date_columns:
-                        for row_idx in range(2, len(df) + 2):
-                            cell = worksheet.cell(row=row_idx, column=col_num)
-                            if cell.value is not None: cell.style = date_style
-                    elif column_title in money_columns:
-                        for row_idx in range(2, len(df) + 2):
-                            cell = worksheet.cell(row=row_idx, column=col_num)
-                            if cell.value is not None: cell.style = currency_style
-                
-                worksheet.auto_filter.ref = worksheet.dimensions
-                worksheet.freeze_panes = 'A2'
+            if _cancelled(cancel_event):
+                return False, Messages.EXPORT_CANCELLED
+
+            phases = self.offloader.run(
+                write_formatted_excel, df, export_path, column_mapping, sheet_name, self.config['excel'],
+                progress_callback=progress_callback,
+                inline=len(df) < self.config['processing']['min_export_rows']
+            )
             
             # Abrir el archivo Excel después de exportarlo
-            try:
-                os.startfile(export_path)
-            except Exception as e_open:
-                self.logger.warning(f"No se pudo abrir el archivo Excel: {str(e_open)}")
-            
-            return True, Messages.SUCCESS_EXPORT.format(str(export_path))
+            if self.config['ui']['open_after_export']:
+                try:
+                    os.startfile(export_path)
+                except Exception as e_open:
+                    self.logger.warning(f"No se pudo abrir el archivo Excel: {str(e_open)}")
+
+            message = Messages.SUCCESS_EXPORT.format(str(export_path))
+            if metrics is not None:
+                metrics.add(phases)
+                metrics.success = True
+                message += self.metrics.report(metrics)
+            return True, message
             
         except Exception as e:
             self.logger.error(f"Error en _format_excel: {str(e)}")
@@ -251,53 +659,77 @@ class DatabaseManager:
     def validate_excel(self, file_path: str) -> Tuple[bool, pd.DataFrame | None, List[str] | str]:
         """Validar archivo Excel"""
         try:
-            df = pd.read_excel(file_path, dtype={'num_doc': str, 'nh_pac': str, 'num_pag': str})
-            missing_columns = [col for col in self.required_columns if col not in df.columns]
-            if missing_columns:
-                return True, df, missing_columns # Return True for valid read, but with missing columns
-            return True, df, [] 
+            df, missing_columns = read_primary_frame(file_path, self.required_columns)
+            return True, df, missing_columns # True for valid read, possibly with missing columns
         except Exception as e:
             self.logger.error(f"Error al validar Excel {file_path}: {str(e)}")
             return False, None, str(e)
 
     def clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """Limpiar y preparar datos"""
-        df_clean = df[self.required_columns].copy()
-        df_clean = df_clean.fillna('')
-        
-        date_columns = ['fec_doc', 'fec_fac', 'fec_pag']
-        for col in date_columns:
-            try:
-                df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce').dt.strftime('%Y-%m-%d')
-                df_clean[col] = df_clean[col].fillna('')
-            except Exception: # Catch any parsing error
-                df_clean[col] = ''
-        
-        text_fields = ['num_doc', 'nh_pac', 'num_pag']
-        for col in text_fields:
-            df_clean[col] = df_clean[col].apply(lambda x: str(x).strip() if pd.notna(x) and str(x).strip().lower() != 'nan' else '')
-        
+        return clean_primary_frame(df, self.required_columns)
+
+    def _split_unknown_documents(self, cursor: sqlite3.Cursor,
+                                 df_clean: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Separar las filas de seguimiento cuyo num_doc no está en detalle_atenciones. Los num_doc
+        del archivo se cargan en una tabla temporal y se comparan con el índice único de la base
+        """
+        num_docs = df_clean['num_doc'].astype(str).str.strip()
+        cursor.execute(SQLQueries.CREATE_TEMP_SEGUIMIENTO_DOCS)
+        cursor.execute(SQLQueries.CLEAR_TEMP_SEGUIMIENTO_DOCS)
+        cursor.executemany(SQLQueries.INSERT_TEMP_SEGUIMIENTO_DOC, ((num_doc,) for num_doc in num_docs.unique()))
+        cursor.execute(SQLQueries.SELECT_UNKNOWN_DOCS)
+        unknown = num_docs.isin({row[0] for row in cursor.fetchall()})
+        headers = {column: header for header, column in self.seguimiento_columns.items()}
+        return df_clean[~unknown], rejects_frame(df_clean[unknown].rename(columns=headers), REASON_UNKNOWN_DOC)
+
+    def _duplicates_summary(self, collapsed: int) -> str:
+        """Línea del resumen con los num_doc repetidos combinados ('' si no hubo)"""
+        if not collapsed:
+            return ''
+        keep = KEEP_DESCRIPTIONS[self.config['validation']['keep_duplicate']]
+        return f"\n{Messages.DUPLICATES_COLLAPSED.format(collapsed, keep)}"
+
+    def _save_rejects(self, rejects: pd.DataFrame | None, file_path: str | Path) -> str:
+        """Guardar el libro de filas rechazadas. Devuelve las líneas para el resumen ('' si no hubo)"""
+        if rejects is None or rejects.empty:
+            return ''
+        summary = f"\n{Messages.REJECTED_ROWS.format(len(rejects), describe_rejects(rejects))}"
+        rejects_dir = Path(self.config['paths']['logs_dir']) / self.config['validation']['rejects_dir_name']
         try:
-            df_clean['tot_doc'] = pd.to_numeric(df_clean['tot_doc'], errors='coerce').fillna(0)
-        except Exception:
-            df_clean['tot_doc'] = 0
-        
-        return df_clean
+            path = write_rejects_workbook(rejects, rejects_dir, file_path)
+        except Exception as e:
+            self.logger.error(f"No se pudo guardar el libro de rechazos: {str(e)}")
+            return summary
+        self.logger.warning(f"{len(rejects)} filas rechazadas de {file_path}: {describe_rejects(rejects)} ({path})")
+        return summary + f"\n{Messages.REJECTS_FILE.format(path)}"
+
+    def _log_summary(self) -> LogSummary:
+        """Contador de avisos por fila que se escribe resumido al terminar la pasada"""
+        return LogSummary(self.logger, self.config['logging']['sample_keys'])
+
+    def _offload_inline(self, file_path: str | Path) -> bool:
+        """Si un archivo es tan pequeño que leerlo en un proceso aparte no compensa"""
+        try:
+            return os.path.getsize(file_path) < self.config['processing']['min_file_kb'] * 1024
+        except OSError:
+            return True
 
     def insert_record(self, cursor: sqlite3.Cursor, row: pd.Series):
-        """Insertar registro"""
+        """Insertar registro (la fila debe tener las claves de dimensión ya resueltas)"""
         query = f'''
             INSERT INTO detalle_atenciones 
-            ({', '.join(self.required_columns)})
-            VALUES ({', '.join(['?'] * len(self.required_columns))})
+            ({', '.join(self.detalle_columns)})
+            VALUES ({', '.join(['?'] * len(self.detalle_columns))})
         '''
-        values = tuple(row[col] for col in self.required_columns)
+        values = tuple(row[col] for col in self.detalle_columns)
         cursor.execute(query, values)
 
     def update_record(self, cursor: sqlite3.Cursor, row: pd.Series, record_id: int):
         """Actualizar registro en la tabla detalle_atenciones"""
         # Excluimos num_doc ya que es el identificador único y no debe cambiar
-        update_cols = [col for col in self.required_columns if col != 'num_doc']
+        update_cols = [col for col in self.detalle_columns if col != 'num_doc']
         query = f'''
             UPDATE detalle_atenciones 
             SET {', '.join([f'{col}=?' for col in update_cols])}
@@ -306,67 +738,176 @@ class DatabaseManager:
         values = tuple(row[col] for col in update_cols) + (record_id,)
         cursor.execute(query, values)
 
-    def process_excel(self, file_path: str, progress_callback: callable) -> Tuple[bool, str]:
-        """Procesar archivo Excel con callback de progreso"""
+    def _import_row(self, cursor: sqlite3.Cursor, row: pd.Series) -> str:
+        """Insertar o actualizar una fila. Devuelve 'inserted', 'updated' o 'error'"""
+        num_doc = str(row['num_doc']).strip()
+        if not num_doc: # num_doc was already cleaned
+            return 'error'
+
+        cursor.execute(SQLQueries.SELECT_BY_DOC, (num_doc,))
+        existing = cursor.fetchone()
+        if existing:
+            self.update_record(cursor, row, existing[0])
+            return 'updated'
+        self.insert_record(cursor, row)
+        return 'inserted'
+
+    def _import_chunk(self, cursor: sqlite3.Cursor, chunk: pd.DataFrame, job: ImportJob,
+                      total_rows: int, progress_callback: callable):
+        """
+        Procesar un lote dentro de un savepoint.
+
+        Si alguna fila falla, el lote se deshace y se repite fila por fila con un savepoint por
+        fila, de modo que solo las filas defectuosas quedan fuera y se cuentan como errores.
+        """
+        cursor.execute("SAVEPOINT lote")
         try:
-            is_valid, df, validation_info = self.validate_excel(file_path)
-            if not is_valid:
-                return False, f"Error al leer archivo: {validation_info}"
-            
-            if isinstance(validation_info, list) and validation_info: # Check if it's the list of missing columns
-                return False, Messages.MISSING_COLUMNS.format(', '.join(validation_info))
-            
-            if df is None: # Should not happen if is_valid is True, but as a safeguard
-                 return False, "Error desconocido al validar el archivo Excel."
+            results = []
+            for position, (_, row) in enumerate(chunk.iterrows(), job.next_row + 1):
+                results.append(self._import_row(cursor, row))
+                progress_callback((position / total_rows) * 100, f"Procesando: {row['num_doc']}")
+        except Exception as e_chunk:
+            cursor.execute("ROLLBACK TO lote")
+            self.logger.warning(f"Error en el lote desde la fila {job.next_row}, reintentando fila por fila: {str(e_chunk)}")
+            issues = self._log_summary()
+            results = []
+            for index, row in chunk.iterrows():
+                cursor.execute("SAVEPOINT fila")
+                try:
+                    results.append(self._import_row(cursor, row))
+                    cursor.execute("RELEASE fila")
+                except Exception as e_row:
+                    cursor.execute("ROLLBACK TO fila")
+                    cursor.execute("RELEASE fila")
+                    issues.add("Filas con error en el lote", f"{row['num_doc']} ({str(e_row)})", logging.ERROR)
+                    results.append('error')
+            issues.flush()
+        cursor.execute("RELEASE lote")
 
-            df_clean = self.clean_data(df.copy()) # Use a copy to avoid SettingWithCopyWarning
+        job.inserted += results.count('inserted')
+        job.updated += results.count('updated')
+        job.errors += results.count('error')
+
+    def prepare_primary_excel(self, file_path: str,
+                              progress_callback: callable | None = None) -> Tuple[bool, PreparedImport | str]:
+        """
+        Leer, validar y limpiar el Excel principal sin tocar la base (al seleccionarlo)
+
+        Returns:
+            Tuple[bool, PreparedImport | str]: (éxito, datos preparados con su vista previa o mensaje de error)
+        """
+        try:
+            signature = file_signature(file_path)
+            # Lectura y limpieza en un proceso de trabajo (CPU pura, libera la interfaz)
+            df_clean, missing_columns, preview, rejects, phases = self.offloader.run(
+                prepare_primary_excel, file_path, self.required_columns, self.config['validation'],
+                progress_callback=progress_callback, inline=self._offload_inline(file_path)
+            )
+            content_hash = file_hash(file_path)
+        except Exception as e_read:
+            self.logger.error(f"Error al validar Excel {file_path}: {str(e_read)}")
+            return False, f"Error al leer archivo: {str(e_read)}"
+
+        if missing_columns:
+            return False, Messages.MISSING_COLUMNS.format(', '.join(missing_columns))
+        if len(df_clean) == 0:
+            if len(rejects):
+                return False, Messages.NO_VALID_ROWS.format(len(rejects), describe_rejects(rejects))
+            return False, Messages.NO_DATA
+        return True, PreparedImport(file_path, signature, content_hash, df_clean, preview, phases, rejects)
+
+    def process_excel(self, file_path: str, progress_callback: callable,
+                      cancel_event: threading.Event | None = None,
+                      prepared: PreparedImport | None = None) -> Tuple[bool, str]:
+        """
+        Procesar archivo Excel con callback de progreso
+
+        cancel_event se revisa entre lotes: el lote en curso se deshace y la importación queda
+        registrada para reanudarse desde el último lote confirmado. prepared (de
+        prepare_primary_excel) evita volver a leer y limpiar el archivo; sus tiempos de lectura,
+        validación y limpieza se incluyen igualmente en las métricas.
+        """
+        metrics = self.metrics.start('importacion', file_path)
+        try:
+            # Reutilizar la lectura hecha al seleccionar el archivo si este no cambió desde entonces
+            if prepared is None or not prepared.matches(file_path):
+                success, prepared = self.prepare_primary_excel(file_path, progress_callback)
+                if not success:
+                    return False, prepared
+            metrics.add(prepared.phases)
+            df_clean = prepared.data
             total_rows = len(df_clean)
+            metrics.rows = total_rows
+
+            if _cancelled(cancel_event):
+                return False, Messages.OPERATION_CANCELLED
             
-            if total_rows == 0:
-                return False, Messages.NO_DATA
-            
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            inserted = 0
-            updated = 0
-            errors = 0
-            
-            for index, row in df_clean.iterrows():
-                try:
-                    num_doc = str(row['num_doc']).strip()
-                    if not num_doc: # num_doc was already cleaned
-                        errors += 1
-                        continue
-                    
-                    cursor.execute(SQLQueries.SELECT_BY_DOC, (num_doc,))
-                    existing = cursor.fetchone()
-                    
-                    if existing:
-                        self.update_record(cursor, row, existing[0])
-                        updated += 1
-                    else:
-                        self.insert_record(cursor, row)
-                        inserted += 1
-                    
-                    progress = ((index + 1) / total_rows) * 100
-                    progress_callback(progress, f"Procesando: {num_doc}")
-                    
-                except Exception as e_row:
-                    self.logger.error(f"Error procesando fila {index} (num_doc: {num_doc}): {str(e_row)}")
-                    errors += 1
-                    continue # Continue with the next row
+            if self.config['backup']['before_import']:
+                self._backup_all(KIND_PRE_IMPORT)
+
+            content_hash = prepared.content_hash
+            conn = self._connect_all()
+            try:
+                cursor = conn.cursor()
+
+                metrics.start('escritura')
+                # Reanudar desde el último lote confirmado si este mismo archivo quedó a medias
+                job = self.import_jobs.start_or_resume(cursor, file_path, content_hash, total_rows)
+
+                # Los documentos archivados que vuelven a llegar se devuelven a la base activa
+                restored = self.archive.restore(cursor, df_clean['num_doc']) if self.archive.exists() else 0
+
+                # Resolver compañías, servicios, etc. a sus ids una vez por valor distinto
+                df_clean = DimensionCache(cursor).encode_frame(df_clean)
+                metrics.stop('escritura')
+                with metrics.phase('commit'):
+                    conn.commit()
+
+                # Cada lote se confirma junto con su checkpoint: un cierre a mitad pierde como máximo un lote
+                chunk_size = self.config['imports']['chunk_size']
+                for start in range(job.next_row, total_rows, chunk_size):
+                    chunk = df_clean.iloc[start:start + chunk_size]
+                    # Transacción explícita: el savepoint del lote queda anidado y el checkpoint entra en el mismo commit
+                    with metrics.phase('escritura', len(chunk)):
+                        cursor.execute("BEGIN")
+                        self._import_chunk(cursor, chunk, job, total_rows, progress_callback)
+                    if _cancelled(cancel_event):
+                        self.logger.info(f"Importación {job.id} cancelada en la fila {job.next_row} de {total_rows}")
+                        return False, Messages.IMPORT_CANCELLED.format(job.next_row, total_rows)
+                    job.next_row = start + len(chunk)
+                    with metrics.phase('commit'):
+                        self.import_jobs.checkpoint(cursor, job)
+                        conn.commit()
             
-            conn.commit()
-            conn.close()
+                with metrics.phase('commit'):
+                    self.rollups.refresh(cursor)
+                    self.import_jobs.complete(cursor, job)
+                    conn.commit()
+                    # Actualizar estadísticas del planificador solo si cambiaron lo suficiente
+                    cursor.execute("PRAGMA optimize")
+            finally:
+                # Sin efecto tras el commit final; ante un error o una cancelación deshace el lote en curso
+                conn.rollback()
+                conn.close()
+
+            if restored:
+                with metrics.phase('commit'):
+                    self._refresh_archive_rollups()
 
             # Actualizar estados de pago después de importar
-            payment_success, payment_result = self.update_payment_status()
+            with metrics.phase('pagos'):
+                payment_success, payment_result = self.update_payment_status()
         
             # Actualizar estados de facturas con monto cero o negativo
-            zero_neg_success, zero_neg_result = self.update_zero_negative_status()
+            with metrics.phase('cero_negativo'):
+                zero_neg_success, zero_neg_result = self.update_zero_negative_status()
 
+            inserted, updated, errors = job.inserted, job.updated, job.errors
             summary = f"Insertados: {inserted}, Actualizados: {updated}, Errores: {errors}"
+            if job.resumed_from:
+                summary += f"\n{Messages.IMPORT_RESUMED.format(job.resumed_from)}"
+            summary += self._duplicates_summary(prepared.preview['duplicados'])
+            summary += self._save_rejects(prepared.rejects, file_path)
 
             if payment_success:
                 summary += f"\n{payment_result}"
@@ -378,13 +919,17 @@ class DatabaseManager:
             else:
                 summary += f"\n{zero_neg_result}"
 
-            return True, summary
+            metrics.success = True
+            return True, summary + self.metrics.report(metrics)
             
         except Exception as e_main:
             self.logger.error(f"Error general en process_excel: {str(e_main)}")
             return False, Messages.ERROR_UPDATE.format(str(e_main))
+        finally:
+            self.metrics.record(metrics)
 
-    def update_seguimiento_from_excel(self, file_path: str, progress_callback: callable) -> Tuple[bool, str]:
+    def update_seguimiento_from_excel(self, file_path: str, progress_callback: callable,
+                                      cancel_event: threading.Event | None = None) -> Tuple[bool, str]:
         """
         Actualizar seguimiento desde archivo Excel
         
@@ -395,75 +940,77 @@ class DatabaseManager:
         Args:
             file_path (str): Ruta al archivo Excel con datos de seguimiento
             progress_callback (callable): Función para reportar progreso de la operación
+            cancel_event (threading.Event): Si se activa, se deshace toda la pasada
             
         Returns:
             Tuple[bool, str]: (Éxito/Fallo, Mensaje descriptivo)
         """
+        metrics = self.metrics.start('seguimiento', file_path)
+        conn = None
         try:
             self.logger.info(f"Iniciando actualización de seguimiento desde Excel: {file_path}")
             
-            # Leer Excel con nombres de columnas amigables para el usuario final
-            # Se especifican tipos de datos para columnas críticas para evitar conversiones automáticas incorrectas
-            df = pd.read_excel(file_path, dtype={'Número de Documento': str, 'Historia Clínica': str})
-            
-            # Verificar que todas las columnas requeridas estén presentes en el archivo
-            # Usando los nombres amigables definidos en la configuración
-            missing_columns = [col for col in self.seguimiento_columns.keys() if col not in df.columns]
+            # Leer Excel con nombres de columnas amigables para el usuario final y normalizarlo
+            # (en un proceso de trabajo: CPU pura, libera la interfaz)
+            df_clean, missing_columns, rejects, phases = self.offloader.run(
+                load_seguimiento_excel, file_path, self.seguimiento_columns, self.config['validation'],
+                progress_callback=progress_callback, inline=self._offload_inline(file_path)
+            )
+            metrics.add(phases)
             if missing_columns:
                 return False, Messages.MISSING_COLUMNS.format(', '.join(missing_columns))
             
-            # Seleccionar solo las columnas necesarias y renombrarlas a los nombres de la base de datos
-            df_to_process = df[list(self.seguimiento_columns.keys())].copy()
-            df_to_process.rename(columns=self.seguimiento_columns, inplace=True)
+            # Conectar a la base de datos y preparar para procesamiento
+            metrics.start('escritura')
+            conn = self._connect_all()
+            cursor = conn.cursor()
+
+            # Los documentos archivados que vuelven a llegar se devuelven a la base activa
+            restored = self.archive.restore(cursor, df_clean['num_doc']) if self.archive.exists() else 0
+            metrics.stop('escritura')
+
+            # Documentos que no están en la base: se rechazan junto con los de la validación del archivo.
+            # Un num_doc repetido se escribe una sola vez (sin insertar y luego actualizar)
+            with metrics.phase('validacion', len(df_clean)):
+                df_clean, unknown = self._split_unknown_documents(cursor, df_clean)
+                rejects = concat_rejects([rejects, unknown])
+                df_clean, collapsed = collapse_duplicates(df_clean, self.config['validation']['keep_duplicate'])
 
-            # Limpiar datos: convertir NaN a cadenas vacías para evitar problemas con SQLite
-            df_clean = df_to_process.fillna('') 
-            
-            # Convertir y formatear columnas de fecha al formato estándar YYYY-MM-DD
-            date_columns_db = ['fecha_envio', 'fecha_recepcion']
-            for col in date_columns_db:
-                if col in df_clean.columns:
-                    try:
-                        df_clean[col] = pd.to_datetime(df_clean[col], errors='coerce').dt.strftime('%Y-%m-%d')
-                        df_clean[col] = df_clean[col].fillna('') # Asegurar que NAs se conviertan a cadenas vacías
-                    except Exception:
-                         df_clean[col] = ''
-            
             # Verificar que haya datos para procesar
             total_rows = len(df_clean)
             if total_rows == 0:
+                if len(rejects):
+                    self._save_rejects(rejects, file_path)
+                    return False, Messages.NO_VALID_ROWS.format(len(rejects), describe_rejects(rejects))
                 return False, Messages.NO_DATA
-            
-            # Conectar a la base de datos y preparar para procesamiento
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            metrics.rows = total_rows
+            metrics.start('escritura')
             
             # Contadores para el resumen final
             updated_count = 0
             inserted_count = 0
             errors_count = 0
             skipped_paid_count = 0  # Nuevo contador para registros pagados que se omiten
+            events = EventLog(SOURCE_EXCEL)
+            # Los avisos por fila se resumen al final (conteo y documentos de ejemplo)
+            issues = self._log_summary()
             
-            for index, row in df_clean.iterrows():
+            for position, (index, row) in enumerate(df_clean.iterrows(), 1):
+                if _cancelled(cancel_event):
+                    # La pasada es una sola transacción: cancelar no deja cambios a medias
+                    issues.flush()
+                    return False, Messages.OPERATION_CANCELLED
                 try:
                     # Obtener y validar número de documento
                     num_doc = str(row['num_doc']).strip()
                     if not num_doc:
                         errors_count += 1
-                        self.logger.warning("Número de documento vacío, omitiendo registro")
+                        issues.add("Registros omitidos por número de documento vacío", f"fila {index + 2}")
                         continue
                     
-                    # Buscar el registro correspondiente en detalle_atenciones
+                    # Registro correspondiente en detalle_atenciones (los desconocidos ya se rechazaron)
                     cursor.execute(SQLQueries.SELECT_BY_DOC, (num_doc,))
-                    detalle_record = cursor.fetchone()
-                    
-                    # Si no existe el registro en detalle_atenciones, no se puede actualizar
-                    if not detalle_record:
-                        errors_count += 1
-                        self.logger.warning(f"No se encontró detalle_atencion para num_doc: {num_doc}")
-                        continue
-                    
-                    detalle_id = detalle_record[0]
+                    detalle_id = cursor.fetchone()[0]
                     
                     # Verificar si ya existe un registro de seguimiento para este documento
                     cursor.execute(SQLQueries.SELECT_BY_ID, (detalle_id,))
@@ -479,7 +1026,7 @@ class DatabaseManager:
                         
                         # Si el registro ya está marcado como pagado, no modificarlo
                         if current_status_result and current_status_result[0].strip().lower() == Messages.PAID_STATUS.lower():
-                            self.logger.info(f"Omitiendo actualización de registro ya pagado: {num_doc}")
+                            issues.add("Omitiendo actualización de registros ya pagados", num_doc, logging.INFO)
                             skipped_paid_count += 1
                             continue
                     
@@ -507,31 +1054,46 @@ class DatabaseManager:
                             VALUES (?, ?, ?, ?, ?, ?)
                         """, (detalle_id, estado, fecha_envio_val, fecha_recepcion_val, observaciones_val, acciones_val))
                         inserted_count += 1
+                    events.add(detalle_id, estado, observaciones_val, acciones_val)
                     
                     # Actualizar barra de progreso
-                    progress = ((index + 1) / total_rows) * 100
+                    progress = (position / total_rows) * 100
                     progress_callback(progress, Messages.PROCESSING_DOC.format(num_doc))
                     
                 except Exception as e_row_seguimiento:
-                    self.logger.error(f"Error procesando seguimiento para num_doc {row.get('num_doc', 'N/A')}: {str(e_row_seguimiento)}")
+                    issues.add("Error procesando seguimiento", f"{row.get('num_doc', 'N/A')} ({str(e_row_seguimiento)})",
+                               logging.ERROR)
                     errors_count += 1
                     continue
+            issues.flush()
             
+            metrics.stop('escritura', total_rows)
+
             # Confirmar cambios y cerrar conexión
-            conn.commit()
-            conn.close()
+            with metrics.phase('commit'):
+                events.flush(cursor)
+                self.rollups.refresh(cursor)
+                conn.commit()
+                conn.close()
+                conn = None
+                if restored:
+                    self._refresh_archive_rollups()
             
             # Actualizar estados automáticos después de procesar el archivo
             # Primero actualizamos estados de pago
-            payment_success, payment_result = self.update_payment_status()
+            with metrics.phase('pagos'):
+                payment_success, payment_result = self.update_payment_status()
             
             # Luego actualizamos estados de facturas con monto cero o negativo
-            zero_neg_success, zero_neg_result = self.update_zero_negative_status()
+            with metrics.phase('cero_negativo'):
+                zero_neg_success, zero_neg_result = self.update_zero_negative_status()
             
             # Generar resumen de la operación
             summary = Messages.SUCCESS_UPDATE.format(updated_count, inserted_count, errors_count)
             if skipped_paid_count > 0:
                 summary += f"\nRegistros ya pagados omitidos: {skipped_paid_count}"
+            summary += self._duplicates_summary(collapsed)
+            summary += self._save_rejects(rejects, file_path)
                 
             # Añadir resultados de las actualizaciones automáticas
             if payment_success:
@@ -545,11 +1107,19 @@ class DatabaseManager:
                 summary += f"\n{zero_neg_result}"
             
             self.logger.info(summary)
-            return True, summary
+            metrics.success = True
+            return True, summary + self.metrics.report(metrics)
             
         except Exception as e_main_seguimiento:
             self.logger.error(f"Error general en update_seguimiento_from_excel: {str(e_main_seguimiento)}")
             return False, Messages.ERROR_UPDATE.format(str(e_main_seguimiento))
+        finally:
+            # Sin filas válidas, cancelación o error: deshacer la pasada (y la restauración desde el
+            # archivo) y soltar la conexión con el archivo adjunto
+            if conn is not None:
+                conn.rollback()
+                conn.close()
+            self.metrics.record(metrics)
 
     def update_payment_status(self) -> Tuple[bool, str]:
         """
@@ -562,7 +1132,7 @@ class DatabaseManager:
             Tuple[bool, str]: (Éxito/Fallo, Mensaje descriptivo)
         """
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             # Obtener registros con información de pago
@@ -572,21 +1142,20 @@ class DatabaseManager:
             updated_count = 0
             inserted_count = 0
             skipped_empty_count = 0  # Contador para registros con num_pag vacío
+            events = EventLog(SOURCE_PAYMENT)
+            issues = self._log_summary()
         
             for record in paid_records:
                 detalle_id, num_doc, num_pag, fec_pag = record
                 
                 # Validar que num_pag no esté vacío (adicional a la consulta SQL)
                 if not num_pag or str(num_pag).strip() == '':
-                    self.logger.info(f"Omitiendo registro con número de pago vacío: {num_doc}")
+                    issues.add("Omitiendo registros con número de pago vacío", num_doc, logging.INFO)
                     skipped_empty_count += 1
                     continue
                 
-                # Asegurar que la fecha de pago sea válida, usar fecha actual si no lo es
-                try:
-                    valid_fec_pag = pd.to_datetime(fec_pag).strftime('%Y-%m-%d') if fec_pag else datetime.now().strftime('%Y-%m-%d')
-                except ValueError:  # Manejar casos donde fec_pag podría ser una cadena de fecha inválida
-                    valid_fec_pag = datetime.now().strftime('%Y-%m-%d')
+                # La consulta ya devuelve la fecha como YYYY-MM-DD (o NULL); usar fecha actual si falta
+                valid_fec_pag = fec_pag if fec_pag else datetime.now().strftime('%Y-%m-%d')
 
                 # Verificar si ya existe un registro de seguimiento para este documento
                 cursor.execute(SQLQueries.SELECT_BY_ID, (detalle_id,))
@@ -604,21 +1173,18 @@ class DatabaseManager:
                         continue 
 
                     # Actualizar el registro existente con estado 'Pagado'
+                    # (las observaciones anteriores quedan en seguimiento_eventos)
                     cursor.execute("""
                         UPDATE seguimiento_facturacion 
                         SET estado_aseguradora = ?,
                             fecha_recepcion = ?,
-                            observaciones = CASE 
-                                WHEN observaciones = '' OR observaciones IS NULL THEN ?
-                                ELSE observaciones || ' | ' || ?
-                            END,
+                            observaciones = ?,
                             acciones = CASE 
                                 WHEN acciones = '' OR acciones IS NULL THEN ?
                                 ELSE acciones 
                             END
                         WHERE id = ?
-                    """, (Messages.PAID_STATUS, valid_fec_pag, 
-                          Messages.DEFAULT_OBSERVATION, Messages.DEFAULT_OBSERVATION, 
+                    """, (Messages.PAID_STATUS, valid_fec_pag, Messages.DEFAULT_OBSERVATION,
                           Messages.DEFAULT_ACTION, seguimiento_id))
                     updated_count += 1
                 else:
@@ -630,8 +1196,13 @@ class DatabaseManager:
                     """, (detalle_id, Messages.PAID_STATUS, valid_fec_pag, valid_fec_pag, 
                           Messages.DEFAULT_OBSERVATION, Messages.DEFAULT_ACTION))
                     inserted_count += 1 
+                events.add(detalle_id, Messages.PAID_STATUS, Messages.DEFAULT_OBSERVATION, Messages.DEFAULT_ACTION)
+
+            issues.flush()
 
             # Confirmar cambios y cerrar conexión
+            events.flush(cursor)
+            self.rollups.refresh(cursor)
             conn.commit()
             conn.close()
         
@@ -650,7 +1221,7 @@ class DatabaseManager:
     def update_zero_negative_status(self) -> Tuple[bool, str]:
         """Actualizar automáticamente el estado a 'Cero o Negativo' en seguimiento_facturacion si tot_doc es <= 0."""
         try:
-            conn = sqlite3.connect(self.db_path)
+            conn = self._connect()
             cursor = conn.cursor()
             
             cursor.execute(SQLQueries.SELECT_ZERO_NEGATIVE)
@@ -659,6 +1230,7 @@ class DatabaseManager:
             updated_count = 0
             inserted_count = 0
             current_date = datetime.now().strftime('%Y-%m-%d')
+            events = EventLog(SOURCE_ZERO_NEGATIVE)
         
             for record in zero_negative_records:
                 detalle_id, num_doc, tot_doc = record
@@ -675,20 +1247,17 @@ class DatabaseManager:
                     if current_status_result and current_status_result[0].strip().lower() == Messages.ZERO_NEGATIVE_STATUS.lower():
                         continue 
 
+                    # Las observaciones anteriores quedan en seguimiento_eventos
                     cursor.execute("""
                         UPDATE seguimiento_facturacion 
                         SET estado_aseguradora = ?,
-                            observaciones = CASE 
-                                WHEN observaciones = '' OR observaciones IS NULL THEN ?
-                                ELSE observaciones || ' | ' || ?
-                            END,
+                            observaciones = ?,
                             acciones = CASE 
                                 WHEN acciones = '' OR acciones IS NULL THEN ?
                                 ELSE acciones 
                             END
                         WHERE id = ?
-                    """, (Messages.ZERO_NEGATIVE_STATUS, 
-                          Messages.ZERO_NEGATIVE_OBSERVATION, Messages.ZERO_NEGATIVE_OBSERVATION, 
+                    """, (Messages.ZERO_NEGATIVE_STATUS, Messages.ZERO_NEGATIVE_OBSERVATION,
                           Messages.ZERO_NEGATIVE_ACTION, seguimiento_id))
                     updated_count += 1
                 else:
@@ -699,7 +1268,11 @@ class DatabaseManager:
                     """, (detalle_id, Messages.ZERO_NEGATIVE_STATUS, current_date, current_date, 
                           Messages.ZERO_NEGATIVE_OBSERVATION, Messages.ZERO_NEGATIVE_ACTION))
                     inserted_count += 1 
+                events.add(detalle_id, Messages.ZERO_NEGATIVE_STATUS,
+                           Messages.ZERO_NEGATIVE_OBSERVATION, Messages.ZERO_NEGATIVE_ACTION)
 
+            events.flush(cursor)
+            self.rollups.refresh(cursor)
             conn.commit()
             conn.close()
         
@@ -0,0 +1,140 @@
+"""
+Normalización de fechas de los Excel (principal, seguimiento) y de las exportaciones.
+
+Un archivo de cientos de miles de filas tiene solo unos cientos de fechas distintas: se
+factoriza la columna, se interpreta cada valor distinto una sola vez y el resultado se reparte
+a las filas con los códigos de la factorización (sin apply ni bucles por fila).
+
+Las fechas de texto se interpretan con el formato del archivo: el primero que se prueba es el
+aprendido en una columna anterior y, si no reconoce todos los valores, se elige entre
+DATE_FORMATS el que reconoce más (a igualdad, el primero de la lista). Lo que ningún formato
+reconoce se interpreta valor por valor y, si tampoco, queda como fecha inválida: vacía en el
+resultado, contada por columna y marcada por fila (invalid_rows) para rechazar esas filas.
+"""
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+from src.utils.lazy import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Formatos de texto que se prueban (el orden decide los empates, p. ej. 05/06/2024)
+DATE_FORMATS = [
+    '%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%m/%d/%Y', '%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y', '%Y/%m/%d'
+]
+
+# Textos que equivalen a una celda vacía
+EMPTY_VALUES = {'', 'nan', 'nat', 'none'}
+
+TEXT_FORMAT = '%Y-%m-%d'
+
+
+class DateNormalizer:
+    """
+    Interpreta las columnas de fecha de un archivo. Se usa una instancia por archivo: el
+    formato aprendido en una columna se prueba primero en las siguientes.
+    """
+
+    def __init__(self, formats: List[str] | None = None):
+        self.formats = formats or DATE_FORMATS
+        self.format: str | None = None      # Formato aprendido del archivo
+        self.invalid: Dict[str, int] = {}   # columna -> filas con fecha no reconocida
+        self.invalid_rows: Dict[str, np.ndarray] = {}  # columna -> máscara por fila (validación)
+
+    @property
+    def invalid_total(self) -> int:
+        return sum(self.invalid.values())
+
+    # --- Resultados por fila -----------------------------------------------
+
+    def parse(self, series: pd.Series, column: str | None = None) -> pd.Series:
+        """Fechas (datetime64, NaT si faltan o no se reconocen)"""
+        if pd.api.types.is_datetime64_any_dtype(series):
+            return series
+        codes, dates = self._parse_unique(series, column)
+        values = np.append(dates.to_numpy(), np.datetime64('NaT'))
+        return pd.Series(values[codes], index=series.index, name=series.name)
+
+    def to_days(self, series: pd.Series, column: str | None = None) -> pd.Series:
+        """Días desde 1970-01-01 (formato de almacenamiento); None si faltan"""
+        codes, dates = self._parse_unique(series, column)
+        days = (dates - pd.Timestamp('1970-01-01')).dt.days
+        values = np.append(days.astype('Int64').astype(object).where(days.notna(), None).to_numpy(), None)
+        return pd.Series(values[codes], index=series.index, name=series.name, dtype=object)
+
+    def to_text(self, series: pd.Series, column: str | None = None) -> pd.Series:
+        """Texto YYYY-MM-DD; cadena vacía si faltan"""
+        codes, dates = self._parse_unique(series, column)
+        values = np.append(dates.dt.strftime(TEXT_FORMAT).fillna('').to_numpy(dtype=object), '')
+        return pd.Series(values[codes], index=series.index, name=series.name, dtype=object)
+
+    # --- Valores distintos ---------------------------------------------------
+
+    def _parse_unique(self, series: pd.Series, column: str | None) -> Tuple[np.ndarray, pd.Series]:
+        """
+        Códigos de factorización (-1 para nulos) y la fecha de cada valor distinto. Se indexa con
+        los códigos tras añadir un valor vacío al final, que es el que recibe el -1
+        """
+        column = column or str(series.name)
+        kind = pd.api.types.infer_dtype(series, skipna=True) if series.dtype == object else None
+        # Celdas de fecha de Excel (Timestamp), quizá con vacíos: como datetime64 se factorizan
+        # sin calcular el hash de cada objeto
+        if kind in ('datetime', 'datetime64'):
+            series = pd.to_datetime(series, errors='coerce')
+        elif kind == 'mixed':
+            converted = series.where(series != '', None).infer_objects()
+            if pd.api.types.is_datetime64_any_dtype(converted):
+                series = converted
+        if pd.api.types.is_datetime64_any_dtype(series):
+            codes, uniques = pd.factorize(series)
+            return codes, pd.Series(uniques).astype('datetime64[us]')
+
+        codes, uniques = pd.factorize(series.astype(object))
+        values = pd.Series(uniques, dtype=object)
+        dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[us]')
+
+        is_text = values.map(lambda value: isinstance(value, str))
+        text = values[is_text].str.strip()
+        empty = text.str.lower().isin(EMPTY_VALUES)
+        text = text[~empty]
+        if len(text):
+            dates[text.index] = self._parse_text(text)
+        others = values[~is_text]
+        if len(others):
+            dates[others.index] = pd.to_datetime(others, errors='coerce').astype('datetime64[us]')
+
+        invalid = dates.isna()
+        invalid[empty.index[empty]] = False
+        if invalid.any():
+            counts = np.bincount(codes[codes >= 0], minlength=len(values))
+            self.invalid[column] = self.invalid.get(column, 0) + int(counts[invalid.to_numpy()].sum())
+            self.invalid_rows[column] = np.append(invalid.to_numpy(), False)[codes]
+        return codes, dates
+
+    def _parse_text(self, text: pd.Series) -> pd.Series:
+        """Interpretar textos distintos con el formato del archivo (aprendiéndolo si hace falta)"""
+        dates = self._with_format(text, self.format) if self.format else None
+        if dates is None or dates.isna().any():
+            best, best_count = dates, -1 if dates is None else int(dates.notna().sum())
+            for date_format in self.formats:
+                candidate = self._with_format(text, date_format)
+                count = int(candidate.notna().sum())
+                if count > best_count:
+                    best, best_count = candidate, count
+                    if count > 0:
+                        self.format = date_format
+                    if count == len(text):
+                        break
+            dates = best
+
+        # Lo que el formato del archivo no reconoce se interpreta valor por valor
+        pending = dates.isna()
+        if pending.any():
+            dates[pending] = pd.to_datetime(text[pending], format='mixed', errors='coerce').astype('datetime64[us]')
+        return dates
+
+    @staticmethod
+    def _with_format(text: pd.Series, date_format: str) -> pd.Series:
+        return pd.to_datetime(text, format=date_format, errors='coerce').astype('datetime64[us]')
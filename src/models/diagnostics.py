@@ -0,0 +1,249 @@
+"""
+Diagnóstico de SQL (opcional): conteo y tiempo por sentencia, consultas lentas y su plan.
+
+Con DIAGNOSTICS_CONFIG['sql_trace'] (o python -m src --sql-trace ...) las conexiones que abre
+DatabaseManager instalan set_trace_callback y usan un cursor que mide cada execute y fetch.
+Las sentencias se agrupan por su forma normalizada (literales reemplazados por ?), de modo que
+las consultas por fila de una pasada aparecen como una sola sentencia con cientos de miles de
+ejecuciones.
+
+- El cursor cuenta sus propias ejecuciones (cada fila de executemany, las consultas de pandas);
+  el callback de traza cuenta lo demás que ejecuta SQLite: BEGIN/COMMIT implícitos, scripts y
+  sentencias de otros cursores. Los subprogramas de trigger llegan a la traza con el texto de
+  la sentencia que los dispara y no se cuentan aparte.
+- El tiempo se mide en Python: execute más los fetch del mismo resultado, y commit.
+- Las sentencias más lentas que slow_query_ms se registran con su EXPLAIN QUERY PLAN.
+- El perfil se agrupa por operación (las mismas que registran métricas: importación,
+  seguimiento, exportaciones) y se agrega a su línea de logs/metricas.jsonl y al log.
+
+Sin el modo activo, las conexiones son sqlite3.Connection normales y no hay costo alguno.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+# Literales de texto, blobs, números (no dentro de identificadores) y NULL, parámetros con nombre
+# y listas IN de largo variable. La traza recibe la sentencia con sus valores ya sustituidos
+_LITERALS = re.compile(r"[xX]?'(?:[^']|'')*'|(?<![\w.])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b|\b(?i:null)\b|:\w+")
+_NEGATIVE = re.compile(r"([=(,<>]\s*)-\?")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+# Sentencias con plan de consulta
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+
+def normalize_sql(sql: str) -> str:
+    """Forma de una sentencia sin sus valores: literales y parámetros como ?, espacios colapsados"""
+    sql = _NEGATIVE.sub(r'\1?', _LITERALS.sub('?', sql))
+    sql = _PLACEHOLDER_LIST.sub('(?, ...)', sql)
+    return ' '.join(sql.split())
+
+
+class SqlProfile:
+    """Conteo y tiempo acumulado por sentencia normalizada durante una operación"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.previous: 'SqlProfile | None' = None   # Perfil que estaba activo en el hilo
+        self.statements: Dict[str, List[float]] = {}  # sentencia -> [ejecuciones, segundos, máximo]
+        self.slow = 0
+
+    def count(self, key: str, executions: int = 1):
+        self.statements.setdefault(key, [0, 0.0, 0.0])[0] += executions
+
+    def add_time(self, key: str, seconds: float):
+        stats = self.statements.setdefault(key, [0, 0.0, 0.0])
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+    def to_record(self, top: int) -> Dict:
+        """Resumen para metricas.jsonl: totales y las sentencias con más tiempo"""
+        ranked = sorted(self.statements.items(), key=lambda item: (item[1][1], item[1][0]), reverse=True)
+        return {
+            'sentencias': len(self.statements),
+            'ejecuciones': sum(stats[0] for stats in self.statements.values()),
+            'segundos': round(sum(stats[1] for stats in self.statements.values()), 4),
+            'lentas': self.slow,
+            'top': [
+                {'sql': key, 'ejecuciones': stats[0], 'segundos': round(stats[1], 4),
+                 'max_ms': round(stats[2] * 1000, 2)}
+                for key, stats in ranked[:top]
+            ],
+        }
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor que mide execute/executemany y los fetch de su resultado"""
+
+    _key: str | None = None
+    _sql: str | None = None
+    _params = None
+    _elapsed = 0.0
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters, 1, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        sample = seq_of_parameters[0] if seq_of_parameters else ()
+        return self._timed(super().executemany, sql, sample, len(seq_of_parameters), sql, seq_of_parameters)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def _timed(self, method, sql, sample, executions, *args):
+        self._sql, self._params, self._key = sql, sample, normalize_sql(sql)
+        profiler = self.connection.profiler
+        profiler.enter(self._key, executions)
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self._elapsed = time.perf_counter() - started
+            profiler.leave()
+            profiler.add_time(self, self._elapsed, final=False)
+
+    def _fetch(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._key is not None:
+                elapsed = time.perf_counter() - started
+                self._elapsed += elapsed
+                self.connection.profiler.add_time(self, elapsed, final=True)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Conexión cuyos cursores (y execute/commit directos) pasan por el perfilador"""
+
+    profiler: 'SqlProfiler' = None
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        started = time.perf_counter()
+        try:
+            super().commit()
+        finally:
+            self.profiler.add_commit(time.perf_counter() - started)
+
+
+class SqlProfiler:
+    """Abre las conexiones de DatabaseManager y, en modo diagnóstico, perfila su SQL"""
+
+    def __init__(self, config: Dict, logger: logging.Logger):
+        self.config = config
+        self.logger = logger
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config['sql_trace'])
+
+    def connect(self, db_path: Path, **kwargs) -> sqlite3.Connection:
+        """sqlite3.connect con traza y medición si el modo diagnóstico está activo"""
+        if not self.enabled:
+            return sqlite3.connect(db_path, **kwargs)
+        conn = sqlite3.connect(db_path, factory=ProfiledConnection, **kwargs)
+        conn.profiler = self
+        conn.set_trace_callback(self._on_statement)
+        return conn
+
+    # --- Operaciones ----------------------------------------------------
+
+    def begin(self, operation: str) -> SqlProfile | None:
+        """Empezar el perfil de una operación en este hilo (None si el modo no está activo)"""
+        if not self.enabled:
+            return None
+        profile = SqlProfile(operation)
+        profile.previous = getattr(self._local, 'profile', None)
+        self._local.profile = profile
+        return profile
+
+    def end(self, profile: SqlProfile) -> Dict:
+        """Terminar el perfil, escribir el reporte en el log y devolver su resumen"""
+        self._local.profile = profile.previous
+        record = profile.to_record(self.config['report_top'])
+        lines = [f"Perfil SQL de {profile.operation}: {record['ejecuciones']:,} ejecuciones de "
+                 f"{record['sentencias']} sentencias, {record['segundos']:.2f}s, {record['lentas']} lentas"]
+        for entry in record['top']:
+            lines.append(f"  {entry['segundos']:9.3f}s {entry['ejecuciones']:>9,}x  máx {entry['max_ms']:8.1f} ms  "
+                         f"{entry['sql'][:160]}")
+        self.logger.info('\n'.join(lines))
+        return record
+
+    # --- Callbacks ------------------------------------------------------
+
+    def enter(self, key: str, executions: int):
+        """Un cursor empieza a ejecutar key (executions veces): la traza no la cuenta de nuevo"""
+        self._local.executing = key
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile.count(key, executions)
+
+    def leave(self):
+        self._local.executing = None
+
+    def _on_statement(self, sql: str):
+        profile = getattr(self._local, 'profile', None)
+        if profile is None or getattr(self._local, 'explaining', False):
+            return
+        key = normalize_sql(sql)
+        if key != getattr(self._local, 'executing', None):
+            profile.count(key)
+
+    def add_time(self, cursor: ProfiledCursor, seconds: float, final: bool):
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile.add_time(cursor._key, seconds)
+        slow_seconds = self.config['slow_query_ms'] / 1000
+        # Una consulta lenta se informa una vez: al terminar el execute si ya superó el umbral,
+        # o en un fetch posterior si el umbral se alcanza al leer las filas
+        if cursor._elapsed >= slow_seconds and (cursor._elapsed - seconds < slow_seconds or not final):
+            if profile is not None:
+                profile.slow += 1
+            self._log_slow(cursor)
+
+    def add_commit(self, seconds: float):
+        profile = getattr(self._local, 'profile', None)
+        if profile is not None:
+            profile.add_time('COMMIT', seconds)
+
+    def _log_slow(self, cursor: ProfiledCursor):
+        message = f"Consulta lenta ({cursor._elapsed * 1000:.0f} ms): {' '.join(cursor._sql.split())[:500]}"
+        plan = self.explain(cursor.connection, cursor._sql, cursor._params) \
+            if cursor._sql.lstrip().upper().startswith(_EXPLAINABLE) else []
+        if plan:
+            message += f"\n  Plan: {' | '.join(plan)}"
+        self.logger.warning(message)
+
+    def explain(self, conn: sqlite3.Connection, sql: str, params) -> List[str]:
+        """Pasos de EXPLAIN QUERY PLAN de una sentencia (sin contarla en el perfil)"""
+        self._local.explaining = True
+        try:
+            plain = sqlite3.Cursor(conn)
+            plain.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())
+            return [row[3] for row in plain.fetchall()]
+        except sqlite3.Error as e:
+            return [f"(sin plan: {str(e)})"]
+        finally:
+            self._local.explaining = False
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import sqlite3
+from typing import Dict, List
+
+from src.utils.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# Columnas de texto repetitivas de detalle_atenciones y su tabla de catálogo
+DIMENSIONS = {
+    'nom_emp': 'dim_empresa',
+    'nom_cia': 'dim_compania',
+    'nom_ser': 'dim_servicio',
+    'facturador': 'dim_facturador',
+    'usu_sis': 'dim_usuario',
+    'producto': 'dim_producto',
+}
+
+CREATE_DIMENSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        nombre VARCHAR(255) NOT NULL UNIQUE
+    )
+"""
+
+
+def key_column(col: str) -> str:
+    """Columna de detalle_atenciones que guarda el id de la dimensión (nom_cia -> nom_cia_id)"""
+    return f"{col}_id"
+
+
+def stored_columns(columns: List[str]) -> List[str]:
+    """Reemplazar las columnas de dimensión por sus claves enteras"""
+    return [key_column(col) if col in DIMENSIONS else col for col in columns]
+
+
+def name_of(col: str, alias: str, schema: str = '') -> str:
+    """Subconsulta que devuelve el nombre de la dimensión para una fila de detalle_atenciones"""
+    prefix = f"{schema}." if schema else ''
+    return f"(SELECT nombre FROM {prefix}{DIMENSIONS[col]} WHERE id = {alias}.{key_column(col)})"
+
+
+class DimensionCache:
+    """
+    Diccionario nombre -> id por dimensión, válido durante una importación.
+
+    Cada catálogo se lee una sola vez; los nombres nuevos se insertan al encontrarlos y
+    quedan en el diccionario, por lo que cada valor distinto cuesta a lo sumo una consulta.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor):
+        self.cursor = cursor
+        self._ids: Dict[str, Dict[str, int]] = {}
+
+    def _load(self, col: str) -> Dict[str, int]:
+        if col not in self._ids:
+            self.cursor.execute(f"SELECT nombre, id FROM {DIMENSIONS[col]}")
+            self._ids[col] = dict(self.cursor.fetchall())
+        return self._ids[col]
+
+    def resolve(self, col: str, name: str) -> int:
+        """Id de un nombre en la dimensión, creándolo si no existe"""
+        ids = self._load(col)
+        if name not in ids:
+            self.cursor.execute(f"INSERT INTO {DIMENSIONS[col]} (nombre) VALUES (?)", (name,))
+            ids[name] = self.cursor.lastrowid
+        return ids[name]
+
+    def encode_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Agregar al DataFrame las columnas *_id resolviendo solo los valores distintos"""
+        for col in DIMENSIONS:
+            names = df[col].astype(str)
+            ids = {name: self.resolve(col, name) for name in names.unique()}
+            df[key_column(col)] = names.map(ids).astype(object)
+        return df
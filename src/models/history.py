@@ -0,0 +1,95 @@
+import sqlite3
+import logging
+from datetime import datetime
+from typing import List, Tuple
+
+# Origen de cada evento de seguimiento
+SOURCE_EXCEL = 'excel'
+SOURCE_PAYMENT = 'pago_automatico'
+SOURCE_ZERO_NEGATIVE = 'cero_negativo'
+SOURCE_MIGRATION = 'migracion'
+
+EVENT_COLUMNS = ['detalle_atencion_id', 'fecha', 'estado', 'observacion', 'accion', 'origen']
+
+CREATE_EVENTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS seguimiento_eventos (
+        id INTEGER PRIMARY KEY,
+        detalle_atencion_id INTEGER NOT NULL,
+        fecha TIMESTAMP NOT NULL,
+        estado VARCHAR(255) NULL,
+        observacion TEXT NULL,
+        accion VARCHAR(255) NULL,
+        origen VARCHAR(20) NOT NULL,
+        FOREIGN KEY (detalle_atencion_id) REFERENCES detalle_atenciones (id)
+    )
+"""
+
+# Historial de un detalle en orden de llegada
+CREATE_EVENTS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_eventos_detalle
+    ON seguimiento_eventos (detalle_atencion_id, id)
+"""
+
+INSERT_EVENT = f"""
+    INSERT INTO seguimiento_eventos ({', '.join(EVENT_COLUMNS)})
+    VALUES ({', '.join(['?'] * len(EVENT_COLUMNS))})
+"""
+
+# Al crear la tabla, el estado actual de cada seguimiento pasa a ser su primer evento
+SEED_EVENTS = f"""
+    INSERT INTO seguimiento_eventos ({', '.join(EVENT_COLUMNS)})
+    SELECT detalle_atencion_id, datetime('now', 'localtime'), estado_aseguradora, observaciones, acciones,
+        '{SOURCE_MIGRATION}'
+    FROM seguimiento_facturacion
+    ORDER BY id
+"""
+
+
+class EventLog:
+    """
+    Eventos de seguimiento acumulados durante una pasada (importación o actualización de estados).
+
+    Se escriben juntos con executemany al final, dentro de la misma transacción que los cambios
+    en seguimiento_facturacion. Todos los eventos de una pasada comparten la misma fecha.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.events: List[Tuple] = []
+
+    def add(self, detalle_id: int, estado: str | None, observacion: str | None, accion: str | None):
+        self.events.append((detalle_id, self.timestamp, estado, observacion, accion, self.source))
+
+    def flush(self, cursor: sqlite3.Cursor) -> int:
+        """Escribir los eventos pendientes. Devuelve cuántos se escribieron"""
+        written = len(self.events)
+        if written:
+            cursor.executemany(INSERT_EVENT, self.events)
+            self.events = []
+        return written
+
+
+class HistoryManager:
+    """
+    Historial de seguimiento de solo inserción (seguimiento_eventos).
+
+    seguimiento_facturacion guarda únicamente el estado actual de cada detalle; cada cambio de
+    estado, observación o acción se registra además como un evento con fecha y origen.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        """Crear la tabla de eventos; en bases existentes, sembrarla con el estado actual"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'seguimiento_eventos'")
+        is_new = cursor.fetchone() is None
+
+        cursor.execute(CREATE_EVENTS_TABLE)
+        cursor.execute(CREATE_EVENTS_INDEX)
+
+        if is_new:
+            cursor.execute(SEED_EVENTS)
+            if cursor.rowcount > 0:
+                self.logger.info(f"Historial de seguimiento iniciado con {cursor.rowcount} eventos")
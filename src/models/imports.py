@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Tuple
+
+JOB_RUNNING = 'en_curso'
+JOB_COMPLETED = 'completada'
+
+CREATE_IMPORTS_TABLE = """
+    CREATE TABLE IF NOT EXISTS importaciones (
+        id INTEGER PRIMARY KEY,
+        archivo TEXT NOT NULL,
+        hash CHAR(64) NOT NULL,
+        total_filas INTEGER NOT NULL,
+        ultima_fila INTEGER NOT NULL DEFAULT 0,     -- filas ya confirmadas (la siguiente es esta posición)
+        insertados INTEGER NOT NULL DEFAULT 0,
+        actualizados INTEGER NOT NULL DEFAULT 0,
+        errores INTEGER NOT NULL DEFAULT 0,
+        estado VARCHAR(20) NOT NULL,
+        iniciada TIMESTAMP NOT NULL,
+        actualizada TIMESTAMP NOT NULL
+    )
+"""
+
+CREATE_IMPORTS_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_importaciones_hash ON importaciones (hash, estado)
+"""
+
+SELECT_RESUMABLE = f"""
+    SELECT id, ultima_fila, insertados, actualizados, errores
+    FROM importaciones
+    WHERE hash = ? AND estado = '{JOB_RUNNING}' AND total_filas = ?
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(file_path: str) -> str:
+    """SHA-256 del contenido del archivo (identifica el mismo Excel aunque cambie de nombre)"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(file_path: str) -> Tuple[int, int]:
+    """Tamaño y fecha de modificación: detecta si el archivo cambió desde que se leyó"""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _now() -> str:
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ImportJob:
+    """Estado de una importación en curso: posición confirmada y contadores"""
+
+    def __init__(self, job_id: int, next_row: int = 0, inserted: int = 0, updated: int = 0,
+                 errors: int = 0):
+        self.id = job_id
+        self.next_row = next_row
+        self.inserted = inserted
+        self.updated = updated
+        self.errors = errors
+        self.resumed_from = next_row
+
+
+class PreparedImport:
+    """
+    Excel principal ya leído, validado y limpiado al seleccionarlo.
+
+    La importación lo reutiliza y pasa directo a la escritura en la base, siempre que el
+    archivo no haya cambiado desde la lectura (misma ruta, tamaño y fecha de modificación).
+    data tiene solo las filas válidas; las rechazadas por la validación están en rejects.
+    """
+
+    def __init__(self, file_path: str, signature: Tuple[int, int], content_hash: str, data, preview: Dict[str, int],
+                 phases: Dict[str, Dict] | None = None, rejects=None):
+        self.file_path = Path(file_path)
+        self.signature = signature
+        self.content_hash = content_hash
+        self.data = data
+        self.preview = preview
+        self.rejects = rejects
+        self.phases = phases or {}  # Tiempos de lectura, validación y limpieza (métricas)
+
+    def matches(self, file_path: str) -> bool:
+        try:
+            return Path(file_path) == self.file_path and file_signature(file_path) == self.signature
+        except OSError:
+            return False
+
+
+class ImportJobManager:
+    """
+    Registro persistente de importaciones (tabla importaciones) para reanudarlas.
+
+    process_excel confirma la importación por lotes; cada confirmación guarda en la misma
+    transacción la última fila procesada y los contadores. Si la aplicación se cierra a mitad,
+    la siguiente importación del mismo archivo (mismo hash) continúa desde ese punto.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        cursor.execute(CREATE_IMPORTS_TABLE)
+        cursor.execute(CREATE_IMPORTS_INDEX)
+
+    def start_or_resume(self, cursor: sqlite3.Cursor, file_path: str, content_hash: str,
+                        total_rows: int) -> ImportJob:
+        """Reanudar la importación pendiente del mismo archivo o registrar una nueva"""
+        cursor.execute(SELECT_RESUMABLE, (content_hash, total_rows))
+        row = cursor.fetchone()
+        if row:
+            job = ImportJob(*row)
+            self.logger.info(
+                f"Reanudando importación {job.id} de {Path(file_path).name} desde la fila {job.next_row}"
+            )
+            return job
+
+        now = _now()
+        cursor.execute(
+            "INSERT INTO importaciones (archivo, hash, total_filas, estado, iniciada, actualizada) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (str(file_path), content_hash, total_rows, JOB_RUNNING, now, now)
+        )
+        return ImportJob(cursor.lastrowid)
+
+    def checkpoint(self, cursor: sqlite3.Cursor, job: ImportJob):
+        """Guardar la posición y los contadores (llamar dentro de la transacción del lote)"""
+        cursor.execute(
+            "UPDATE importaciones SET ultima_fila = ?, insertados = ?, actualizados = ?, errores = ?, "
+            "actualizada = ? WHERE id = ?",
+            (job.next_row, job.inserted, job.updated, job.errors, _now(), job.id)
+        )
+
+    def complete(self, cursor: sqlite3.Cursor, job: ImportJob):
+        self.checkpoint(cursor, job)
+        cursor.execute("UPDATE importaciones SET estado = ? WHERE id = ?", (JOB_COMPLETED, job.id))
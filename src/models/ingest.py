@@ -0,0 +1,80 @@
+import sqlite3
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+# Tipo de archivo según sus encabezados
+KIND_PRIMARY = 'principal'
+KIND_SEGUIMIENTO = 'seguimiento'
+
+# Resultado de la ingesta de un archivo
+INGEST_OK = 'ok'
+INGEST_ERROR = 'error'          # La importación falló; se reintenta hasta max_attempts
+INGEST_REJECTED = 'rechazado'   # Encabezados no reconocidos; no se reintenta
+
+CREATE_INGEST_TABLE = """
+    CREATE TABLE IF NOT EXISTS ingesta_archivos (
+        hash CHAR(64) PRIMARY KEY,
+        archivo TEXT NOT NULL,
+        tipo VARCHAR(20) NULL,
+        estado VARCHAR(20) NOT NULL,
+        intentos INTEGER NOT NULL DEFAULT 1,
+        mensaje TEXT NULL,
+        procesado TIMESTAMP NOT NULL
+    ) WITHOUT ROWID
+"""
+
+UPSERT_INGEST = """
+    INSERT INTO ingesta_archivos (hash, archivo, tipo, estado, mensaje, procesado)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT (hash) DO UPDATE SET
+        archivo = excluded.archivo,
+        tipo = excluded.tipo,
+        estado = excluded.estado,
+        intentos = intentos + 1,
+        mensaje = excluded.mensaje,
+        procesado = excluded.procesado
+"""
+
+
+def detect_kind(columns: List[str], required_columns: List[str], seguimiento_columns: Dict[str, str]) -> str | None:
+    """Tipo de Excel según sus encabezados: principal, seguimiento o None si no se reconoce"""
+    headers = {str(col).strip() for col in columns}
+    if all(col in headers for col in required_columns):
+        return KIND_PRIMARY
+    if all(col in headers for col in seguimiento_columns):
+        return KIND_SEGUIMIENTO
+    return None
+
+
+class IngestManager:
+    """
+    Registro de archivos ingeridos desde las carpetas vigiladas (tabla ingesta_archivos).
+
+    La clave es la huella (SHA-256) del contenido: un archivo se importa una sola vez aunque se
+    copie de nuevo con otro nombre. No se borra al limpiar la base, para que los archivos que
+    siguen en la carpeta no se vuelvan a importar.
+    """
+
+    def __init__(self, logger: logging.Logger, max_attempts: int):
+        self.logger = logger
+        self.max_attempts = max_attempts
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        cursor.execute(CREATE_INGEST_TABLE)
+
+    def should_process(self, cursor: sqlite3.Cursor, content_hash: str) -> bool:
+        """Si el archivo es nuevo o falló menos de max_attempts veces"""
+        cursor.execute("SELECT estado, intentos FROM ingesta_archivos WHERE hash = ?", (content_hash,))
+        row = cursor.fetchone()
+        if row is None:
+            return True
+        estado, intentos = row
+        return estado == INGEST_ERROR and intentos < self.max_attempts
+
+    def record(self, cursor: sqlite3.Cursor, content_hash: str, file_name: str, kind: str | None,
+               status: str, message: str):
+        cursor.execute(
+            UPSERT_INGEST,
+            (content_hash, file_name, kind, status, message, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        )
@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import logging
+import time
+from pathlib import Path
+from typing import Dict
+
+AUTO_VACUUM_INCREMENTAL = 2
+
+
+def database_size(db_path: Path) -> int:
+    """Tamaño en bytes del archivo de base de datos más su WAL"""
+    total = 0
+    for path in (Path(db_path), Path(f"{db_path}-wal")):
+        if path.exists():
+            total += os.path.getsize(path)
+    return total
+
+
+def format_bytes(size: float) -> str:
+    """Formatear un tamaño en bytes de forma legible"""
+    for unit in ('B', 'KB', 'MB'):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class MaintenanceManager:
+    """
+    Rutina de mantenimiento de SQLite: PRAGMA optimize, ANALYZE, vacuum incremental y checkpoint WAL.
+
+    Cada ejecución devuelve un reporte con el tiempo empleado y el espacio recuperado.
+    """
+
+    def __init__(self, db_path: Path, logger: logging.Logger, config: Dict):
+        self.db_path = db_path
+        self.logger = logger
+        self.config = config
+
+    def run(self, conn: sqlite3.Connection, full: bool = False) -> Dict:
+        """
+        Ejecutar el mantenimiento sobre una conexión abierta
+
+        Args:
+            conn: Conexión a la base de datos (sin transacción abierta)
+            full: Forzar ANALYZE completo y VACUUM aunque la fragmentación sea baja
+
+        Returns:
+            Dict: pasos ejecutados, duración en segundos y bytes recuperados
+        """
+        started = time.perf_counter()
+        size_before = database_size(self.db_path)
+        cursor = conn.cursor()
+        steps = []
+
+        free_pages, total_pages = self._free_pages(cursor)
+        cursor.execute("PRAGMA auto_vacuum")
+        auto_vacuum = cursor.fetchone()[0]
+
+        if full or not self._has_statistics(cursor):
+            cursor.execute("ANALYZE")
+            steps.append("ANALYZE")
+
+        fragmented = total_pages and free_pages / total_pages >= self.config['vacuum_free_ratio']
+        if auto_vacuum != AUTO_VACUUM_INCREMENTAL and (full or fragmented):
+            # VACUUM completo: convierte además la base al modo de vacuum incremental
+            cursor.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            cursor.execute("VACUUM")
+            steps.append("VACUUM")
+        elif auto_vacuum == AUTO_VACUUM_INCREMENTAL and free_pages:
+            # executescript avanza la sentencia hasta el final (execute solo libera una página)
+            cursor.executescript(f"PRAGMA incremental_vacuum({free_pages});")
+            steps.append(f"incremental_vacuum({free_pages})")
+
+        cursor.execute("PRAGMA optimize")
+        steps.append("optimize")
+
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cursor.fetchall()
+        steps.append("wal_checkpoint")
+
+        report = {
+            'steps': steps,
+            'duration': time.perf_counter() - started,
+            'size_before': size_before,
+            'size_after': database_size(self.db_path),
+            'free_pages_before': free_pages,
+        }
+        report['reclaimed'] = max(report['size_before'] - report['size_after'], 0)
+        self.logger.info(
+            f"Mantenimiento ({', '.join(steps)}) en {report['duration']:.2f}s, "
+            f"recuperado {format_bytes(report['reclaimed'])}"
+        )
+        return report
+
+    def reclaim(self, conn: sqlite3.Connection):
+        """Devolver al sistema las páginas libres (tras eliminar tablas completas)"""
+        cursor = conn.cursor()
+        cursor.execute("PRAGMA auto_vacuum")
+        if cursor.fetchone()[0] == AUTO_VACUUM_INCREMENTAL:
+            cursor.executescript("PRAGMA incremental_vacuum;")
+        else:
+            # La base queda casi vacía, por lo que el VACUUM es rápido
+            cursor.execute(f"PRAGMA auto_vacuum = {AUTO_VACUUM_INCREMENTAL}")
+            cursor.execute("VACUUM")
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        cursor.fetchall()
+
+    def _free_pages(self, cursor: sqlite3.Cursor):
+        cursor.execute("PRAGMA freelist_count")
+        free_pages = cursor.fetchone()[0]
+        cursor.execute("PRAGMA page_count")
+        return free_pages, cursor.fetchone()[0]
+
+    def _has_statistics(self, cursor: sqlite3.Cursor) -> bool:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        return cursor.fetchone() is not None
@@ -0,0 +1,234 @@
+"""
+Tiempos por fase de importaciones y exportaciones.
+
+Cada operación (importar el Excel principal o el de seguimiento, exportar) registra, por fase,
+el tiempo de reloj, las filas procesadas (y con ellas filas/s) y el pico de memoria. Al
+terminar se agrega una línea JSON a logs/metricas.jsonl y, si METRICS_CONFIG['show_in_summary'],
+una tabla de fases al mensaje final. En modo diagnóstico SQL la línea incluye además el perfil
+SQL de la operación (ver diagnostics.py).
+
+La memoria se mide con tracemalloc si está activo (METRICS_CONFIG['trace_memory']: pico de la
+fase, solo memoria de Python, con un costo notable) o, si no, como el pico de memoria residente
+del proceso desde que arrancó, no de la fase: el informe y el JSON lo indican como pico del
+proceso ('memoria': 'rss_pico_proceso'). Las fases que corren en un proceso de trabajo
+(lectura, limpieza, generación del XLSX) se miden en ese proceso y se devuelven junto con su
+resultado.
+"""
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator
+
+from src.models.diagnostics import SqlProfile, SqlProfiler
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+MB = 1024 * 1024
+
+# Origen de la medida de memoria de una fase (campo 'memoria')
+MEMORY_TRACEMALLOC = 'tracemalloc'        # Pico de la fase (solo memoria de Python)
+MEMORY_PROCESS_PEAK = 'rss_pico_proceso'  # Pico residente del proceso desde que arrancó
+
+PHASE_LABELS = {
+    'lectura': 'Lectura',
+    'validacion': 'Validación',
+    'limpieza': 'Limpieza',
+    'escritura': 'Escritura',
+    'pagos': 'Estados de pago',
+    'cero_negativo': 'Cero o negativo',
+    'commit': 'Confirmación',
+    'consulta': 'Consulta',
+    'transformacion': 'Transformación',
+    'formato': 'Formato',
+}
+
+
+def _windows_peak_working_set() -> int | None:
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                'PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage', 'QuotaPagedPoolUsage',
+                'QuotaPeakNonPagedPoolUsage', 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage'
+            )
+        ]
+
+    counters = ProcessMemoryCounters()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        return None
+    return counters.PeakWorkingSetSize
+
+
+def peak_rss() -> int | None:
+    """Pico de memoria residente del proceso hasta ahora, en bytes (None si no se puede medir)"""
+    try:
+        if resource is not None:
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if sys.platform == 'darwin' else peak * 1024 # Linux informa KiB
+        if sys.platform == 'win32':
+            return _windows_peak_working_set()
+    except Exception:
+        pass
+    return None
+
+
+class PhaseTimer:
+    """
+    Tiempos acumulados por fase. Una fase que se repite (p. ej. la escritura de cada lote)
+    suma sus tiempos y filas. Las fases no se anidan.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, Dict] = {}
+        self._started: Dict[str, float] = {}
+
+    def start(self, name: str):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._started[name] = time.perf_counter()
+
+    def stop(self, name: str, rows: int | None = None):
+        seconds = time.perf_counter() - self._started.pop(name)
+        if tracemalloc.is_tracing():
+            memory, source = tracemalloc.get_traced_memory()[1], MEMORY_TRACEMALLOC
+        else:
+            memory, source = peak_rss(), MEMORY_PROCESS_PEAK
+        self.add({name: {'segundos': seconds, 'filas': rows, 'memoria_pico': memory, 'memoria': source}})
+
+    @contextmanager
+    def phase(self, name: str, rows: int | None = None) -> Iterator[None]:
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name, rows)
+
+    def add(self, phases: Dict[str, Dict] | None):
+        """Incorporar fases medidas en otro lugar (p. ej. devueltas por un proceso de trabajo)"""
+        for name, values in (phases or {}).items():
+            entry = self.phases.setdefault(name, {'segundos': 0.0, 'filas': None,
+                                                  'memoria_pico': None, 'memoria': values['memoria']})
+            entry['segundos'] += values['segundos']
+            if values['filas'] is not None:
+                entry['filas'] = (entry['filas'] or 0) + values['filas']
+            if values['memoria_pico'] is not None:
+                entry['memoria_pico'] = max(entry['memoria_pico'] or 0, values['memoria_pico'])
+
+
+class OperationMetrics(PhaseTimer):
+    """Fases de una operación (importación o exportación) y su resultado"""
+
+    def __init__(self, operation: str, file_path: str | Path | None = None):
+        super().__init__()
+        self.operation = operation
+        self.file_path = file_path
+        self.rows: int | None = None
+        self.success = False
+        self.sql: SqlProfile | None = None
+        self.started_at = datetime.now()
+        self._started_clock = time.perf_counter()
+
+    def to_record(self) -> Dict:
+        """Línea del archivo de métricas"""
+        phases = []
+        for name, values in self.phases.items():
+            phases.append({
+                'fase': name,
+                'segundos': round(values['segundos'], 4),
+                'filas': values['filas'],
+                'filas_por_segundo': _rate(values['filas'], values['segundos']),
+                'memoria_pico_mb': _megabytes(values['memoria_pico']),
+                'memoria': values['memoria'],
+            })
+        seconds = time.perf_counter() - self._started_clock
+        measured = [values for values in self.phases.values() if values['memoria_pico'] is not None]
+        peak = max(measured, key=lambda values: values['memoria_pico']) if measured else None
+        return {
+            'fecha': self.started_at.isoformat(timespec='seconds'),
+            'operacion': self.operation,
+            'archivo': str(self.file_path) if self.file_path else None,
+            'exito': self.success,
+            'filas': self.rows,
+            'segundos': round(seconds, 4),
+            'filas_por_segundo': _rate(self.rows, seconds),
+            'memoria_pico_mb': _megabytes(peak['memoria_pico']) if peak else None,
+            'memoria': peak['memoria'] if peak else None,
+            'fases': phases,
+        }
+
+    def report(self) -> str:
+        """Tabla de fases para el mensaje final"""
+        lines = ["\n⏱️ Tiempos por fase:"]
+        for name, values in self.phases.items():
+            line = f"  {PHASE_LABELS.get(name, name)}: {values['segundos']:.2f}s"
+            rate = _rate(values['filas'], values['segundos'])
+            if rate:
+                line += f" · {rate:,.0f} filas/s"
+            if values['memoria_pico'] is not None:
+                label = "pico del proceso " if values['memoria'] == MEMORY_PROCESS_PEAK else ""
+                line += f" · {label}{_megabytes(values['memoria_pico']):,.0f} MB"
+            lines.append(line)
+        return '\n'.join(lines)
+
+
+def _rate(rows: int | None, seconds: float) -> float | None:
+    return round(rows / seconds, 1) if rows and seconds > 0 else None
+
+
+def _megabytes(value: int | None) -> float | None:
+    return round(value / MB, 1) if value is not None else None
+
+
+class MetricsManager:
+    """Crea las métricas de cada operación y las agrega al archivo JSON-lines"""
+
+    def __init__(self, config: Dict, metrics_path: Path, logger: logging.Logger,
+                 profiler: SqlProfiler | None = None):
+        self.config = config
+        self.metrics_path = metrics_path
+        self.logger = logger
+        self.profiler = profiler
+        self._lock = threading.Lock()
+
+    def start(self, operation: str, file_path: str | Path | None = None) -> OperationMetrics:
+        if self.config['enabled'] and self.config['trace_memory'] and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        metrics = OperationMetrics(operation, file_path)
+        if self.profiler is not None:
+            metrics.sql = self.profiler.begin(operation)
+        return metrics
+
+    def report(self, metrics: OperationMetrics) -> str:
+        """Texto a añadir al mensaje final ('' si no se muestran los tiempos)"""
+        return metrics.report() if self.config['enabled'] and self.config['show_in_summary'] else ''
+
+    def record(self, metrics: OperationMetrics):
+        """Agregar la operación al archivo de métricas (nunca interrumpe la operación)"""
+        sql = self.profiler.end(metrics.sql) if metrics.sql is not None else None
+        if not self.config['enabled']:
+            return
+        record = metrics.to_record()
+        if sql is not None:
+            record['sql'] = sql
+        self.logger.info(f"Métricas de {record['operacion']}: {record['segundos']:.2f}s, "
+                         f"{len(record['fases'])} fases, {record['filas'] or 0} filas")
+        try:
+            with self._lock:
+                self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.metrics_path, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.error(f"No se pudo escribir el archivo de métricas: {str(e)}")
@@ -0,0 +1,394 @@
+"""
+Etapas de CPU (lectura y limpieza de Excel, generación del XLSX con formato) que pueden
+ejecutarse en un proceso aparte.
+
+pd.read_excel y el formato celda a celda de openpyxl son Python puro y retienen el GIL: en un
+hilo congelan el bucle de Tk y la barra de progreso. Ejecutadas en un ProcessPoolExecutor, la
+interfaz y el hilo que escribe en SQLite siguen libres; el progreso vuelve por una cola de
+multiprocessing (una tubería) y un hilo despachador lo entrega al callback de la tarea.
+
+Las etapas son funciones de módulo (se envían por pickle) que reciben la configuración que
+necesitan y un callable progress(porcentaje, mensaje) como último argumento. Las que alimentan
+las métricas de la operación devuelven además los tiempos de sus fases (PhaseTimer.phases),
+medidos en el proceso que las ejecutó.
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from src.models.dates import DateNormalizer
+from src.models.metrics import PhaseTimer
+from src.models.storage import DATE_COLUMNS, amounts_to_cents
+from src.models.validation import RowValidator, collapse_duplicates
+from src.utils.constants import Messages
+from src.utils.lazy import lazy_import, is_available
+
+pd = lazy_import('pandas')
+
+ProgressCallback = Callable[..., None]
+
+# Cola de progreso del proceso de trabajo (la fija el inicializador del pool)
+_progress_queue = None
+
+
+# --- Etapas ---------------------------------------------------------------
+
+def read_primary_frame(file_path: str | Path, required_columns: List[str]) -> Tuple[pd.DataFrame, List[str]]:
+    """Leer el Excel principal. Devuelve el DataFrame y las columnas requeridas que faltan"""
+    df = pd.read_excel(file_path, dtype={'num_doc': str, 'nh_pac': str, 'num_pag': str})
+    missing_columns = [col for col in required_columns if col not in df.columns]
+    return df, missing_columns
+
+
+def clean_primary_frame(df: pd.DataFrame, required_columns: List[str],
+                        dates: DateNormalizer | None = None) -> pd.DataFrame:
+    """
+    Limpiar y preparar datos del Excel principal (formato de almacenamiento). dates acumula
+    las fechas no reconocidas y el formato de fecha del archivo
+    """
+    dates = dates or DateNormalizer()
+    df_clean = df[required_columns].copy()
+    df_clean = df_clean.fillna('')
+
+    # Formato de almacenamiento v2: días desde 1970-01-01 (None si falta la fecha)
+    for col in DATE_COLUMNS:
+        try:
+            df_clean[col] = dates.to_days(df_clean[col], col)
+        except Exception: # Catch any parsing error
+            df_clean[col] = None
+
+    text_fields = ['num_doc', 'nh_pac', 'num_pag']
+    for col in text_fields:
+        df_clean[col] = df_clean[col].apply(lambda x: str(x).strip() if pd.notna(x) and str(x).strip().lower() != 'nan' else '')
+
+    # Montos en céntimos enteros
+    try:
+        df_clean['tot_doc'] = amounts_to_cents(df_clean['tot_doc'])
+    except Exception:
+        df_clean['tot_doc'] = 0
+
+    return df_clean
+
+
+def validate_primary_frame(df: pd.DataFrame, df_clean: pd.DataFrame, dates: DateNormalizer,
+                           max_doc_length: int) -> RowValidator:
+    """Reglas del Excel principal: num_doc vacío o largo, fechas no reconocidas, monto no numérico"""
+    validator = RowValidator(df_clean.index)
+    validator.check_documents(df_clean['num_doc'], max_doc_length)
+    validator.check_dates(dates.invalid_rows)
+    validator.check_amounts(df['tot_doc'])
+    return validator
+
+
+def summarize_primary_frame(df_clean: pd.DataFrame, rejects: pd.DataFrame, collapsed: int) -> Dict[str, int]:
+    """Vista previa: filas leídas, num_doc repetidos combinados y filas rechazadas"""
+    return {
+        'filas': len(df_clean) + collapsed + len(rejects),
+        'duplicados': collapsed,
+        'rechazos': len(rejects),
+    }
+
+
+def prepare_primary_excel(file_path: str | Path, required_columns: List[str], validation_config: Dict,
+                          progress: ProgressCallback) -> Tuple[pd.DataFrame | None, List[str], Dict[str, int],
+                                                               pd.DataFrame | None, Dict[str, Dict]]:
+    """
+    Leer, limpiar, validar y resumir el Excel principal:
+    (filas válidas, una por num_doc; columnas faltantes; vista previa; filas rechazadas; fases).
+    Si faltan columnas los datos y los rechazos son None y la vista previa está vacía
+    """
+    timer = PhaseTimer()
+    progress(0, Messages.READING_FILE)
+    timer.start('lectura')
+    df, missing_columns = read_primary_frame(file_path, required_columns)
+    timer.stop('lectura', len(df))
+    if missing_columns:
+        return None, missing_columns, {}, None, timer.phases
+
+    progress(0, Messages.CLEANING_DATA)
+    dates = DateNormalizer()
+    with timer.phase('limpieza', len(df)):
+        df_clean = clean_primary_frame(df, required_columns, dates)
+    with timer.phase('validacion', len(df_clean)):
+        validator = validate_primary_frame(df, df_clean, dates, validation_config['max_num_doc_length'])
+        df_clean, rejects = validator.split(df_clean, df[required_columns])
+        df_clean, collapsed = collapse_duplicates(df_clean, validation_config['keep_duplicate'])
+        preview = summarize_primary_frame(df_clean, rejects, collapsed)
+    return df_clean, [], preview, rejects, timer.phases
+
+
+def load_seguimiento_excel(file_path: str | Path, seguimiento_columns: Dict[str, str], validation_config: Dict,
+                           progress: ProgressCallback
+                           ) -> Tuple[pd.DataFrame | None, List[str], pd.DataFrame | None, Dict[str, Dict]]:
+    """
+    Leer, limpiar y validar el Excel de seguimiento (encabezados amigables → columnas de la base).
+    Devuelve (filas válidas, columnas faltantes, filas rechazadas, fases); si faltan columnas los
+    datos y los rechazos son None. Los num_doc inexistentes en la base se validan después, en la
+    base (ver DatabaseManager.update_seguimiento_from_excel)
+    """
+    timer = PhaseTimer()
+    dates = DateNormalizer()
+    progress(0, Messages.READING_FILE)
+    timer.start('lectura')
+    # Se especifican tipos de datos para columnas críticas para evitar conversiones automáticas incorrectas
+    df = pd.read_excel(file_path, dtype={'Número de Documento': str, 'Historia Clínica': str})
+    timer.stop('lectura', len(df))
+
+    with timer.phase('validacion', len(df)):
+        missing_columns = [col for col in seguimiento_columns.keys() if col not in df.columns]
+    if missing_columns:
+        return None, missing_columns, None, timer.phases
+
+    progress(0, Messages.CLEANING_DATA)
+    timer.start('limpieza')
+    # Seleccionar solo las columnas necesarias y renombrarlas a los nombres de la base de datos
+    df_to_process = df[list(seguimiento_columns.keys())].copy()
+    df_to_process.rename(columns=seguimiento_columns, inplace=True)
+
+    # Limpiar datos: convertir NaN a cadenas vacías para evitar problemas con SQLite
+    df_clean = df_to_process.fillna('')
+
+    # Convertir y formatear columnas de fecha al formato estándar YYYY-MM-DD
+    for col in ['fecha_envio', 'fecha_recepcion']:
+        if col in df_clean.columns:
+            try:
+                df_clean[col] = dates.to_text(df_clean[col], col) # Fechas vacías como cadenas vacías
+            except Exception:
+                df_clean[col] = ''
+    timer.stop('limpieza', len(df_clean))
+
+    with timer.phase('validacion', len(df_clean)):
+        validator = RowValidator(df_clean.index)
+        validator.check_documents(df_clean['num_doc'], validation_config['max_num_doc_length'])
+        validator.check_dates(dates.invalid_rows)
+        df_clean, rejects = validator.split(df_clean, df[list(seguimiento_columns.keys())])
+    return df_clean, [], rejects, timer.phases
+
+
+def write_formatted_excel(df: pd.DataFrame, export_path: str | Path, column_mapping: Dict[str, str],
+                          sheet_name: str, excel_config: Dict, progress: ProgressCallback) -> Dict[str, Dict]:
+    """
+    Escribir el DataFrame en un XLSX con encabezados, anchos y formatos de fecha y moneda.
+    Devuelve los tiempos de las fases transformacion, escritura y formato
+    """
+    timer = PhaseTimer()
+    rows = len(df)
+    progress(0, Messages.WRITING_EXCEL)
+    timer.start('transformacion')
+    df = df.rename(columns=column_mapping)
+
+    # Convertir campos de fecha (los de la base ya vienen como fecha; los de texto, una vez por valor distinto)
+    date_columns = excel_config['date_columns']
+    dates = DateNormalizer()
+    for col in date_columns:
+        if col in df.columns:
+            df[col] = dates.parse(df[col], col)
+
+    # Convertir campos monetarios
+    money_columns = excel_config['money_columns']
+    for col in money_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    timer.stop('transformacion', rows)
+
+    if not is_available('openpyxl'):
+        with timer.phase('escritura', rows):
+            df.to_excel(export_path, index=False, sheet_name=sheet_name)
+        progress(100, Messages.WRITING_EXCEL)
+        return timer.phases
+
+    from openpyxl.styles import Font, PatternFill, Alignment, NamedStyle
+    from openpyxl.utils import get_column_letter
+
+    # Crear el archivo Excel con formato personalizado usando openpyxl. El writer se cierra (y
+    # guarda) explícitamente para contar el guardado como escritura y no como formato
+    writer = pd.ExcelWriter(export_path, engine='openpyxl')
+    try:
+        with timer.phase('escritura', rows):
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+        # Volcar las filas es ~1/3 del trabajo; el formato por columna, la mitad; guardar, el resto
+        progress(30, Messages.FORMATTING_EXCEL)
+        timer.start('formato')
+
+        workbook = writer.book
+        worksheet = writer.sheets[sheet_name]
+
+        header_style_config = excel_config['styles']['header']
+        header_font = Font(**header_style_config['font'])
+        header_fill = PatternFill(start_color=header_style_config['fill']['color'],
+                                  end_color=header_style_config['fill']['color'],
+                                  fill_type='solid') # Corrected fill
+        header_alignment = Alignment(**header_style_config['alignment'])
+
+        date_style = NamedStyle(name='date_style', number_format=excel_config['styles']['date_format'])
+        currency_style = NamedStyle(name='currency_style', number_format=excel_config['styles']['currency_format'])
+
+        if 'date_style' not in workbook.named_styles:
+            workbook.add_named_style(date_style)
+        if 'currency_style' not in workbook.named_styles:
+            workbook.add_named_style(currency_style)
+
+        for col_num, column_title in enumerate(df.columns, 1):
+            cell = worksheet.cell(row=1, column=col_num)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+
+        total_columns = len(df.columns)
+        for col_num, column_title in enumerate(df.columns, 1):
+            column_letter = get_column_letter(col_num)
+            max_length = max(
+                len(str(column_title)),
+                df[column_title].astype(str).str.len().max() if not df.empty else 0
+            )
+            adjusted_width = min(max(max_length + 2, 10), 50) # Basic auto-adjust
+            worksheet.column_dimensions[column_letter].width = adjusted_width
+
+            if column_title in date_columns:
+                for row_idx in range(2, len(df) + 2):
+                    cell = worksheet.cell(row=row_idx, column=col_num)
+                    if cell.value is not None: cell.style = date_style
+            elif column_title in money_columns:
+                for row_idx in range(2, len(df) + 2):
+                    cell = worksheet.cell(row=row_idx, column=col_num)
+                    if cell.value is not None: cell.style = currency_style
+            progress(30 + 50 * col_num / total_columns, Messages.FORMATTING_EXCEL)
+
+        worksheet.auto_filter.ref = worksheet.dimensions
+        worksheet.freeze_panes = 'A2'
+        timer.stop('formato', rows)
+        progress(80, Messages.SAVING_EXCEL)
+    finally:
+        with timer.phase('escritura'):
+            writer.close()
+    progress(100, Messages.SAVING_EXCEL)
+    return timer.phases
+
+
+# --- Proceso de trabajo ---------------------------------------------------
+
+def _init_worker(progress_queue):
+    global _progress_queue
+    _progress_queue = progress_queue
+
+
+def _run_task(task_id: int, func: Callable, args: tuple):
+    """Ejecutar una etapa en el proceso de trabajo enviando su progreso por la cola"""
+    last = [None]
+
+    def progress(progress_percentage: float, message: str = ""):
+        # Solo cambios de porcentaje entero o de mensaje: no saturar la tubería
+        key = (int(progress_percentage), message)
+        if key != last[0]:
+            last[0] = key
+            _progress_queue.put((task_id, progress_percentage, message))
+
+    return func(*args, progress)
+
+
+class ProcessOffloader:
+    """
+    Ejecuta etapas de CPU en un ProcessPoolExecutor creado al primer uso.
+
+    run() bloquea el hilo que la llama (el de la tarea) hasta que la etapa termina y reenvía el
+    progreso a su callback desde un hilo despachador. Si los procesos están desactivados, el
+    pool no puede crearse o se rompe, la etapa se ejecuta en el propio hilo.
+    """
+
+    def __init__(self, config: Dict, logger: logging.Logger):
+        self.config = config
+        self.enabled = config['use_processes']
+        self.max_workers = config['max_workers']
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._callbacks: Dict[int, ProgressCallback] = {}
+        self._executor: ProcessPoolExecutor | None = None
+        self._queue = None
+
+    def run(self, func: Callable, *args, progress_callback: ProgressCallback | None = None,
+            inline: bool = False):
+        """
+        Ejecutar func(*args, progress) en un proceso de trabajo y devolver su resultado.
+        inline=True la ejecuta en el hilo actual (trabajos pequeños)
+        """
+        progress_callback = progress_callback or _no_progress
+        executor = None if inline else self._get_executor()
+        if executor is None:
+            return func(*args, progress_callback)
+
+        task_id = next(self._ids)
+        with self._lock:
+            self._callbacks[task_id] = progress_callback
+        try:
+            return executor.submit(_run_task, task_id, func, args).result()
+        except BrokenProcessPool as e:
+            # Proceso de trabajo caído (p. ej. sin memoria): repetir la etapa en este hilo
+            self.logger.warning(f"Proceso de trabajo interrumpido, se continúa en el hilo actual: {str(e)}")
+            self._discard_executor(executor)
+            return func(*args, progress_callback)
+        finally:
+            with self._lock:
+                self._callbacks.pop(task_id, None)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._queue.put(None)  # Detener el despachador
+
+    def _get_executor(self) -> ProcessPoolExecutor | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            if self._executor is None:
+                try:
+                    # spawn en todas las plataformas: es el único modo en Windows y evita heredar
+                    # hilos y conexiones SQLite abiertas del proceso principal
+                    context = multiprocessing.get_context('spawn')
+                    self._queue = context.Queue()
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers, mp_context=context,
+                        initializer=_init_worker, initargs=(self._queue,)
+                    )
+                    threading.Thread(target=self._dispatch, args=(self._queue,),
+                                     name='progreso-procesos', daemon=True).start()
+                except Exception as e:
+                    self.logger.warning(f"No se pudo crear el pool de procesos, se usará el hilo actual: {str(e)}")
+                    self.enabled = False
+                    return None
+            return self._executor
+
+    def _discard_executor(self, executor: ProcessPoolExecutor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._queue.put(None)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _dispatch(self, progress_queue):
+        """Entregar el progreso de los procesos de trabajo al callback de cada etapa"""
+        while True:
+            item = progress_queue.get()
+            if item is None:
+                return
+            task_id, progress_percentage, message = item
+            with self._lock:
+                callback = self._callbacks.get(task_id)
+            if callback is not None:
+                try:
+                    callback(progress_percentage, message)
+                except Exception as e:
+                    self.logger.debug(f"Error en callback de progreso: {str(e)}")
+
+
+def _no_progress(progress_percentage: float, message: str = ""):
+    pass
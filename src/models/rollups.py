@@ -0,0 +1,192 @@
+import sqlite3
+import logging
+
+from src.models.stats import PENDING_CONDITION
+
+# Periodo (año-mes) de la fecha de factura (días desde 1970-01-01); '' cuando no hay fecha.
+# {p} es el prefijo de alias ('d.' o '')
+PERIOD_EXPRESSION = "COALESCE(strftime('%Y-%m', {p}fec_fac * 86400, 'unixepoch'), '')"
+PAID_CONDITION = "({p}.num_pag IS NOT NULL AND {p}.num_pag != '' AND {p}.num_pag != 'nan')"
+
+NO_STATUS_LABEL = "Sin seguimiento"
+
+CREATE_ROLLUP_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS rollup_facturacion (
+        periodo VARCHAR(7) NOT NULL,
+        nom_cia_id INTEGER NOT NULL,
+        estado VARCHAR(255) NOT NULL,
+        registros INTEGER NOT NULL DEFAULT 0,
+        monto_facturado INTEGER NOT NULL DEFAULT 0,
+        monto_pagado INTEGER NOT NULL DEFAULT 0,
+        monto_pendiente INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (periodo, nom_cia_id, estado)
+    ) WITHOUT ROWID -- montos en céntimos
+    """,
+    # Claves (periodo, compañía) modificadas desde el último refresco
+    """
+    CREATE TABLE IF NOT EXISTS rollup_pendientes (
+        periodo VARCHAR(7) NOT NULL,
+        nom_cia_id INTEGER NOT NULL,
+        PRIMARY KEY (periodo, nom_cia_id)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE INDEX IF NOT EXISTS idx_detalle_cia_periodo
+    ON detalle_atenciones (nom_cia_id, {PERIOD_EXPRESSION.format(p='')})
+    """,
+]
+
+
+def _mark_detalle(alias: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO rollup_pendientes (periodo, nom_cia_id)
+        VALUES ({PERIOD_EXPRESSION.format(p=alias + '.')}, {alias}.nom_cia_id);
+    """
+
+
+def _mark_seguimiento(alias: str) -> str:
+    return f"""
+        INSERT OR IGNORE INTO rollup_pendientes (periodo, nom_cia_id)
+        SELECT {PERIOD_EXPRESSION.format(p='d.')}, d.nom_cia_id
+        FROM detalle_atenciones d WHERE d.id = {alias}.detalle_atencion_id;
+    """
+
+
+ROLLUP_TRIGGERS = {
+    'trg_rollup_detalle_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_insert
+        AFTER INSERT ON detalle_atenciones
+        BEGIN {_mark_detalle('NEW')} END
+    """,
+    'trg_rollup_detalle_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_delete
+        AFTER DELETE ON detalle_atenciones
+        BEGIN {_mark_detalle('OLD')} END
+    """,
+    'trg_rollup_detalle_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_detalle_update
+        AFTER UPDATE OF fec_fac, nom_cia_id, tot_doc, num_pag, nom_pac ON detalle_atenciones
+        BEGIN {_mark_detalle('OLD')} {_mark_detalle('NEW')} END
+    """,
+    'trg_rollup_seguimiento_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_seguimiento_insert
+        AFTER INSERT ON seguimiento_facturacion
+        BEGIN {_mark_seguimiento('NEW')} END
+    """,
+    'trg_rollup_seguimiento_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_seguimiento_delete
+        AFTER DELETE ON seguimiento_facturacion
+        BEGIN {_mark_seguimiento('OLD')} END
+    """,
+    'trg_rollup_seguimiento_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_seguimiento_update
+        AFTER UPDATE OF estado_aseguradora, detalle_atencion_id ON seguimiento_facturacion
+        BEGIN {_mark_seguimiento('OLD')} {_mark_seguimiento('NEW')} END
+    """,
+}
+
+DELETE_DIRTY_ROLLUPS = """
+    DELETE FROM rollup_facturacion
+    WHERE (periodo, nom_cia_id) IN (SELECT periodo, nom_cia_id FROM rollup_pendientes)
+"""
+
+INSERT_DIRTY_ROLLUPS = f"""
+    INSERT INTO rollup_facturacion
+        (periodo, nom_cia_id, estado, registros, monto_facturado, monto_pagado, monto_pendiente)
+    SELECT
+        k.periodo,
+        k.nom_cia_id,
+        CASE WHEN s.id IS NULL THEN '{NO_STATUS_LABEL}' ELSE COALESCE(s.estado_aseguradora, '') END,
+        COUNT(*),
+        SUM(d.tot_doc),
+        SUM(CASE WHEN {PAID_CONDITION.format(p='d')} THEN d.tot_doc ELSE 0 END),
+        SUM(CASE WHEN {PENDING_CONDITION.format(p='d')} THEN d.tot_doc ELSE 0 END)
+    FROM rollup_pendientes k
+    JOIN detalle_atenciones d
+        ON d.nom_cia_id = k.nom_cia_id AND {PERIOD_EXPRESSION.format(p='d.')} = k.periodo
+    LEFT JOIN seguimiento_facturacion s ON s.detalle_atencion_id = d.id
+    GROUP BY 1, 2, 3
+"""
+
+MARK_ALL_DIRTY = f"""
+    INSERT OR IGNORE INTO rollup_pendientes (periodo, nom_cia_id)
+    SELECT DISTINCT {PERIOD_EXPRESSION.format(p='d.')}, d.nom_cia_id FROM detalle_atenciones d
+"""
+
+# Los rollups guardan el id de la compañía; el nombre se resuelve con el catálogo de cada base
+ROLLUP_COLUMNS = """
+    r.periodo, c.nombre AS nom_cia, r.estado, r.registros,
+    r.monto_facturado, r.monto_pagado, r.monto_pendiente
+"""
+
+SELECT_ROLLUPS = """
+    SELECT r.periodo, c.nombre AS nom_cia, r.estado, r.registros,
+        r.monto_facturado / 100.0 AS monto_facturado, r.monto_pagado / 100.0 AS monto_pagado,
+        r.monto_pendiente / 100.0 AS monto_pendiente
+    FROM rollup_facturacion r
+    JOIN dim_compania c ON c.id = r.nom_cia_id
+    ORDER BY r.periodo, nom_cia, r.estado
+"""
+
+# Rollups de la base activa y del archivo histórico adjunto (esquema 'archivo'), unidos por nombre
+SELECT_ROLLUPS_WITH_ARCHIVE = f"""
+    SELECT periodo, nom_cia, estado, SUM(registros) AS registros,
+        SUM(monto_facturado) / 100.0 AS monto_facturado, SUM(monto_pagado) / 100.0 AS monto_pagado,
+        SUM(monto_pendiente) / 100.0 AS monto_pendiente
+    FROM (
+        SELECT {ROLLUP_COLUMNS}
+        FROM main.rollup_facturacion r JOIN main.dim_compania c ON c.id = r.nom_cia_id
+        UNION ALL
+        SELECT {ROLLUP_COLUMNS}
+        FROM archivo.rollup_facturacion r JOIN archivo.dim_compania c ON c.id = r.nom_cia_id
+    )
+    GROUP BY periodo, nom_cia, estado
+    ORDER BY periodo, nom_cia, estado
+"""
+
+
+class RollupManager:
+    """
+    Tablas de resumen por (periodo de fec_fac, compañía, estado) para reportes.
+
+    Los triggers solo anotan qué claves (periodo, compañía) cambiaron; refresh() recalcula
+    únicamente esas claves al final de cada importación o pase de estados.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        """Crear tablas, índice y triggers de rollup; poblarlas si son nuevas"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollup_facturacion'"
+        )
+        is_new = cursor.fetchone() is None
+
+        for ddl in CREATE_ROLLUP_TABLES:
+            cursor.execute(ddl)
+        for trigger_sql in ROLLUP_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+        if is_new:
+            self.rebuild(cursor)
+
+    def refresh(self, cursor: sqlite3.Cursor) -> int:
+        """Recalcular las claves marcadas como modificadas. Devuelve cuántas se recalcularon"""
+        cursor.execute("SELECT COUNT(*) FROM rollup_pendientes")
+        dirty_keys = cursor.fetchone()[0]
+        if dirty_keys == 0:
+            return 0
+
+        cursor.execute(DELETE_DIRTY_ROLLUPS)
+        cursor.execute(INSERT_DIRTY_ROLLUPS)
+        cursor.execute("DELETE FROM rollup_pendientes")
+        self.logger.info(f"Rollups recalculados para {dirty_keys} combinaciones periodo/compañía")
+        return dirty_keys
+
+    def rebuild(self, cursor: sqlite3.Cursor):
+        """Recalcular todos los rollups desde las tablas base"""
+        cursor.execute("DELETE FROM rollup_facturacion")
+        cursor.execute(MARK_ALL_DIRTY)
+        self.refresh(cursor)
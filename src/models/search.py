@@ -0,0 +1,189 @@
+import re
+import sqlite3
+import logging
+from typing import Dict, List
+
+from src.models.dimensions import name_of
+from src.models.storage import DAY_TO_DATE_SQL, CENTS_TO_AMOUNT_SQL
+
+# Columnas indexadas; el orden debe coincidir con SEARCH_WEIGHTS
+SEARCH_COLUMNS = ['num_doc', 'nh_pac', 'nom_pac', 'nom_ser', 'observaciones']
+SEARCH_WEIGHTS = (10.0, 8.0, 5.0, 2.0, 1.0)
+
+CREATE_SEARCH_TABLE = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS busqueda_fts USING fts5(
+        {', '.join(SEARCH_COLUMNS)},
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+"""
+
+# Observaciones de todos los seguimientos de un detalle, concatenadas
+OBSERVACIONES_OF = """
+    COALESCE((SELECT group_concat(s.observaciones, ' ')
+              FROM seguimiento_facturacion s
+              WHERE s.detalle_atencion_id = {id}), '')
+"""
+
+SEARCH_TRIGGERS = {
+    'trg_fts_detalle_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fts_detalle_insert
+        AFTER INSERT ON detalle_atenciones
+        BEGIN
+            INSERT INTO busqueda_fts (rowid, num_doc, nh_pac, nom_pac, nom_ser, observaciones)
+            VALUES (NEW.id, NEW.num_doc, NEW.nh_pac, NEW.nom_pac, {name_of('nom_ser', 'NEW')},
+                    {OBSERVACIONES_OF.format(id='NEW.id')});
+        END
+    """,
+    'trg_fts_detalle_delete': """
+        CREATE TRIGGER IF NOT EXISTS trg_fts_detalle_delete
+        AFTER DELETE ON detalle_atenciones
+        BEGIN
+            DELETE FROM busqueda_fts WHERE rowid = OLD.id;
+        END
+    """,
+    'trg_fts_detalle_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fts_detalle_update
+        AFTER UPDATE OF num_doc, nh_pac, nom_pac, nom_ser_id ON detalle_atenciones
+        BEGIN
+            UPDATE busqueda_fts
+            SET num_doc = NEW.num_doc, nh_pac = NEW.nh_pac, nom_pac = NEW.nom_pac,
+                nom_ser = {name_of('nom_ser', 'NEW')}
+            WHERE rowid = NEW.id;
+        END
+    """,
+    'trg_fts_seguimiento_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fts_seguimiento_insert
+        AFTER INSERT ON seguimiento_facturacion
+        BEGIN
+            UPDATE busqueda_fts SET observaciones = {OBSERVACIONES_OF.format(id='NEW.detalle_atencion_id')}
+            WHERE rowid = NEW.detalle_atencion_id;
+        END
+    """,
+    'trg_fts_seguimiento_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fts_seguimiento_delete
+        AFTER DELETE ON seguimiento_facturacion
+        BEGIN
+            UPDATE busqueda_fts SET observaciones = {OBSERVACIONES_OF.format(id='OLD.detalle_atencion_id')}
+            WHERE rowid = OLD.detalle_atencion_id;
+        END
+    """,
+    'trg_fts_seguimiento_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_fts_seguimiento_update
+        AFTER UPDATE OF observaciones, detalle_atencion_id ON seguimiento_facturacion
+        BEGIN
+            UPDATE busqueda_fts SET observaciones = {OBSERVACIONES_OF.format(id='OLD.detalle_atencion_id')}
+            WHERE rowid = OLD.detalle_atencion_id;
+            UPDATE busqueda_fts SET observaciones = {OBSERVACIONES_OF.format(id='NEW.detalle_atencion_id')}
+            WHERE rowid = NEW.detalle_atencion_id;
+        END
+    """,
+}
+
+REBUILD_SEARCH = [
+    "DELETE FROM busqueda_fts",
+    f"""
+    INSERT INTO busqueda_fts (rowid, num_doc, nh_pac, nom_pac, nom_ser, observaciones)
+    SELECT d.id, d.num_doc, d.nh_pac, d.nom_pac, d.nom_ser, {OBSERVACIONES_OF.format(id='d.id')}
+    FROM detalle_completo d
+    """,
+    "INSERT INTO busqueda_fts (busqueda_fts) VALUES ('optimize')",
+]
+
+RESULT_COLUMNS = f"""
+    d.num_doc, {DAY_TO_DATE_SQL.format(col='d.fec_doc')} AS fec_doc, d.nh_pac, d.nom_pac, d.nom_cia, d.nom_ser,
+    {CENTS_TO_AMOUNT_SQL.format(col='d.tot_doc')} AS tot_doc,
+    s.estado_aseguradora, {{observaciones}} AS observaciones
+"""
+
+# {schema} permite buscar también en la base de archivo adjunta
+SEARCH_FTS = f"""
+    SELECT {RESULT_COLUMNS.format(observaciones="snippet(busqueda_fts, 4, '[', ']', '…', 10)")},
+        bm25(busqueda_fts, {', '.join(str(w) for w in SEARCH_WEIGHTS)}) AS relevancia
+    FROM {{schema}}.busqueda_fts
+    JOIN {{schema}}.detalle_completo d ON d.id = busqueda_fts.rowid
+    LEFT JOIN {{schema}}.seguimiento_facturacion s ON s.detalle_atencion_id = d.id
+    WHERE busqueda_fts MATCH ?
+    ORDER BY relevancia
+    LIMIT ?
+"""
+
+# Alternativa sin FTS5 (recorre la tabla completa)
+SEARCH_LIKE = f"""
+    SELECT {RESULT_COLUMNS.format(observaciones='s.observaciones')}, 0 AS relevancia
+    FROM {{schema}}.detalle_completo d
+    LEFT JOIN {{schema}}.seguimiento_facturacion s ON s.detalle_atencion_id = d.id
+    WHERE d.num_doc LIKE ? OR d.nh_pac LIKE ? OR d.nom_pac LIKE ? OR d.nom_ser LIKE ?
+       OR s.observaciones LIKE ?
+    LIMIT ?
+"""
+
+TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_query(text: str) -> str:
+    """
+    Convertir el texto del usuario en una consulta MATCH de FTS5.
+
+    Cada palabra se cita (evita errores de sintaxis con caracteres especiales) y se busca
+    por prefijo; todas las palabras deben aparecer. Un texto entre comillas se busca como frase.
+    """
+    phrase = text.strip()
+    if len(phrase) > 1 and phrase.startswith('"') and phrase.endswith('"'):
+        tokens = TOKEN_PATTERN.findall(phrase)
+        return '"' + ' '.join(tokens) + '"' if tokens else ''
+    return ' '.join(f'"{token}"*' for token in TOKEN_PATTERN.findall(phrase))
+
+
+class SearchManager:
+    """
+    Índice de texto completo (FTS5) sobre pacientes, servicios y observaciones.
+
+    La tabla busqueda_fts usa como rowid el id de detalle_atenciones y se mantiene con triggers
+    sobre detalle_atenciones y seguimiento_facturacion.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+        self.available = True
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        """Crear el índice FTS5 y sus triggers; poblarlo si es nuevo"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'busqueda_fts'")
+        is_new = cursor.fetchone() is None
+
+        try:
+            cursor.execute(CREATE_SEARCH_TABLE)
+        except sqlite3.OperationalError as e:
+            # SQLite compilado sin FTS5: la búsqueda usará LIKE
+            self.available = False
+            self.logger.warning(f"FTS5 no disponible, la búsqueda será lenta: {str(e)}")
+            return
+
+        for trigger_sql in SEARCH_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+        if is_new:
+            self.rebuild(cursor)
+
+    def rebuild(self, cursor: sqlite3.Cursor):
+        """Reconstruir el índice desde las tablas base"""
+        if not self.available:
+            return
+        for statement in REBUILD_SEARCH:
+            cursor.execute(statement)
+        self.logger.info("Índice de búsqueda reconstruido")
+
+    def search(self, cursor: sqlite3.Cursor, text: str, limit: int = 100, schema: str = 'main') -> List[Dict]:
+        """Buscar registros ordenados por relevancia (menor valor de 'relevancia' = más relevante)"""
+        if self.available:
+            match_query = build_match_query(text)
+            if not match_query:
+                return []
+            cursor.execute(SEARCH_FTS.format(schema=schema), (match_query, limit))
+        else:
+            pattern = f"%{text.strip()}%"
+            cursor.execute(SEARCH_LIKE.format(schema=schema), (pattern,) * 5 + (limit,))
+
+        columns = [description[0] for description in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
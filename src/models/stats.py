@@ -0,0 +1,208 @@
+import sqlite3
+import logging
+from typing import Dict, List, Tuple
+
+from src.models.dimensions import name_of
+
+# Condición de "pendiente" (misma regla que SQLQueries.SELECT_PENDING) aplicada a un alias de fila
+PENDING_CONDITION = (
+    "{p}.nom_pac != 'No existe...' "
+    "AND ({p}.num_pag IS NULL OR {p}.num_pag = '' OR {p}.num_pag = 'nan') "
+    "AND {p}.tot_doc > 0"
+)
+
+UPSERT_DELTA = """
+    ON CONFLICT(categoria, clave) DO UPDATE SET
+        registros = registros + excluded.registros,
+        monto = monto + excluded.monto
+"""
+
+CREATE_STATS_TABLE = """
+    CREATE TABLE IF NOT EXISTS estadisticas_resumen (
+        categoria VARCHAR(20) NOT NULL,
+        clave VARCHAR(255) NOT NULL,
+        registros INTEGER NOT NULL DEFAULT 0,
+        monto INTEGER NOT NULL DEFAULT 0,       -- céntimos
+        PRIMARY KEY (categoria, clave)
+    ) WITHOUT ROWID
+"""
+
+
+def _detalle_delta(alias: str, sign: str) -> str:
+    """Sentencias que suman (+) o restan (-) una fila de detalle_atenciones a los contadores"""
+    pending = PENDING_CONDITION.format(p=alias)
+    return f"""
+        INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+        VALUES ('total', '', {sign}1, {sign}{alias}.tot_doc) {UPSERT_DELTA};
+        INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+        VALUES ('cia', {name_of('nom_cia', alias)}, {sign}1, {sign}{alias}.tot_doc) {UPSERT_DELTA};
+        INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+        VALUES ('pendiente', '',
+                {sign}(CASE WHEN {pending} THEN 1 ELSE 0 END),
+                {sign}(CASE WHEN {pending} THEN {alias}.tot_doc ELSE 0 END)) {UPSERT_DELTA};
+        INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+        SELECT 'estado', COALESCE(s.estado_aseguradora, ''), {sign}1, {sign}{alias}.tot_doc
+        FROM seguimiento_facturacion s WHERE s.detalle_atencion_id = {alias}.id {UPSERT_DELTA};
+    """
+
+
+def _seguimiento_delta(alias: str, sign: str) -> str:
+    """Sentencias que suman (+) o restan (-) un seguimiento al contador de su estado"""
+    return f"""
+        INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+        SELECT 'estado', COALESCE({alias}.estado_aseguradora, ''), {sign}1, {sign}d.tot_doc
+        FROM detalle_atenciones d WHERE d.id = {alias}.detalle_atencion_id {UPSERT_DELTA};
+    """
+
+
+STATS_TRIGGERS = {
+    'trg_stats_detalle_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_detalle_insert
+        AFTER INSERT ON detalle_atenciones
+        BEGIN {_detalle_delta('NEW', '+')} END
+    """,
+    'trg_stats_detalle_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_detalle_delete
+        AFTER DELETE ON detalle_atenciones
+        BEGIN {_detalle_delta('OLD', '-')} END
+    """,
+    'trg_stats_detalle_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_detalle_update
+        AFTER UPDATE OF tot_doc, nom_cia_id, nom_pac, num_pag ON detalle_atenciones
+        BEGIN {_detalle_delta('OLD', '-')} {_detalle_delta('NEW', '+')} END
+    """,
+    'trg_stats_seguimiento_insert': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_seguimiento_insert
+        AFTER INSERT ON seguimiento_facturacion
+        BEGIN {_seguimiento_delta('NEW', '+')} END
+    """,
+    'trg_stats_seguimiento_delete': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_seguimiento_delete
+        AFTER DELETE ON seguimiento_facturacion
+        BEGIN {_seguimiento_delta('OLD', '-')} END
+    """,
+    'trg_stats_seguimiento_update': f"""
+        CREATE TRIGGER IF NOT EXISTS trg_stats_seguimiento_update
+        AFTER UPDATE OF estado_aseguradora, detalle_atencion_id ON seguimiento_facturacion
+        BEGIN {_seguimiento_delta('OLD', '-')} {_seguimiento_delta('NEW', '+')} END
+    """,
+}
+
+REBUILD_STATS = f"""
+    DELETE FROM estadisticas_resumen;
+    INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+    SELECT 'total', '', COUNT(*), COALESCE(SUM(tot_doc), 0) FROM detalle_atenciones;
+    INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+    SELECT 'pendiente', '', COUNT(*), COALESCE(SUM(d.tot_doc), 0)
+    FROM detalle_atenciones d WHERE {PENDING_CONDITION.format(p='d')};
+    INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+    SELECT 'cia', c.nombre, COUNT(*), SUM(d.tot_doc)
+    FROM detalle_atenciones d JOIN dim_compania c ON c.id = d.nom_cia_id
+    GROUP BY d.nom_cia_id;
+    INSERT INTO estadisticas_resumen (categoria, clave, registros, monto)
+    SELECT 'estado', COALESCE(s.estado_aseguradora, ''), COUNT(*), SUM(d.tot_doc)
+    FROM seguimiento_facturacion s
+    JOIN detalle_atenciones d ON d.id = s.detalle_atencion_id
+    GROUP BY COALESCE(s.estado_aseguradora, '');
+"""
+
+SELECT_STATS = """
+    SELECT categoria, clave, registros, monto
+    FROM estadisticas_resumen
+    WHERE registros != 0
+    ORDER BY categoria, registros DESC
+"""
+
+NO_STATUS_LABEL = "Sin seguimiento"
+EMPTY_STATUS_LABEL = "Sin estado"
+
+
+class StatsManager:
+    """
+    Contadores del panel mantenidos de forma incremental mediante triggers.
+
+    La tabla estadisticas_resumen guarda pocas filas (una por categoría/clave), de modo que
+    leer el resumen no depende del tamaño de detalle_atenciones.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor):
+        """Crear la tabla de estadísticas y sus triggers; reconstruirla si es nueva"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'estadisticas_resumen'"
+        )
+        is_new = cursor.fetchone() is None
+
+        cursor.execute(CREATE_STATS_TABLE)
+        for trigger_sql in STATS_TRIGGERS.values():
+            cursor.execute(trigger_sql)
+
+        if is_new:
+            self.rebuild(cursor)
+
+    def rebuild(self, cursor: sqlite3.Cursor):
+        """Recalcular todos los contadores a partir de las tablas base"""
+        for statement in REBUILD_STATS.split(';'):
+            if statement.strip():
+                cursor.execute(statement)
+        self.logger.info("Estadísticas del panel reconstruidas")
+
+    def get_summary(self, cursor: sqlite3.Cursor) -> Dict:
+        """Leer el resumen de estadísticas ya agregado"""
+        cursor.execute(SELECT_STATS)
+        rows = cursor.fetchall()
+
+        summary = {
+            'total_registros': 0,
+            'monto_total': 0.0,
+            'pendientes': 0,
+            'monto_pendiente': 0.0,
+            'por_estado': [],
+            'por_cia': [],
+        }
+        estados: List[Tuple[str, int, float]] = []
+        con_seguimiento = 0
+        centimos_total = 0
+        centimos_con_seguimiento = 0
+
+        # Los montos se almacenan en céntimos enteros; se convierten al final para no acumular error
+        for categoria, clave, registros, centimos in rows:
+            centimos = centimos or 0
+            monto = centimos / 100.0
+            if categoria == 'total':
+                centimos_total = centimos
+                summary['total_registros'] = registros
+                summary['monto_total'] = monto
+            elif categoria == 'pendiente':
+                summary['pendientes'] = registros
+                summary['monto_pendiente'] = monto
+            elif categoria == 'cia':
+                summary['por_cia'].append((clave, registros, monto))
+            elif categoria == 'estado':
+                estados.append((clave or EMPTY_STATUS_LABEL, registros, monto))
+                con_seguimiento += registros
+                centimos_con_seguimiento += centimos
+
+        sin_seguimiento = summary['total_registros'] - con_seguimiento
+        if sin_seguimiento > 0:
+            estados.append((NO_STATUS_LABEL, sin_seguimiento, (centimos_total - centimos_con_seguimiento) / 100.0))
+        summary['por_estado'] = sorted(estados, key=lambda item: item[1], reverse=True)
+        return summary
+
+
+def merge_summaries(active: Dict, archived: Dict) -> Dict:
+    """Combinar el resumen de la base activa con el del archivo histórico"""
+    merged = {key: active[key] + archived[key]
+              for key in ('total_registros', 'monto_total', 'pendientes', 'monto_pendiente')}
+    for key in ('por_estado', 'por_cia'):
+        totals: Dict[str, List] = {}
+        for clave, registros, monto in active[key] + archived[key]:
+            entry = totals.setdefault(clave, [0, 0.0])
+            entry[0] += registros
+            entry[1] += monto
+        merged[key] = sorted(((clave, r, m) for clave, (r, m) in totals.items()),
+                             key=lambda item: item[1], reverse=True)
+    merged['archivados'] = archived['total_registros']
+    return merged
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import sqlite3
+import logging
+
+from src.models.dimensions import DIMENSIONS, CREATE_DIMENSION_TABLE, key_column, stored_columns
+from src.utils.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+STORAGE_VERSION = 3
+
+# Orden lógico de las columnas de detalle_atenciones (igual que las columnas requeridas del Excel)
+DETALLE_COLUMNS = [
+    'num_doc', 'fec_doc', 'nh_pac', 'nom_pac', 'nom_emp', 'nom_cia', 'ta_doc', 'nom_ser', 'tot_doc',
+    'num_fac', 'fec_fac', 'num_pag', 'fec_pag', 'usu_sis', 'cod_dx', 'facturador', 'producto'
+]
+DATE_COLUMNS = ['fec_doc', 'fec_fac', 'fec_pag']
+AMOUNT_COLUMNS = ['tot_doc']
+
+# Columnas físicas de detalle_atenciones (las dimensiones como claves enteras)
+STORED_COLUMNS = ['id'] + stored_columns(DETALLE_COLUMNS)
+
+# Julian day de 1970-01-01, para convertir fechas de texto existentes
+UNIX_EPOCH_JULIAN_DAY = 2440587.5
+
+# Expresiones SQL para decodificar en consultas de solo lectura
+DAY_TO_DATE_SQL = "date({col} * 86400, 'unixepoch')"
+CENTS_TO_AMOUNT_SQL = "({col} / 100.0)"
+
+CREATE_DETALLE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        num_doc VARCHAR(10) NOT NULL UNIQUE,
+        fec_doc INTEGER NULL,           -- días desde 1970-01-01
+        nh_pac VARCHAR(255) NOT NULL,
+        nom_pac VARCHAR(255) NOT NULL,
+        nom_emp_id INTEGER NOT NULL REFERENCES dim_empresa (id),
+        nom_cia_id INTEGER NOT NULL REFERENCES dim_compania (id),
+        ta_doc VARCHAR(1) NOT NULL,
+        nom_ser_id INTEGER NOT NULL REFERENCES dim_servicio (id),
+        tot_doc INTEGER NOT NULL,       -- céntimos
+        num_fac VARCHAR(11) NOT NULL,
+        fec_fac INTEGER NULL,           -- días desde 1970-01-01
+        num_pag VARCHAR(10) NOT NULL,
+        fec_pag INTEGER NULL,           -- días desde 1970-01-01
+        usu_sis_id INTEGER NOT NULL REFERENCES dim_usuario (id),
+        cod_dx VARCHAR(255) NOT NULL,
+        facturador_id INTEGER NOT NULL REFERENCES dim_facturador (id),
+        producto_id INTEGER NOT NULL REFERENCES dim_producto (id)
+    )
+'''
+
+def _view_column(col: str) -> str:
+    return f"{DIMENSIONS[col]}.nombre AS {col}" if col in DIMENSIONS else f"d.{col}"
+
+
+# detalle_atenciones con los nombres de las dimensiones, en el orden de DETALLE_COLUMNS.
+# LEFT JOIN sobre claves únicas permite a SQLite omitir los catálogos que la consulta no usa
+CREATE_DETALLE_VIEW = f"""
+    CREATE VIEW IF NOT EXISTS detalle_completo AS
+    SELECT d.id, {', '.join(_view_column(col) for col in DETALLE_COLUMNS)}
+    FROM detalle_atenciones d
+    {' '.join(f'LEFT JOIN {table} ON {table}.id = d.{key_column(col)}' for col, table in DIMENSIONS.items())}
+"""
+
+# Tablas derivadas que guardan montos, periodos o claves de compañía; se recrean (y recalculan) tras migrar
+DERIVED_TABLES = ['estadisticas_resumen', 'rollup_facturacion', 'rollup_pendientes']
+
+
+def _text_date_to_day(col: str) -> str:
+    return f"CAST(julianday(NULLIF({col}, '')) - {UNIX_EPOCH_JULIAN_DAY} AS INTEGER)"
+
+
+def _migration_select(version: int) -> str:
+    """SELECT que lee una tabla detalle_atenciones antigua (v1 o v2) en el formato actual"""
+    expressions = ['o.id']
+    for col in DETALLE_COLUMNS:
+        if col in DIMENSIONS:
+            expressions.append(f"(SELECT id FROM {DIMENSIONS[col]} WHERE nombre = o.{col})")
+        elif col in DATE_COLUMNS and version < 2:
+            expressions.append(_text_date_to_day(f"o.{col}"))
+        elif col in AMOUNT_COLUMNS and version < 2:
+            expressions.append(f"CAST(ROUND(COALESCE(o.{col}, 0) * 100) AS INTEGER)")
+        else:
+            expressions.append(f"o.{col}")
+    return f"SELECT {', '.join(expressions)} FROM detalle_atenciones o"
+
+
+def amounts_to_cents(series: pd.Series) -> pd.Series:
+    """Convertir montos a céntimos enteros"""
+    amounts = pd.to_numeric(series, errors='coerce').fillna(0)
+    return (amounts * 100).round().astype('int64').astype(object)
+
+
+def decode_detalle_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Convertir columnas almacenadas (días, céntimos) a fechas y montos, de forma vectorizada"""
+    for col in DATE_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], unit='D', errors='coerce')
+    for col in AMOUNT_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col] / 100.0
+    return df
+
+
+class StorageManager:
+    """
+    Creación y migración de detalle_atenciones al formato de almacenamiento actual.
+
+    Versión 2: las fechas (fec_doc, fec_fac, fec_pag) se guardan como número entero de días desde
+    1970-01-01 (NULL si faltan) y tot_doc como entero en céntimos. La conversión se hace solo en
+    los bordes: al importar (clean_data, con DateNormalizer) y al exportar o mostrar (decode_detalle_frame, DAY_TO_DATE_SQL).
+
+    Versión 3: nom_emp, nom_cia, nom_ser, facturador, usu_sis y producto se guardan como claves
+    enteras a tablas de catálogo (dim_*). La vista detalle_completo devuelve los nombres.
+    """
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def create_schema(self, cursor: sqlite3.Cursor) -> bool:
+        """Crear detalle_atenciones en el formato actual, migrando una tabla antigua si existe. Devuelve si migró"""
+        for table in DIMENSIONS.values():
+            cursor.execute(CREATE_DIMENSION_TABLE.format(table=table))
+
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'detalle_atenciones'")
+        exists = cursor.fetchone() is not None
+        cursor.execute("PRAGMA user_version")
+        version = cursor.fetchone()[0]
+
+        migrated = False
+        if exists and version < STORAGE_VERSION:
+            self._migrate(cursor, version)
+            migrated = True
+        else:
+            cursor.execute(CREATE_DETALLE_TABLE.format(table='detalle_atenciones'))
+
+        cursor.execute(CREATE_DETALLE_VIEW)
+        cursor.execute(f"PRAGMA user_version = {STORAGE_VERSION}")
+        return migrated
+
+    def _migrate(self, cursor: sqlite3.Cursor, version: int):
+        """Reescribir detalle_atenciones (v1 o v2) en el formato actual con un solo INSERT ... SELECT"""
+        self.logger.info(f"Migrando detalle_atenciones del formato v{max(version, 1)} al v{STORAGE_VERSION}...")
+
+        # Conservar la secuencia de ids: el archivo histórico depende de que no se reutilicen
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'detalle_atenciones'")
+        row = cursor.fetchone()
+        last_id = row[0] if row else 0
+
+        # Los triggers y la vista se recrean después; si quedaran apuntando a la tabla eliminada,
+        # el RENAME fallaría
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        for (trigger_name,) in cursor.fetchall():
+            cursor.execute(f"DROP TRIGGER IF EXISTS {trigger_name}")
+        cursor.execute("DROP VIEW IF EXISTS detalle_completo")
+
+        for col, table in DIMENSIONS.items():
+            cursor.execute(f"INSERT OR IGNORE INTO {table} (nombre) SELECT DISTINCT {col} FROM detalle_atenciones")
+
+        cursor.execute("DROP TABLE IF EXISTS detalle_atenciones_nueva")
+        cursor.execute(CREATE_DETALLE_TABLE.format(table='detalle_atenciones_nueva'))
+        cursor.execute(
+            f"INSERT INTO detalle_atenciones_nueva ({', '.join(STORED_COLUMNS)}) {_migration_select(version)}"
+        )
+        migrated_rows = cursor.rowcount
+        cursor.execute("DROP TABLE detalle_atenciones")
+        cursor.execute("ALTER TABLE detalle_atenciones_nueva RENAME TO detalle_atenciones")
+        cursor.execute(
+            "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'detalle_atenciones'", (last_id,)
+        )
+
+        for table in DERIVED_TABLES:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+        self.logger.info(f"Migración a v{STORAGE_VERSION} completada: {migrated_rows} registros")
@@ -0,0 +1,137 @@
+"""
+Validación vectorizada de los Excel antes de escribir en la base.
+
+Cada regla es una máscara booleana sobre todo el DataFrame (sin recorrer filas). Las filas que
+no cumplen alguna se separan antes de la escritura y se guardan en un libro de rechazos
+(logs/rechazos/) con la fila del Excel, los códigos de motivo y los valores originales, para
+corregirlas y volver a importarlas.
+
+Las filas válidas con el mismo num_doc se combinan en una sola (collapse_duplicates) según
+VALIDATION_CONFIG['keep_duplicate'], de modo que cada documento se escribe una vez.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Tuple
+
+from src.utils.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+# Códigos de motivo (columna Motivo del libro de rechazos)
+REASON_EMPTY_DOC = 'num_doc_vacio'
+REASON_LONG_DOC = 'num_doc_largo'
+REASON_INVALID_DATE = 'fecha_invalida'
+REASON_INVALID_AMOUNT = 'monto_no_numerico'
+REASON_UNKNOWN_DOC = 'num_doc_desconocido'
+
+ROW_COLUMN = 'Fila'
+REASON_COLUMN = 'Motivo'
+
+# Qué fila se conserva de un num_doc repetido en el archivo
+KEEP_LAST = 'last'
+KEEP_FIRST = 'first'
+KEEP_MAX_FEC_DOC = 'max_fec_doc'   # La de fec_doc más reciente (a igualdad, la última)
+KEEP_DESCRIPTIONS = {
+    KEEP_LAST: 'la última fila',
+    KEEP_FIRST: 'la primera fila',
+    KEEP_MAX_FEC_DOC: 'la de fecha de documento más reciente',
+}
+
+
+class RowValidator:
+    """Motivos de rechazo por fila, acumulados regla por regla"""
+
+    def __init__(self, index: pd.Index):
+        self.reasons = pd.Series('', index=index, dtype=object)
+
+    def check(self, reason: str, mask) -> int:
+        """Marcar con reason las filas de mask. Devuelve cuántas"""
+        mask = pd.Series(mask, index=self.reasons.index).fillna(False).astype(bool)
+        if mask.any():
+            current = self.reasons[mask]
+            self.reasons[mask] = current.where(current == '', current + ', ') + reason
+        return int(mask.sum())
+
+    def check_documents(self, num_doc: pd.Series, max_length: int):
+        """num_doc vacío o más largo que la columna de la base"""
+        length = num_doc.astype(str).str.strip().str.len()
+        self.check(REASON_EMPTY_DOC, length == 0)
+        self.check(REASON_LONG_DOC, length > max_length)
+
+    def check_dates(self, invalid_rows: Dict):
+        """Fechas que DateNormalizer no reconoció (máscaras por columna)"""
+        for mask in invalid_rows.values():
+            self.check(REASON_INVALID_DATE, mask)
+
+    def check_amounts(self, raw: pd.Series):
+        """Montos con texto que no es un número (vacío cuenta como 0)"""
+        present = raw.notna() & (raw.astype(str).str.strip() != '')
+        self.check(REASON_INVALID_AMOUNT, present & pd.to_numeric(raw, errors='coerce').isna())
+
+    @property
+    def rejected(self) -> pd.Series:
+        return self.reasons != ''
+
+    def split(self, data: pd.DataFrame, original: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        (filas válidas de data, rechazos). Los rechazos llevan la fila del Excel, el motivo y los
+        valores de original (el Excel tal como se leyó)
+        """
+        rejected = self.rejected
+        return data[~rejected], rejects_frame(original[rejected], self.reasons[rejected])
+
+
+def collapse_duplicates(df: pd.DataFrame, keep: str, key: str = 'num_doc') -> Tuple[pd.DataFrame, int]:
+    """
+    Dejar una fila por key según keep, en el orden del archivo. Devuelve (filas, filas combinadas).
+    Sin columna fec_doc (Excel de seguimiento), max_fec_doc conserva la última fila
+    """
+    if keep not in KEEP_DESCRIPTIONS:
+        raise ValueError(f"Política de duplicados desconocida: {keep}")
+    if keep == KEEP_MAX_FEC_DOC and 'fec_doc' in df.columns:
+        # Orden estable por fecha (vacías primero): la última de cada num_doc es la más reciente
+        dates = pd.to_numeric(df['fec_doc'], errors='coerce').fillna(float('-inf'))
+        ordered = df[key].iloc[dates.to_numpy().argsort(kind='stable')]
+        kept = df.index.isin(ordered.index[~ordered.duplicated(keep=KEEP_LAST)])
+    else:
+        kept = ~df[key].duplicated(keep=KEEP_FIRST if keep == KEEP_FIRST else KEEP_LAST)
+    return df[kept], int(len(df) - kept.sum())
+
+
+def rejects_frame(rows: pd.DataFrame, reasons: pd.Series | str) -> pd.DataFrame:
+    """Filas rechazadas con las columnas Fila (número de fila en el Excel) y Motivo al inicio"""
+    rejects = rows.copy()
+    rejects.insert(0, REASON_COLUMN, reasons)
+    rejects.insert(0, ROW_COLUMN, rows.index + 2) # Encabezado en la fila 1
+    return rejects
+
+
+def reason_counts(rejects: pd.DataFrame) -> Dict[str, int]:
+    """Filas rechazadas por código de motivo (una fila puede tener varios)"""
+    if rejects is None or rejects.empty:
+        return {}
+    return rejects[REASON_COLUMN].str.split(', ').explode().value_counts().to_dict()
+
+
+def describe_rejects(rejects: pd.DataFrame) -> str:
+    """Conteo por motivo para el resumen: 'num_doc_vacio: 3, fecha_invalida: 1'"""
+    return ', '.join(f"{reason}: {count:,}" for reason, count in reason_counts(rejects).items())
+
+
+def write_rejects_workbook(rejects: pd.DataFrame, rejects_dir: Path, source: str | Path) -> Path:
+    """Guardar los rechazos en rejects_dir/<archivo>_rechazos_<fecha>.xlsx"""
+    rejects_dir = Path(rejects_dir)
+    rejects_dir.mkdir(parents=True, exist_ok=True)
+    path = rejects_dir / f"{Path(source).stem}_rechazos_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
+    rejects.to_excel(path, index=False, sheet_name='Rechazos')
+    return path
+
+
+def concat_rejects(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Unir rechazos de varias etapas en el orden de las filas del Excel"""
+    frames = [frame for frame in frames if frame is not None and not frame.empty]
+    if not frames:
+        return pd.DataFrame(columns=[ROW_COLUMN, REASON_COLUMN])
+    return pd.concat(frames).sort_values(ROW_COLUMN, kind='stable')
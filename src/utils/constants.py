@@ -12,27 +12,99 @@ class Messages:
     ERROR_FILE_SELECTION = "Por favor, seleccione un archivo principal primero."
     ERROR_STATS = "Error al obtener estadísticas"
     ERROR_UNEXPECTED = "Error inesperado: {}"
+    ERROR_SEARCH = "Error al buscar: {}"
+    ERROR_BROWSE = "Error al consultar registros: {}"
+    ERROR_MAINTENANCE = "Error en mantenimiento: {}"
+    ERROR_ARCHIVE = "Error al archivar: {}"
     
     # Mensajes de éxito
     SUCCESS_EXPORT = "Archivo exportado con éxito: {}"
     SUCCESS_UPDATE = "Seguimientos actualizados: {}, Nuevos seguimientos: {}, Errores: {}"
     SUCCESS_PAYMENT = "Estados actualizados: {}, Nuevos registros: {}"
+    SUCCESS_BACKUP = "Copia de seguridad creada: {} ({} en {:.2f}s, {:.1f} MB/s)"
+    SUCCESS_RESTORE = "Copia restaurada: {} ({:.2f}s, {:.1f} MB/s)"
+    ERROR_BACKUP = "Error al crear la copia de seguridad: {}"
+    ERROR_RESTORE = "Error al restaurar la copia de seguridad: {}"
+    ERROR_BACKUP_UNKNOWN = "El archivo {} no es una copia de seguridad de esta aplicación"
+    CREATING_BACKUP = "Creando copia de seguridad..."
+    RESTORING_BACKUP = "Restaurando copia de seguridad..."
+    SUCCESS_CLEAR = "Base de datos limpiada exitosamente en {:.2f}s. Espacio recuperado: {}"
+    SUCCESS_ARCHIVE = "Registros archivados: {} (pagados antes del {}) en {:.2f}s"
+    SUCCESS_MAINTENANCE = "Mantenimiento completado en {:.2f}s. Espacio recuperado: {} (tamaño actual: {}). Pasos: {}"
     
     # Mensajes de validación
     MISSING_COLUMNS = "Columnas faltantes: {}"
+    INGEST_UNKNOWN_FORMAT = "Encabezados no reconocidos: no es un Excel principal ni de seguimiento"
+    OPERATION_CANCELLED = "Operación cancelada; no se guardaron cambios"
+    IMPORT_CANCELLED = "Importación cancelada con {} de {} filas confirmadas; al importar de nuevo el mismo archivo se reanuda desde ahí"
+    EXPORT_CANCELLED = "Exportación cancelada; no se escribió el archivo"
+    BACKUP_CANCELLED = "Copia de seguridad cancelada; se descartó la copia incompleta"
+    API_NOT_FOUND = "Recurso no encontrado"
+    API_DOCUMENT_NOT_FOUND = "Documento no encontrado: {}"
+    API_INVALID_PARAMETER = "Parámetro inválido: {}"
+    API_EMPTY_UPLOAD = "El cuerpo de la petición debe contener el archivo Excel"
+    API_UPLOAD_TOO_LARGE = "El archivo supera el máximo de {} MB"
     NO_DATA = "No hay datos válidos para procesar"
+    IMPORT_RESUMED = "Importación reanudada desde la fila {} (los lotes anteriores ya estaban guardados)"
+    NO_VALID_ROWS = "No hay filas válidas para procesar; filas rechazadas: {:,} ({})"
+    REJECTED_ROWS = "Filas rechazadas: {:,} ({})"
+    REJECTS_FILE = "Detalle de filas rechazadas: {}"
+    DUPLICATES_COLLAPSED = "num_doc repetidos en el archivo combinados: {:,} (se conservó {})"
     
     # Mensajes de progreso
     PROCESSING_DOC = "Procesando seguimiento: {}"
     WAITING_FILE = "Esperando archivo..."
     EXPORTING_DATA = "Exportando datos..."
+    EXPORTING_ROLLUPS = "Exportando resumen mensual..."
     CLEANING_DB = "Limpiando base de datos..."
+    RUNNING_MAINTENANCE = "Ejecutando mantenimiento de la base de datos..."
+    ARCHIVING_DATA = "Archivando facturas pagadas antiguas..."
     IMPORTING_DATA = "Iniciando importación de datos principales..."
+    READING_FILE = "Leyendo archivo Excel..."
+    CLEANING_DATA = "Limpiando datos..."
+    WRITING_EXCEL = "Generando hoja de cálculo..."
+    FORMATTING_EXCEL = "Aplicando formato..."
+    SAVING_EXCEL = "Guardando archivo Excel..."
+    JOB_IMPORT = "Importar {}"
+    JOB_EXPORT = "Exportar datos a {}"
+    JOB_EXPORT_PENDING = "Exportar pendientes a {}"
+    JOB_SEARCH = "Buscar: {}"
+    JOB_STATS = "Actualizar estadísticas"
+    JOB_AUTO_MAINTENANCE = "Mantenimiento automático"
+    CANCELLING_JOB = "Cancelando al terminar el lote en curso..."
+    JOB_STATUS_LABELS = {
+        'en_cola': "⏳ En cola",
+        'en_curso': "▶ En curso",
+        'completada': "✅ Completada",
+        'fallida': "❌ Fallida",
+        'cancelada': "✖ Cancelada",
+    }
     UPDATING_DATA = "Actualizando con: {}"
     
+    # Mensajes de búsqueda
+    SEARCH_PLACEHOLDER = "Buscar paciente, historia, servicio, documento u observación..."
+    SEARCH_NO_RESULTS = "Sin resultados para: {}"
+    SEARCH_RESULTS_TITLE = "Resultados de búsqueda: {} ({} registros)"
+
+    # Explorador de registros
+    BROWSER_TITLE = "Explorador de registros"
+    BROWSER_LOADING = "Cargando..."
+    BROWSER_POSITION = "Registros {:,} - {:,} de {:,}"
+    BROWSER_POSITION_COUNTING = "Registros {:,} - {:,} (contando...)"
+    BROWSER_EMPTY = "Sin registros para los filtros seleccionados"
+    BROWSER_FILTER_DOC = "N° documento (inicia con)"
+    BROWSER_FILTER_PATIENT = "Paciente (contiene)"
+    BROWSER_FILTER_ALL = "(Todas)"
+    BROWSER_FILTER_PENDING = "Solo pendientes"
+    BROWSER_SORTABLE = " ⇅"
+    
     # Mensajes de confirmación
     CONFIRM_CLEAR_DB = "¿Está seguro de eliminar todos los datos de la base de datos?\nEsta acción no se puede deshacer."
     
+    CONFIRM_EXPORT_HISTORY = "¿Incluir el historial completo de seguimiento?\nSí: una fila por cada cambio de estado u observación.\nNo: solo el estado actual de cada documento."
+    CONFIRM_RESTORE = "¿Restaurar la copia {}?\nLos datos actuales se reemplazarán (antes se guardará una copia de seguridad de ellos)."
+    CONFIRM_ARCHIVE = "¿Mover al archivo histórico las facturas pagadas hace más de {} días?\nSeguirán incluidas en la exportación completa y en la búsqueda."
+    
     # Títulos de diálogos
     DIALOG_CONFIRM = "Confirmar"
     DIALOG_SUCCESS = "Éxito"
@@ -40,15 +112,27 @@ class Messages:
     DIALOG_SELECT_FILE = "Seleccionar Archivo Excel Principal"
     DIALOG_SELECT_SEGUIMIENTO = "Seleccionar archivo Excel de seguimiento"
     DIALOG_SAVE_FILE = "Guardar archivo Excel"
+    DIALOG_SAVE_ROLLUPS = "Guardar resumen mensual"
+    DIALOG_EXPORT_HISTORY = "Historial de seguimiento"
+    DIALOG_SELECT_BACKUP = "Seleccionar copia de seguridad"
     
     # Etiquetas de UI
     LABEL_NO_FILE = "Ningún archivo principal seleccionado"
     LABEL_FILE_SELECTED = "Archivo seleccionado: {}"
+    LABEL_PRELOADING = "📄 {} · validando..."
+    LABEL_PRELOAD_PREVIEW = "📄 {} · {:,} filas · {:,} num_doc repetidos · {:,} rechazadas"
+    LABEL_PRELOAD_ERROR = "⚠️ {}: {}"
     LABEL_STATS = "📊 Registros en base de datos: {}"
+    LABEL_PREPARING_DATABASE = "⏳ Preparando base de datos..."
+    LABEL_STATS_PENDING = "⏳ Pendientes: {} (S/ {:,.2f})"
+    LABEL_STATS_STATUS = "{}: {}"
+    LABEL_STATS_CIA = "🏢 Top compañías: {}"
+    LABEL_STATS_ARCHIVED = " (archivados: {})"
     
     # Estados
     PAID_STATUS = "Pagado"
     ZERO_NEGATIVE_STATUS = "Cero o Negativo"
+    NO_PERIOD = "Sin fecha"
     
     # Observaciones y acciones por defecto
     DEFAULT_OBSERVATION = "Estado actualizado automáticamente - Factura pagada"
@@ -59,24 +143,48 @@ class Messages:
 @dataclass
 class SQLQueries:
     # Consultas para detalle_atenciones
+    # Usa las vistas temporales que unen la base activa con el archivo histórico
     SELECT_ALL = """
         SELECT 
             d.num_doc, d.fec_doc, d.nh_pac, d.nom_pac, d.nom_emp, d.nom_cia,
             d.tot_doc, d.num_fac, d.fec_fac, d.num_pag, d.fec_pag, d.facturador,
             s.estado_aseguradora, s.fecha_envio, s.fecha_recepcion, s.observaciones, s.acciones
-        FROM detalle_atenciones d
-        LEFT JOIN seguimiento_facturacion s ON d.id = s.detalle_atencion_id
+        FROM detalle_todas d
+        LEFT JOIN seguimiento_todas s ON d.id = s.detalle_atencion_id
+        WHERE d.nom_pac != 'No existe...'
+    """
+    
+    # Historial completo: una fila por evento de seguimiento (detalles sin eventos aparecen una vez)
+    SELECT_ALL_HISTORY = """
+        SELECT 
+            d.num_doc, d.fec_doc, d.nh_pac, d.nom_pac, d.nom_emp, d.nom_cia,
+            d.tot_doc, d.num_fac, d.fec_fac, d.num_pag, d.fec_pag, d.facturador,
+            s.estado_aseguradora, s.fecha_envio, s.fecha_recepcion,
+            e.fecha AS fecha_evento, e.estado AS estado_evento, e.observacion, e.accion, e.origen
+        FROM detalle_todas d
+        LEFT JOIN seguimiento_todas s ON d.id = s.detalle_atencion_id
+        LEFT JOIN seguimiento_eventos_todas e ON d.id = e.detalle_atencion_id
         WHERE d.nom_pac != 'No existe...'
+        ORDER BY d.num_doc, e.fecha, e.id
     """
     
     # Consultas para seguimiento_facturacion
     SELECT_BY_DOC = "SELECT id FROM detalle_atenciones WHERE num_doc = ?"
+    # num_doc del Excel de seguimiento en una tabla temporal; los desconocidos se buscan con el índice único
+    CREATE_TEMP_SEGUIMIENTO_DOCS = "CREATE TEMP TABLE IF NOT EXISTS docs_seguimiento (num_doc TEXT PRIMARY KEY)"
+    CLEAR_TEMP_SEGUIMIENTO_DOCS = "DELETE FROM temp.docs_seguimiento"
+    INSERT_TEMP_SEGUIMIENTO_DOC = "INSERT OR IGNORE INTO temp.docs_seguimiento (num_doc) VALUES (?)"
+    SELECT_UNKNOWN_DOCS = """
+        SELECT s.num_doc FROM temp.docs_seguimiento s
+        WHERE NOT EXISTS (SELECT 1 FROM main.detalle_atenciones d WHERE d.num_doc = s.num_doc)
+    """
     SELECT_BY_ID = "SELECT id FROM seguimiento_facturacion WHERE detalle_atencion_id = ?"
     SELECT_CURRENT_STATUS = "SELECT estado_aseguradora FROM seguimiento_facturacion WHERE id = ?"
     
     # Consultas para pagos
+    # fec_pag se almacena como días desde 1970-01-01
     SELECT_PAID = """
-        SELECT id, num_doc, num_pag, fec_pag 
+        SELECT id, num_doc, num_pag, date(fec_pag * 86400, 'unixepoch') AS fec_pag
         FROM detalle_atenciones 
         WHERE num_pag IS NOT NULL 
         AND num_pag != '' 
@@ -96,13 +204,43 @@ class SQLQueries:
             d.num_doc, d.fec_doc, d.nh_pac, d.nom_pac, d.nom_emp, d.nom_cia,
             d.tot_doc, d.num_fac, d.fec_fac, d.num_pag, d.fec_pag, d.facturador,
             s.estado_aseguradora, s.fecha_envio, s.fecha_recepcion, s.observaciones, s.acciones
-        FROM detalle_atenciones d
+        FROM detalle_completo d
         LEFT JOIN seguimiento_facturacion s ON d.id = s.detalle_atencion_id
         WHERE d.nom_pac != 'No existe...'
         AND (d.num_pag IS NULL OR d.num_pag = '' OR d.num_pag = 'nan')
         AND d.tot_doc > 0
     """
 
+    # Consultas del servicio HTTP (fechas y montos decodificados del formato de almacenamiento)
+    SELECT_DOCUMENT = """
+        SELECT
+            d.num_doc, date(d.fec_doc * 86400, 'unixepoch') AS fec_doc, d.nh_pac, d.nom_pac, d.nom_emp,
+            d.nom_cia, d.ta_doc, d.nom_ser, d.tot_doc / 100.0 AS tot_doc, d.num_fac,
+            date(d.fec_fac * 86400, 'unixepoch') AS fec_fac, d.num_pag,
+            date(d.fec_pag * 86400, 'unixepoch') AS fec_pag, d.facturador, d.producto,
+            s.estado_aseguradora, s.fecha_envio, s.fecha_recepcion, s.observaciones, s.acciones
+        FROM detalle_todas d
+        LEFT JOIN seguimiento_todas s ON d.id = s.detalle_atencion_id
+        WHERE d.num_doc = ?
+    """
+
+    # Página de registros por id (paginación por clave: WHERE d.id > último id visto)
+    SELECT_RECORDS_PAGE = """
+        SELECT
+            d.id, d.num_doc, date(d.fec_doc * 86400, 'unixepoch') AS fec_doc, d.nh_pac, d.nom_pac,
+            d.nom_cia, d.nom_ser, d.tot_doc / 100.0 AS tot_doc, d.num_fac,
+            date(d.fec_fac * 86400, 'unixepoch') AS fec_fac, d.num_pag,
+            date(d.fec_pag * 86400, 'unixepoch') AS fec_pag,
+            s.estado_aseguradora, s.fecha_envio, s.fecha_recepcion, s.observaciones, s.acciones
+        FROM detalle_completo d
+        LEFT JOIN seguimiento_facturacion s ON d.id = s.detalle_atencion_id
+        WHERE d.id > ? {filters}
+        ORDER BY d.id
+        LIMIT ?
+    """
+
+    PENDING_FILTER = "(d.num_pag IS NULL OR d.num_pag = '' OR d.num_pag = 'nan') AND d.tot_doc > 0"
+
 @dataclass
 class ExcelStyles:
     HEADER_FONT = {
@@ -0,0 +1,29 @@
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Registrar un módulo que solo se carga al acceder por primera vez a uno de sus atributos.
+
+    pandas tarda segundos en importarse en los equipos de la clínica; así la ventana aparece
+    antes y el costo se paga en la primera importación o exportación.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_available(name: str) -> bool:
+    """Si un paquete está instalado, sin importarlo"""
+    return importlib.util.find_spec(name) is not None
@@ -0,0 +1,42 @@
+import logging
+from typing import Dict, List
+
+
+class LogSummary:
+    """
+    Avisos repetidos por fila (documento vacío, ya pagado...) resumidos en un
+    contador con una muestra de claves.
+
+    En lugar de una línea de log por fila, add() solo cuenta y flush() escribe una línea por
+    tipo de aviso: "Omitiendo actualización de registros ya pagados: 1.234 (p. ej. D001, D002, ...)".
+    """
+
+    def __init__(self, logger: logging.Logger, sample_size: int = 5):
+        self.logger = logger
+        self.sample_size = sample_size
+        self._counts: Dict[str, int] = {}
+        self._samples: Dict[str, List[str]] = {}
+        self._levels: Dict[str, int] = {}
+
+    def add(self, message: str, key: object = None, level: int = logging.WARNING):
+        count = self._counts.get(message, 0)
+        self._counts[message] = count + 1
+        self._levels[message] = level
+        samples = self._samples.setdefault(message, [])
+        if key is not None and len(samples) < self.sample_size:
+            samples.append(str(key))
+
+    def count(self, message: str) -> int:
+        return self._counts.get(message, 0)
+
+    def flush(self):
+        """Escribir una línea por tipo de aviso y reiniciar los contadores"""
+        for message, count in self._counts.items():
+            line = f"{message}: {count:,}"
+            samples = self._samples[message]
+            if samples:
+                line += f" (p. ej. {', '.join(samples)}{', ...' if count > len(samples) else ''})"
+            self.logger.log(self._levels[message], line)
+        self._counts.clear()
+        self._samples.clear()
+        self._levels.clear()
@@ -1,17 +1,22 @@
 import customtkinter as ctk
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import threading
+from tkinter import filedialog, messagebox, ttk
+import logging
+import time
 from pathlib import Path
 from typing import Callable, Optional, Tuple, Dict, Any, List, TYPE_CHECKING
 
 import os
 
+from src.controllers.job_scheduler import JOB_RUNNING
 from src.utils.constants import Messages
+from src.views.record_browser import RecordBrowser
 
 if TYPE_CHECKING:
     from src.controllers.excel_controller import ExcelController
 
+logger = logging.getLogger('facturacion')
+
 
 class MainView:
     def __init__(self, root: ctk.CTk, controller: 'ExcelController'):
@@ -19,15 +24,31 @@ class MainView:
         self.controller = controller
         self.selected_primary_file = None
         self.selected_seguimiento_file = None
+        self._last_activity = time.monotonic()
+        # Tarea -> función que muestra su resultado (en el hilo de la interfaz)
+        self._completion_handlers: Dict[int, Callable] = {}
 
         self.setup_ui()
+        # El esquema se prepara en segundo plano: acciones deshabilitadas hasta que termine
+        self._disable_buttons()
+        self.stats_label.configure(text=Messages.LABEL_PREPARING_DATABASE)
+        self._wait_for_database()
+        self._poll_jobs()
+        self._schedule_maintenance()
+
+    def _wait_for_database(self):
+        """Comprobar periódicamente si la base está lista y entonces habilitar la interfaz"""
+        if not self.controller.is_database_ready():
+            self.root.after(self.controller.get_progress_check_interval(), self._wait_for_database)
+            return
+        self._enable_buttons()
         self.update_stats_display()
-    
+
     def setup_ui(self):
         """Configurar la interfaz de usuario basada en ModernExcelImporter.setup_ui"""
         # Window Setup
         self.root.title(self.controller.get_app_title())
-        self.root.geometry("800x700")
+        self.root.geometry("800x1010")
         self.root.minsize(600, 500)
 
         # Main Frame
@@ -89,11 +110,34 @@ class MainView:
         )
         self.progress_status_label.pack(pady=(0, 20))
 
+        # Cola de tareas: pendientes, en curso y últimas terminadas
+        self.queue_frame = ctk.CTkFrame(self.main_frame)
+        self.queue_frame.pack(fill="x", padx=30, pady=(0, 20))
+
+        self.queue_tree = ttk.Treeview(
+            self.queue_frame, columns=("tarea", "estado", "progreso"), show="headings", height=4, selectmode="browse"
+        )
+        for column, title, width in (("tarea", "Tarea", 380), ("estado", "Estado", 110), ("progreso", "Progreso", 80)):
+            self.queue_tree.heading(column, text=title)
+            self.queue_tree.column(column, width=width, anchor="w")
+        self.queue_tree.pack(side="left", fill="x", expand=True, padx=(10, 5), pady=10)
+
+        self.cancel_job_button = ctk.CTkButton(
+            self.queue_frame,
+            text="✖ Cancelar",
+            width=110,
+            height=36,
+            fg_color="gray40",
+            hover_color="gray30",
+            command=self.cancel_selected_job
+        )
+        self.cancel_job_button.pack(side="right", padx=(5, 10), pady=10)
+
         # Button Frame
         self.button_frame = ctk.CTkFrame(self.main_frame)
         self.button_frame.pack(fill="x", padx=30, pady=(0, 20))
         self.button_frame.columnconfigure((0, 1, 2, 3), weight=1, uniform="a")
-        self.button_frame.rowconfigure((0, 1), weight=1)
+        self.button_frame.rowconfigure((0, 1, 2), weight=1)
 
         self.import_primary_button = ctk.CTkButton(
             self.button_frame,
@@ -141,17 +185,105 @@ class MainView:
         # Botón de exportar pendientes (segunda fila)
         self.export_pending_button = ctk.CTkButton(
             self.button_frame,
-            text="📋 Exportar Pendientes",
+            text="📋 Pendientes",
             font=ctk.CTkFont(size=16, weight="bold"),
             height=45,
             fg_color="#8B4513", # Marrón
             hover_color="#654321", # Marrón oscuro
             command=self.export_pending_data
         )
-        self.export_pending_button.grid(row=1, column=0, columnspan=4, padx=10, pady=10, sticky="ew")
+        self.export_pending_button.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
+
+        self.export_rollup_button = ctk.CTkButton(
+            self.button_frame,
+            text="📈 Resumen",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="#5B2C6F", # Morado
+            hover_color="#4A235A", # Morado oscuro
+            command=self.export_rollup_data
+        )
+        self.export_rollup_button.grid(row=1, column=1, padx=10, pady=10, sticky="ew")
+
+        self.maintenance_button = ctk.CTkButton(
+            self.button_frame,
+            text="🧹 Mantenimiento",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="gray40",
+            hover_color="gray30",
+            command=self.start_maintenance
+        )
+        self.maintenance_button.grid(row=1, column=2, padx=10, pady=10, sticky="ew")
+
+        self.archive_button = ctk.CTkButton(
+            self.button_frame,
+            text="🗄️ Archivar",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="#2E4053", # Gris azulado
+            hover_color="#1C2833",
+            command=self.confirm_archive
+        )
+        self.archive_button.grid(row=1, column=3, padx=10, pady=10, sticky="ew")
+
+        # Copias de seguridad (tercera fila)
+        self.backup_button = ctk.CTkButton(
+            self.button_frame,
+            text="💾 Respaldar",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="#117A65", # Verde azulado
+            hover_color="#0E6251",
+            command=self.start_backup
+        )
+        self.backup_button.grid(row=2, column=0, padx=10, pady=10, sticky="ew")
+
+        self.restore_button = ctk.CTkButton(
+            self.button_frame,
+            text="♻️ Restaurar",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="#7B241C", # Rojo oscuro
+            hover_color="#641E16",
+            command=self.confirm_restore
+        )
+        self.restore_button.grid(row=2, column=1, padx=10, pady=10, sticky="ew")
+
+        self.browse_button = ctk.CTkButton(
+            self.button_frame,
+            text="📋 Ver Registros",
+            font=ctk.CTkFont(size=16, weight="bold"),
+            height=45,
+            fg_color="#2E4053", # Gris azulado
+            hover_color="#212F3C",
+            command=self.open_record_browser
+        )
+        self.browse_button.grid(row=2, column=2, padx=10, pady=10, sticky="ew")
+
+        # Search Frame
+        self.search_frame = ctk.CTkFrame(self.main_frame)
+        self.search_frame.pack(fill="x", padx=30, pady=(0, 20))
+
+        self.search_entry = ctk.CTkEntry(
+            self.search_frame,
+            placeholder_text=Messages.SEARCH_PLACEHOLDER,
+            height=36
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(10, 5), pady=10)
+        self.search_entry.bind("<Return>", lambda event: self.run_search())
+
+        self.search_button = ctk.CTkButton(
+            self.search_frame,
+            text="🔍 Buscar",
+            width=110,
+            height=36,
+            command=self.run_search
+        )
+        self.search_button.pack(side="right", padx=(5, 10), pady=10)
 
         # Stats Frame
-        self.stats_frame = ctk.CTkFrame(self.main_frame, height=80)
+        self.stats_frame = ctk.CTkFrame(self.main_frame, height=130)
         self.stats_frame.pack(fill="x", padx=30, pady=(0, 30))
         self.stats_frame.pack_propagate(False)
 
@@ -160,7 +292,16 @@ class MainView:
             text="📊 Registros en base de datos: 0",
             font=ctk.CTkFont(size=16, weight="bold") # Added font
         )
-        self.stats_label.pack(pady=25) # Adjusted padding
+        self.stats_label.pack(pady=(15, 5)) # Adjusted padding
+
+        self.stats_detail_label = ctk.CTkLabel(
+            self.stats_frame,
+            text="",
+            font=ctk.CTkFont(size=12),
+            text_color="gray",
+            justify="center"
+        )
+        self.stats_detail_label.pack(pady=(0, 10))
 
     def select_primary_file_dialog(self):
         file_path = filedialog.askopenfilename(
@@ -169,21 +310,47 @@ class MainView:
         )
         if file_path:
             self.selected_primary_file = file_path
-            self.primary_file_label.configure(text=f"📄 {os.path.basename(file_path)}")
+            self.primary_file_label.configure(text=Messages.LABEL_PRELOADING.format(os.path.basename(file_path)))
             self.import_primary_button.configure(state="normal")
             self.progress_status_label.configure(text=Messages.LABEL_FILE_SELECTED.format(os.path.basename(file_path)))
+            # Leer y validar ya; "Importar Datos" reutiliza el resultado (o lo espera si sigue en curso)
+            self._watch_preload(file_path, self.controller.start_primary_preload(Path(file_path)))
+
+    def _watch_preload(self, file_path: str, future):
+        """Mostrar la vista previa de la lectura anticipada cuando termine"""
+        if not future.done():
+            self.root.after(self.controller.get_progress_check_interval(), lambda: self._watch_preload(file_path, future))
+            return
+        if file_path != self.selected_primary_file:
+            return # Se seleccionó otro archivo mientras tanto
+
+        name = os.path.basename(file_path)
+        success, result = self.controller.get_preload_result(future)
+        if success:
+            self.primary_file_label.configure(
+                text=Messages.LABEL_PRELOAD_PREVIEW.format(name, result['filas'], result['duplicados'], result['rechazos'])
+            )
+        else:
+            self.primary_file_label.configure(text=Messages.LABEL_PRELOAD_ERROR.format(name, result))
+            self.selected_primary_file = None
+            self.import_primary_button.configure(state="disabled")
 
 
     def start_primary_import(self):
         if not self.selected_primary_file:
             messagebox.showerror(Messages.DIALOG_ERROR, Messages.ERROR_FILE_SELECTION)
             return
-        
-        self._disable_buttons()
-        self.progress_status_label.configure(text=Messages.IMPORTING_DATA)
+
+        # La selección se limpia al terminar solo si sigue siendo este archivo (la ventana no se
+        # bloquea mientras hay tareas en cola y se puede haber elegido otro)
+        selected_file = self.selected_primary_file
+        file_path = Path(selected_file)
         self._start_task(
-            lambda: self.controller.handle_primary_excel_import(Path(self.selected_primary_file), self._ui_progress_callback),
-            "import_complete"
+            Messages.JOB_IMPORT.format(file_path.name),
+            lambda progress, cancel: self.controller.handle_primary_excel_import(file_path, progress, cancel),
+            on_done=lambda success, result: self._handle_task_completion(
+                "import_complete", success, result, imported_file=selected_file
+            )
         )
 
     def start_seguimiento_update(self):
@@ -195,12 +362,12 @@ class MainView:
             return
         
         self.selected_seguimiento_file = file_path
-        self._disable_buttons()
-        # Update label to show selected seguimiento file
-        self.progress_status_label.configure(text=Messages.UPDATING_DATA.format(os.path.basename(file_path)))
         self._start_task(
-            lambda: self.controller.handle_seguimiento_update_from_excel(Path(self.selected_seguimiento_file), self._ui_progress_callback),
-            "seguimiento_complete"
+            Messages.UPDATING_DATA.format(os.path.basename(file_path)),
+            lambda progress, cancel: self.controller.handle_seguimiento_update_from_excel(Path(file_path), progress, cancel),
+            on_done=lambda success, result: self._handle_task_completion(
+                "seguimiento_complete", success, result, imported_file=file_path
+            )
         )
 
     def export_data(self):
@@ -211,11 +378,11 @@ class MainView:
         )
         if not export_path:
             return
-            
-        self._disable_buttons()
-        self.progress_status_label.configure(text=Messages.EXPORTING_DATA)
+        full_history = messagebox.askyesno(Messages.DIALOG_EXPORT_HISTORY, Messages.CONFIRM_EXPORT_HISTORY)
+
         self._start_task(
-            lambda: self.controller.handle_excel_export(Path(export_path)),
+            Messages.JOB_EXPORT.format(os.path.basename(export_path)),
+            lambda progress, cancel: self.controller.handle_excel_export(Path(export_path), full_history, progress, cancel),
             "export_complete"
         )
         
@@ -227,63 +394,243 @@ class MainView:
         )
         if not export_path:
             return
-            
-        self._disable_buttons()
-        self.progress_status_label.configure(text="Exportando datos pendientes...")
+
         self._start_task(
-            lambda: self.controller.handle_pending_export(Path(export_path)),
+            Messages.JOB_EXPORT_PENDING.format(os.path.basename(export_path)),
+            lambda progress, cancel: self.controller.handle_pending_export(Path(export_path), progress, cancel),
             "export_pending_complete"
         )
 
+    def export_rollup_data(self):
+        export_path = filedialog.asksaveasfilename(
+            title=Messages.DIALOG_SAVE_ROLLUPS,
+            defaultextension=".xlsx",
+            filetypes=[("Archivos Excel", "*.xlsx"), ("Todos los archivos", "*.*")]
+        )
+        if not export_path:
+            return
+
+        self._start_task(
+            Messages.EXPORTING_ROLLUPS,
+            lambda progress, cancel: self.controller.handle_rollup_export(Path(export_path), progress, cancel),
+            "export_rollup_complete"
+        )
+
     def confirm_clear_database(self):
         if messagebox.askyesno(Messages.DIALOG_CONFIRM, 
                                Messages.CONFIRM_CLEAR_DB,
                                icon='warning'):
-            self._disable_buttons()
-            self.progress_status_label.configure(text=Messages.CLEANING_DB)
             self._start_task(
-                lambda: self.controller.handle_clear_database(),
-                "clear_complete"
+                Messages.CLEANING_DB,
+                lambda progress, cancel: self.controller.handle_clear_database(),
+                "clear_complete",
+                cancellable=False
             )
 
+    def start_maintenance(self):
+        """Mantenimiento manual completo (ANALYZE y VACUUM forzados)"""
+        self._start_task(
+            Messages.RUNNING_MAINTENANCE,
+            lambda progress, cancel: self.controller.handle_maintenance(full=True),
+            "maintenance_complete",
+            cancellable=False
+        )
+
+    def confirm_archive(self):
+        min_age_days = self.controller.get_archive_min_age_days()
+        if messagebox.askyesno(Messages.DIALOG_CONFIRM, Messages.CONFIRM_ARCHIVE.format(min_age_days)):
+            self._start_task(
+                Messages.ARCHIVING_DATA,
+                lambda progress, cancel: self.controller.handle_archive(),
+                "archive_complete",
+                cancellable=False
+            )
+
+    def start_backup(self):
+        self._start_task(
+            Messages.CREATING_BACKUP,
+            lambda progress, cancel: self.controller.handle_backup(cancel),
+            "backup_complete"
+        )
+
+    def confirm_restore(self):
+        backup_path = filedialog.askopenfilename(
+            title=Messages.DIALOG_SELECT_BACKUP,
+            initialdir=str(self.controller.get_backup_dir()),
+            filetypes=[("Copias de seguridad", "*.db"), ("Todos los archivos", "*.*")]
+        )
+        if not backup_path:
+            return
+        if messagebox.askyesno(Messages.DIALOG_CONFIRM,
+                               Messages.CONFIRM_RESTORE.format(os.path.basename(backup_path)),
+                               icon='warning'):
+            self._start_task(
+                Messages.RESTORING_BACKUP,
+                lambda progress, cancel: self.controller.handle_restore(Path(backup_path)),
+                "restore_complete",
+                cancellable=False
+            )
+
+    def _schedule_maintenance(self):
+        """Programa el mantenimiento automático periódico"""
+        settings = self.controller.get_maintenance_settings()
+        self.root.after(int(settings['interval_minutes'] * 60 * 1000), self._run_idle_maintenance)
+
+    def _run_idle_maintenance(self):
+        """Ejecuta el mantenimiento en segundo plano solo si la aplicación está inactiva"""
+        settings = self.controller.get_maintenance_settings()
+        idle_for = time.monotonic() - self._last_activity
+        if not self.controller.has_pending_jobs() and idle_for >= settings['idle_seconds']:
+            # Silencioso: el resultado queda en el log, sin diálogos
+            self.controller.submit_job(
+                Messages.JOB_AUTO_MAINTENANCE, lambda progress, cancel: self.controller.handle_maintenance(),
+                cancellable=False
+            )
+        self._schedule_maintenance()
+
+    def run_search(self):
+        """Ejecuta la búsqueda de texto completo (consulta indexada, se resuelve en milisegundos)"""
+        text = self.search_entry.get().strip()
+        if not text:
+            return
+
+        # Lectura corta: no espera a que termine una importación en curso
+        self._start_task(
+            Messages.JOB_SEARCH.format(text),
+            lambda progress, cancel: self.controller.handle_search(text),
+            on_done=lambda success, results: self._show_search_outcome(text, success, results),
+            short=True
+        )
+
+    def _show_search_outcome(self, text: str, success: bool, results):
+        if not success:
+            messagebox.showerror(Messages.DIALOG_ERROR, results)
+            return
+        if not results:
+            messagebox.showinfo(Messages.DIALOG_SUCCESS, Messages.SEARCH_NO_RESULTS.format(text))
+            return
+        self._show_search_results(text, results)
+
+    def _show_search_results(self, text: str, results: List[Dict[str, Any]]):
+        """Muestra los resultados en una ventana con tabla"""
+        window = ctk.CTkToplevel(self.root)
+        window.title(Messages.SEARCH_RESULTS_TITLE.format(text, len(results)))
+        window.geometry("1000x450")
+
+        columns = list(results[0].keys())
+        tree = ttk.Treeview(window, columns=columns, show="headings")
+        for column in columns:
+            tree.heading(column, text=column)
+            tree.column(column, width=110 if column != 'observaciones' else 300, anchor="w")
+        for row in results:
+            tree.insert("", "end", values=["" if row[column] is None else row[column] for column in columns])
+
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(fill="both", expand=True)
+        window.after(100, window.lift) # Mostrar sobre la ventana principal
+
+    def open_record_browser(self):
+        """Abre el explorador de registros (tabla paginada con orden y filtros)"""
+        RecordBrowser(self.root, self.controller)
+
     def update_stats_display(self):
-        """Actualiza el contador de registros en la interfaz"""
+        """Actualiza el contador de registros en la interfaz (consulta como lectura corta)"""
+        self._start_task(
+            Messages.JOB_STATS,
+            lambda progress, cancel: (True, self.controller.handle_get_dashboard_stats()),
+            on_done=lambda success, stats: self._show_stats(stats),
+            short=True
+        )
+
+    def _show_stats(self, stats: Dict[str, Any]):
         try:
-            count = self.controller.handle_get_stats()
-            self.stats_label.configure(text=Messages.LABEL_STATS.format(count))
+            stats_text = Messages.LABEL_STATS.format(stats.get('total_registros', 0))
+            if stats.get('archivados'):
+                stats_text += Messages.LABEL_STATS_ARCHIVED.format(stats['archivados'])
+            self.stats_label.configure(text=stats_text)
+
+            detail_lines = [Messages.LABEL_STATS_PENDING.format(stats.get('pendientes', 0), stats.get('monto_pendiente', 0.0))]
+            estados = [Messages.LABEL_STATS_STATUS.format(estado, registros) for estado, registros, _ in stats.get('por_estado', [])[:4]]
+            if estados:
+                detail_lines.append(" · ".join(estados))
+            cias = [Messages.LABEL_STATS_STATUS.format(cia, registros) for cia, registros, _ in stats.get('por_cia', [])[:3]]
+            if cias:
+                detail_lines.append(Messages.LABEL_STATS_CIA.format(" · ".join(cias)))
+            self.stats_detail_label.configure(text="\n".join(detail_lines))
         except Exception as e:
-            self.controller.logger.error(f"Error al obtener estadísticas: {str(e)}")
+            logger.error(f"Error al obtener estadísticas: {str(e)}")
             self.stats_label.configure(text=Messages.ERROR_STATS)
 
-    def _ui_progress_callback(self, progress_percentage: float, message: str = ""):
-        self.progress_bar.set(progress_percentage / 100.0)
-        if message: # Only update label if message is provided
-            self.progress_status_label.configure(text=message)
-        self.root.update_idletasks()
-
-    def _start_task(self, task_callable: Callable, completion_event_type: str):
-        """Ejecuta una tarea en un hilo separado para mantener la UI responsiva"""
-        # Disable buttons before starting the task
-        self._disable_buttons()
-
-        def worker():
-            success = False
-            message_or_result = "Tarea fallida por defecto"
-            try:
-                success, message_or_result = task_callable()
-            except Exception as e:
-                self.controller.logger.error(f"Error en tarea {completion_event_type}: {str(e)}")
-                message_or_result = Messages.ERROR_UNEXPECTED.format(str(e))
-                success = False
-            finally:
-                # Schedule _handle_task_completion to run in the main thread
-                self.root.after(0, self._handle_task_completion, completion_event_type, success, message_or_result)
-        
-        # Start the worker thread
-        task_thread = threading.Thread(target=worker, daemon=True)
-        task_thread.start()
-
-    def _handle_task_completion(self, event_type: str, success: bool, result_message: str):
+    def _start_task(self, description: str, task_callable: Callable, completion_event_type: str = "",
+                    on_done: Optional[Callable] = None, short: bool = False, cancellable: bool = True):
+        """
+        Encola una tarea en el planificador del controlador.
+
+        task_callable recibe (progress_callback, cancel_event) y devuelve (éxito, resultado);
+        cancellable=False si no revisa cancel_event (en curso no se puede cancelar).
+        Al terminar se llama a on_done(éxito, resultado) o, si no se indica, se muestra el
+        diálogo de resultado de completion_event_type.
+        """
+        self._last_activity = time.monotonic()
+        job = self.controller.submit_job(description, task_callable, completion_event_type, short, cancellable)
+        if on_done is not None:
+            self._completion_handlers[job.id] = on_done
+        elif completion_event_type:
+            self._completion_handlers[job.id] = (
+                lambda success, result: self._handle_task_completion(completion_event_type, success, result)
+            )
+        if not short:
+            self._refresh_queue()
+
+    def _poll_jobs(self):
+        """Refresca progreso y cola, y entrega los resultados (todo en el hilo de la interfaz)"""
+        for job in self.controller.pop_finished_jobs():
+            handler = self._completion_handlers.pop(job.id, None)
+            if handler is not None:
+                handler(job.success, job.result)
+        self._refresh_queue()
+        self.root.after(self.controller.get_progress_check_interval(), self._poll_jobs)
+
+    def _refresh_queue(self):
+        jobs = [job for job in self.controller.get_jobs() if not job.short]
+        running = next((job for job in jobs if job.status == JOB_RUNNING), None)
+        if running is not None:
+            self.progress_bar.set(running.progress / 100.0)
+            self.progress_status_label.configure(text=running.message or running.description)
+
+        selected = self.queue_tree.selection()
+        self.queue_tree.delete(*self.queue_tree.get_children())
+        for job in jobs:
+            progress = f"{job.progress:.0f}%" if job.status == JOB_RUNNING else ""
+            self.queue_tree.insert("", "end", iid=str(job.id),
+                                   values=(job.description, Messages.JOB_STATUS_LABELS[job.status], progress))
+        selected = [iid for iid in selected if self.queue_tree.exists(iid)]
+        if selected:
+            self.queue_tree.selection_set(selected)
+
+        # Cancelar actúa sobre la seleccionada o, sin selección, sobre la que está en curso
+        target = next((job for job in jobs if str(job.id) in selected), None) if selected else running
+        self.cancel_job_button.configure(state="normal" if target is not None and target.can_cancel else "disabled")
+
+    def cancel_selected_job(self):
+        """Cancela la tarea seleccionada en la cola o, si no hay selección, la que está en curso"""
+        selection = self.queue_tree.selection()
+        if selection:
+            job_id = int(selection[0])
+        else:
+            running = next((job for job in self.controller.get_jobs()
+                            if not job.short and job.status == JOB_RUNNING), None)
+            if running is None:
+                return
+            job_id = running.id
+        if self.controller.cancel_job(job_id):
+            self.progress_status_label.configure(text=Messages.CANCELLING_JOB)
+
+    def _handle_task_completion(self, event_type: str, success: bool, result_message: str,
+                                imported_file: Optional[str] = None):
+        self._last_activity = time.monotonic()
         self.progress_bar.set(1.0 if success else 0.0) # Ensure float for progress bar
         self.progress_status_label.configure(text=result_message)
 
@@ -292,21 +639,31 @@ class MainView:
         else:
             messagebox.showerror(Messages.DIALOG_ERROR, f"{event_type.replace('_', ' ').capitalize()}: {result_message}")
         
-        self._enable_buttons() # Re-enable buttons
         self.update_stats_display()
         
         # Reset UI elements after a delay
-        self.root.after(3000, self.reset_progress_ui)
-
-    def reset_progress_ui(self):
+        self.root.after(3000, lambda: self.reset_progress_ui(imported_file))
+
+    def reset_progress_ui(self, imported_file: Optional[str] = None):
+        """
+        Volver la barra de progreso al estado inicial. imported_file es el archivo de la tarea que
+        terminó: se quita de la selección solo si sigue seleccionado (no el elegido después)
+        """
+        if imported_file is not None and imported_file == self.selected_primary_file:
+            self.primary_file_label.configure(text=Messages.LABEL_NO_FILE)
+            self.selected_primary_file = None
+            self.import_primary_button.configure(state="disabled")
+        if imported_file is not None and imported_file == self.selected_seguimiento_file:
+            self.selected_seguimiento_file = None
+        if self.controller.has_pending_jobs():
+            return # La siguiente tarea de la cola ya muestra su progreso
         self.progress_bar.set(0)
-        self.progress_status_label.configure(text=Messages.WAITING_FILE)
-        self.primary_file_label.configure(text=Messages.LABEL_NO_FILE)
-        self.selected_primary_file = None
-        self.selected_seguimiento_file = None # Reset seguimiento file as well
-        self.import_primary_button.configure(state="disabled")
-        # Ensure all buttons that could be disabled are re-enabled or set to initial state
-        self._enable_buttons() # Call this to ensure consistent state
+        if self.selected_primary_file:
+            self.progress_status_label.configure(
+                text=Messages.LABEL_FILE_SELECTED.format(os.path.basename(self.selected_primary_file))
+            )
+        else:
+            self.progress_status_label.configure(text=Messages.WAITING_FILE)
 
     def _disable_buttons(self):
         """Helper method to disable all interactive buttons during a task."""
@@ -315,7 +672,14 @@ class MainView:
         self.update_seguimiento_button.configure(state="disabled")
         self.export_data_button.configure(state="disabled")
         self.export_pending_button.configure(state="disabled")
+        self.export_rollup_button.configure(state="disabled")
         self.clear_db_button.configure(state="disabled")
+        self.search_button.configure(state="disabled")
+        self.maintenance_button.configure(state="disabled")
+        self.archive_button.configure(state="disabled")
+        self.backup_button.configure(state="disabled")
+        self.restore_button.configure(state="disabled")
+        self.browse_button.configure(state="disabled")
 
     def _enable_buttons(self):
         """Helper method to enable buttons after a task, respecting initial states."""
@@ -328,4 +692,11 @@ class MainView:
         self.update_seguimiento_button.configure(state="normal")
         self.export_data_button.configure(state="normal")
         self.export_pending_button.configure(state="normal")
+        self.export_rollup_button.configure(state="normal")
         self.clear_db_button.configure(state="normal")
+        self.search_button.configure(state="normal")
+        self.maintenance_button.configure(state="normal")
+        self.archive_button.configure(state="normal")
+        self.backup_button.configure(state="normal")
+        self.restore_button.configure(state="normal")
+        self.browse_button.configure(state="normal")
@@ -0,0 +1,277 @@
+import customtkinter as ctk
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from tkinter import ttk
+from typing import Callable, List, Tuple, TYPE_CHECKING
+
+from src.models.browser import BROWSE_COLUMNS, SORT_KEYS, BrowseQuery, RecordWindow
+from src.utils.constants import Messages
+
+if TYPE_CHECKING:
+    from src.controllers.excel_controller import ExcelController
+
+logger = logging.getLogger('facturacion')
+
+
+class RecordBrowser:
+    """
+    Ventana con la tabla de detalle_atenciones y su seguimiento, virtualizada.
+
+    La tabla tiene siempre visible_rows filas de Treeview: al desplazarse solo se cambian sus
+    valores. Las filas vienen de un RecordWindow (búfer acotado) que se completa con páginas
+    pedidas por clave en un hilo propio; ordenar, filtrar y contar también se consultan ahí,
+    por lo que la interfaz nunca espera a la base. Las respuestas de una consulta anterior a
+    un cambio de orden o filtro se descartan.
+    """
+
+    def __init__(self, root: ctk.CTk, controller: 'ExcelController'):
+        self.controller = controller
+        self.settings = controller.get_browser_settings()
+        self.columns = list(BROWSE_COLUMNS)
+        self.query = BrowseQuery()
+        self.window = RecordWindow(self.settings['visible_rows'], self.settings['page_size'],
+                                   self.settings['max_pages'])
+        self.total: int | None = None
+        self._generation = 0
+        self._fetching = False
+        self._jump_after_id = None
+        self._pending: List[Tuple[int, Future, Callable]] = []
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='explorador')
+
+        self.top = ctk.CTkToplevel(root)
+        self.top.title(Messages.BROWSER_TITLE)
+        self.top.geometry("1200x700")
+        self.top.protocol("WM_DELETE_WINDOW", self.close)
+        self.setup_ui()
+
+        self.reload()
+        self._submit(controller.handle_browse_filter_options, self._show_filter_options)
+        self._poll()
+        self.top.after(100, self.top.lift) # Mostrar sobre la ventana principal
+
+    def setup_ui(self):
+        filter_frame = ctk.CTkFrame(self.top)
+        filter_frame.pack(fill="x", padx=10, pady=(10, 5))
+
+        self.doc_entry = ctk.CTkEntry(filter_frame, placeholder_text=Messages.BROWSER_FILTER_DOC, width=190)
+        self.doc_entry.pack(side="left", padx=5, pady=8)
+        self.patient_entry = ctk.CTkEntry(filter_frame, placeholder_text=Messages.BROWSER_FILTER_PATIENT, width=190)
+        self.patient_entry.pack(side="left", padx=5, pady=8)
+        for entry in (self.doc_entry, self.patient_entry):
+            entry.bind("<Return>", lambda event: self.apply_filters())
+
+        self.cia_combo = ctk.CTkComboBox(filter_frame, values=[Messages.BROWSER_FILTER_ALL], width=180,
+                                         command=lambda value: self.apply_filters())
+        self.cia_combo.set(Messages.BROWSER_FILTER_ALL)
+        self.cia_combo.pack(side="left", padx=5, pady=8)
+        self.estado_combo = ctk.CTkComboBox(filter_frame, values=[Messages.BROWSER_FILTER_ALL], width=160,
+                                            command=lambda value: self.apply_filters())
+        self.estado_combo.set(Messages.BROWSER_FILTER_ALL)
+        self.estado_combo.pack(side="left", padx=5, pady=8)
+
+        self.pending_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(filter_frame, text=Messages.BROWSER_FILTER_PENDING, variable=self.pending_var,
+                        command=self.apply_filters).pack(side="left", padx=5, pady=8)
+        ctk.CTkButton(filter_frame, text="🔍 Filtrar", width=90, command=self.apply_filters).pack(side="right", padx=5, pady=8)
+
+        table_frame = ctk.CTkFrame(self.top)
+        table_frame.pack(fill="both", expand=True, padx=10, pady=5)
+
+        labels = self.controller.get_column_labels()
+        self.tree = ttk.Treeview(table_frame, columns=self.columns, show="headings",
+                                 height=self.settings['visible_rows'], selectmode="browse")
+        for column in self.columns:
+            text = labels.get(column, column)
+            if column in SORT_KEYS:
+                text += Messages.BROWSER_SORTABLE
+                self.tree.heading(column, text=text, command=lambda c=column: self.sort_by(c))
+            else:
+                self.tree.heading(column, text=text)
+            self.tree.column(column, width=300 if column == 'observaciones' else 110, anchor="w", stretch=False)
+        # Filas fijas: desplazarse solo cambia sus valores
+        for index in range(self.settings['visible_rows']):
+            self.tree.insert("", "end", iid=str(index), values=())
+
+        self.scrollbar = ttk.Scrollbar(table_frame, orient="vertical", command=self._on_scrollbar)
+        x_scrollbar = ttk.Scrollbar(table_frame, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=x_scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        x_scrollbar.pack(side="bottom", fill="x")
+        self.tree.pack(fill="both", expand=True)
+
+        self.tree.bind("<MouseWheel>", lambda event: self.scroll(-3 if event.delta > 0 else 3))
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+        self.tree.bind("<Up>", lambda event: self.scroll(-1))
+        self.tree.bind("<Down>", lambda event: self.scroll(1))
+        self.tree.bind("<Prior>", lambda event: self.scroll(-self.window.height))
+        self.tree.bind("<Next>", lambda event: self.scroll(self.window.height))
+        self.tree.bind("<Home>", lambda event: self.reload())
+        self.tree.bind("<End>", lambda event: self.go_to_end())
+
+        self.status_label = ctk.CTkLabel(self.top, text=Messages.BROWSER_LOADING, anchor="w")
+        self.status_label.pack(fill="x", padx=15, pady=(0, 10))
+
+    # --- Consultas en segundo plano -------------------------------------
+
+    def _submit(self, func: Callable, on_done: Callable, *args):
+        """Ejecutar func(*args) en el hilo del explorador; on_done recibe su resultado en la interfaz"""
+        self._pending.append((self._generation, self._executor.submit(func, *args), on_done))
+
+    def _poll(self):
+        if not self.top.winfo_exists():
+            return
+        for entry in [entry for entry in self._pending if entry[1].done()]:
+            self._pending.remove(entry)
+            generation, future, on_done = entry
+            if generation != self._generation:
+                continue # Respuesta de un orden o filtro anterior
+            try:
+                on_done(future.result())
+            except Exception as e:
+                logger.error(f"Error en el explorador de registros: {str(e)}")
+        self.top.after(self.controller.get_progress_check_interval(), self._poll)
+
+    def _new_generation(self):
+        self._generation += 1
+        self._fetching = False
+        self.window.reset()
+        self.status_label.configure(text=Messages.BROWSER_LOADING)
+
+    def reload(self):
+        """Volver al principio con el orden y los filtros actuales"""
+        self._new_generation()
+        self.total = None
+        self._fetching = True
+        self._submit(self.controller.handle_browse_page, lambda result: self._on_load(result, 0),
+                     self.query, None, self.settings['page_size'])
+        self._submit(self.controller.handle_browse_count, self._on_count, self.query)
+
+    def go_to_end(self):
+        self._new_generation()
+        self._fetching = True
+        self._submit(self.controller.handle_browse_page, lambda result: self._on_load(result, None),
+                     self.query, None, self.settings['page_size'], True)
+
+    def _on_load(self, result, offset: int | None):
+        """Primera página, última (offset None) o página de un salto"""
+        self._fetching = False
+        success, rows = result
+        if not success:
+            self.status_label.configure(text=rows)
+            return
+        page_size = self.settings['page_size']
+        if offset is None:
+            # Última página: se conoce su posición cuando llega el conteo
+            total = self.total if self.total is not None else len(rows)
+            self.window.load(rows, max(total - len(rows), 0), len(rows) < page_size, True)
+            self.window.move(len(rows))
+        else:
+            self.window.load(rows, offset, offset == 0, len(rows) < page_size)
+        self._render()
+        self._request_more()
+
+    def _on_count(self, result):
+        success, total = result
+        if success:
+            self.total = total
+            self._render()
+
+    def _request_more(self):
+        """Pedir la página siguiente o anterior si la ventana se acerca al borde del búfer"""
+        if self._fetching:
+            return
+        direction = self.window.needs()
+        if direction is None:
+            return
+        self._fetching = True
+        self._submit(self.controller.handle_browse_page, lambda result: self._on_page(result, direction),
+                     self.query, self.window.anchor(direction), self.settings['page_size'], direction == 'prev')
+
+    def _on_page(self, result, direction: str):
+        self._fetching = False
+        success, rows = result
+        if not success:
+            self.status_label.configure(text=rows)
+            return
+        self.window.add_rows(rows, direction)
+        self._render()
+        self._request_more()
+
+    def _show_filter_options(self, options):
+        self.cia_combo.configure(values=[Messages.BROWSER_FILTER_ALL] + options.get('nom_cia', []))
+        self.estado_combo.configure(values=[Messages.BROWSER_FILTER_ALL] + options.get('estado', []))
+
+    # --- Interacción ----------------------------------------------------
+
+    def apply_filters(self):
+        cia, estado = self.cia_combo.get(), self.estado_combo.get()
+        self.query = BrowseQuery(self.query.sort, self.query.descending, {
+            'num_doc': self.doc_entry.get().strip(),
+            'nom_pac': self.patient_entry.get().strip(),
+            'nom_cia': '' if cia == Messages.BROWSER_FILTER_ALL else cia,
+            'estado': '' if estado == Messages.BROWSER_FILTER_ALL else estado,
+            'pendiente': self.pending_var.get(),
+        })
+        self.reload()
+
+    def sort_by(self, column: str):
+        """Ordenar por una columna indexada; un segundo clic invierte el orden"""
+        descending = not self.query.descending if self.query.sort == column else False
+        self.query = BrowseQuery(column, descending, self.query.filters)
+        self.reload()
+
+    def scroll(self, delta: int):
+        self.window.move(delta)
+        self._render()
+        self._request_more()
+        return "break"
+
+    def _on_scrollbar(self, action: str, *args):
+        if action == 'scroll':
+            amount, unit = int(args[0]), args[1]
+            self.scroll(amount * (self.window.height if unit == 'pages' else 1))
+        elif action == 'moveto' and self.total:
+            # Arrastrar la barra: consultar la nueva posición cuando el usuario se detiene
+            if self._jump_after_id is not None:
+                self.top.after_cancel(self._jump_after_id)
+            position = int(max(0.0, min(float(args[0]), 1.0)) * self.total)
+            self._jump_after_id = self.top.after(self.settings['jump_delay_ms'], lambda: self.jump_to(position))
+
+    def jump_to(self, position: int):
+        self._jump_after_id = None
+        if self.total is None:
+            return
+        position = min(position, max(self.total - self.window.height, 0))
+        if position == 0:
+            self.reload()
+            return
+        self._new_generation()
+        self._fetching = True
+        self._submit(self.controller.handle_browse_jump, lambda result: self._on_load(result, position),
+                     self.query, position, self.settings['page_size'])
+
+    def _render(self):
+        visible = self.window.visible()
+        for index in range(self.window.height):
+            values = ()
+            if index < len(visible):
+                values = ["" if value is None else value for value in visible[index][2:]]
+            self.tree.item(str(index), values=values)
+
+        start = self.window.position()
+        if not visible:
+            self.status_label.configure(text=Messages.BROWSER_EMPTY if not self._fetching else Messages.BROWSER_LOADING)
+            self.scrollbar.set(0.0, 1.0)
+            return
+        end = start + len(visible)
+        if self.total:
+            self.status_label.configure(text=Messages.BROWSER_POSITION.format(start + 1, end, self.total))
+            self.scrollbar.set(start / self.total, end / self.total)
+        else:
+            self.status_label.configure(text=Messages.BROWSER_POSITION_COUNTING.format(start + 1, end))
+
+    def close(self):
+        self._generation += 1
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.top.destroy()